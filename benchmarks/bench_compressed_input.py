@@ -0,0 +1,106 @@
+"""
+Reading compressed SSPs and scans directly versus decompressing them to disk first
+
+For each compression format, the "decompress" workflow writes the
+decompressed file next to the archive and parses that, the way archived
+inputs had to be handled before; the "stream" workflow hands the
+compressed file straight to the loaders. Disk I/O is the number of bytes
+read and written by the process (from /proc/self/io, where available).
+
+Usage:
+    python -m benchmarks.bench_compressed_input --hosts 1000 --items-per-host 100
+"""
+import argparse
+import bz2
+import gzip
+import lzma
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional
+from benchmarks.synthetic import generate_ssp, write_nessus
+from core import compression, serialization
+from core.core_functionality import load_file
+from core.scan_reader import NessusScanReader
+
+_COMPRESSORS: Dict[str, tuple] = {
+    "gz": (".gz", gzip.compress),
+    "bz2": (".bz2", bz2.compress),
+    "xz": (".xz", lzma.compress),
+}
+if compression.zstandard is not None:
+    _COMPRESSORS["zst"] = (".zst", lambda data: compression.zstandard.ZstdCompressor().compress(data))
+
+def _io_bytes() -> Optional[tuple]:
+    """Bytes read and written by this process so far, or None if the platform does not report them"""
+    try:
+        counters = dict(line.split(": ") for line in Path("/proc/self/io").read_text().splitlines())
+    except OSError:
+        return None
+    return int(counters["rchar"]), int(counters["wchar"])
+
+def _parse_scan(path: Path) -> None:
+    for _ in NessusScanReader(str(path)):
+        pass
+
+def _parse_document(path: Path) -> None:
+    load_file(str(path))
+
+def _decompress_then_parse(path: Path, parse: Callable[[Path], None]) -> None:
+    plain = path.with_name("decompressed-" + path.with_suffix("").name)
+    with compression.open_input(path) as source, plain.open("wb") as target:
+        shutil.copyfileobj(source, target, 1024 * 1024)
+    try:
+        parse(plain)
+    finally:
+        plain.unlink()
+
+def _measure(func: Callable[[], None]) -> tuple:
+    before = _io_bytes()
+    start = time.perf_counter()
+    func()
+    seconds = time.perf_counter() - start
+    after = _io_bytes()
+    if before is None or after is None:
+        return seconds, None, None
+    return seconds, (after[0] - before[0]) / 1024 ** 2, (after[1] - before[1]) / 1024 ** 2
+
+def _report(label: str, fmt: str, workflow: str, result: tuple) -> None:
+    seconds, read_mb, written_mb = result
+    io = f"{read_mb:>9.1f} {written_mb:>9.1f}" if read_mb is not None else f"{'n/a':>9} {'n/a':>9}"
+    print(f"{label:<6} {fmt:<5} {workflow:<11} {seconds:>8.2f} {io}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark compressed input handling")
+    parser.add_argument("--hosts", type=int, default=1000, help="Hosts in the synthetic scan")
+    parser.add_argument("--items-per-host", type=int, default=100, help="ReportItems per host")
+    parser.add_argument("--ssp-scale", type=int, default=20000,
+                        help="Components, inventory items and controls in the synthetic SSP")
+    parser.add_argument("--formats", nargs="+", default=list(_COMPRESSORS), choices=list(_COMPRESSORS),
+                        help="Compression formats to measure")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="oscal-bench-compressed-") as workdir:
+        scan_path = write_nessus(Path(workdir) / "scan.nessus", hosts=args.hosts,
+                                 items_per_host=args.items_per_host)
+        ssp_path = Path(workdir) / "ssp.json"
+        serialization.dump(generate_ssp(components=args.ssp_scale, inventory_items=args.ssp_scale,
+                                        controls=args.ssp_scale), ssp_path)
+        inputs = [("scan", scan_path, _parse_scan), ("ssp", ssp_path, _parse_document)]
+        for label, path, _ in inputs:
+            print(f"{label}: {path.stat().st_size / 1024 ** 2:.1f} MB uncompressed")
+
+        print(f"\n{'input':<6} {'fmt':<5} {'workflow':<11} {'seconds':>8} {'read MB':>9} {'write MB':>9}")
+        for label, path, parse in inputs:
+            _report(label, "-", "plain", _measure(lambda: parse(path)))
+            for fmt in args.formats:
+                suffix, compress = _COMPRESSORS[fmt]
+                archive = path.with_name(path.name + suffix)
+                archive.write_bytes(compress(path.read_bytes()))
+                _report(label, fmt, "decompress", _measure(lambda: _decompress_then_parse(archive, parse)))
+                _report(label, fmt, "stream", _measure(lambda: parse(archive)))
+                archive.unlink()
+
+if __name__ == "__main__":
+    main()
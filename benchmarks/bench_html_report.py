@@ -0,0 +1,52 @@
+"""
+Time and memory of the visualize-components HTML report as the inventory grows
+
+The document index is built before measuring, so the figures cover only
+the report writer. Time per item should stay flat and peak memory should
+not grow with the number of inventory items.
+
+Usage:
+    python -m benchmarks.bench_html_report --items 1000 10000 100000
+    python -m benchmarks.bench_html_report --items 100000 --page-size 5000
+"""
+import argparse
+import gc
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from benchmarks.synthetic import generate_ssp
+from commands.visualize_components import OSCALVisualizer
+from core.document_index import DocumentIndex
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the HTML report writer")
+    parser.add_argument("--items", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="Inventory item counts to measure")
+    parser.add_argument("--components", type=int, default=200, help="Components per SSP")
+    parser.add_argument("--page-size", type=int, default=None, help="Split inventory items into pages")
+    args = parser.parse_args()
+
+    print(f"{'items':>8} {'seconds':>9} {'us/item':>9} {'peak MB':>9} {'output MB':>10}")
+    with tempfile.TemporaryDirectory(prefix="oscal-bench-html-") as workdir:
+        visualizer = OSCALVisualizer(workdir)
+        for items in args.items:
+            document = generate_ssp(components=args.components, inventory_items=items, controls=100, users=0)
+            index = DocumentIndex(document)
+            gc.collect()
+
+            tracemalloc.start()
+            start = time.perf_counter()
+            visualizer.generate_html_report(document, args.page_size, index)
+            seconds = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            size = sum(path.stat().st_size for path in Path(workdir).iterdir())
+            for path in Path(workdir).iterdir():
+                path.unlink()
+            print(f"{items:>8} {seconds:>9.2f} {seconds / items * 1e6:>9.1f} "
+                  f"{peak / 1024 ** 2:>9.2f} {size / 1024 ** 2:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Filtering scan findings after parsing versus while reading the file
+
+The "parse then filter" rows parse every ReportItem and keep the ones the
+filter accepts, as generate-poam and monthly-report used to. The "filtered
+read" rows hand the same ScanFilter to NessusScanReader, which cuts the
+rejected ReportItems out before the XML parser sees them. The synthetic
+scan is 80% informational findings.
+
+Usage:
+    python -m benchmarks.bench_scan_filter --hosts 2000 --items-per-host 100
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict
+from benchmarks.synthetic import write_nessus
+from core.scan_filter import ScanFilter
+from core.scan_reader import NessusScanReader, filter_host
+
+FILTERS: Dict[str, ScanFilter] = {
+    "severity >= 1": ScanFilter(min_severity=1),
+    "severity >= 2": ScanFilter(min_severity=2),
+    "hosts 10.0.0.0/24": ScanFilter.from_options(hosts=["10.0.0.0/24"]),
+    "ports 22,443": ScanFilter.from_options(ports="22,443"),
+}
+
+def parse_then_filter(path: Path, scan_filter: ScanFilter) -> int:
+    hosts = (filter_host(host, scan_filter) for host in NessusScanReader(str(path)))
+    return sum(len(host.findings) for host in hosts if host is not None)
+
+def filtered_read(path: Path, scan_filter: ScanFilter) -> int:
+    return sum(len(host.findings) for host in NessusScanReader(str(path), scan_filter))
+
+def _timed(func, *args) -> tuple:
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark filtering while reading scans")
+    parser.add_argument("--hosts", type=int, default=2000, help="Hosts in the synthetic scan")
+    parser.add_argument("--items-per-host", type=int, default=100, help="ReportItems per host")
+    parser.add_argument("--plugins", type=int, default=2000, help="Size of the plugin pool")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="oscal-bench-scan-filter-") as workdir:
+        path = write_nessus(Path(workdir) / "scan.nessus", hosts=args.hosts,
+                            items_per_host=args.items_per_host, plugins=args.plugins)
+        print(f"Scan: {path.stat().st_size / 1024 ** 2:.1f} MB, {args.hosts * args.items_per_host} ReportItems")
+        print(f"{'filter':<18} {'findings':>9} {'parse then filter':>18} {'filtered read':>14} "
+              f"{'speedup':>8} {'identical':>10}")
+        for name, scan_filter in FILTERS.items():
+            before, expected = _timed(parse_then_filter, path, scan_filter)
+            after, kept = _timed(filtered_read, path, scan_filter)
+            print(f"{name:<18} {kept:>9} {before:>17.2f}s {after:>13.2f}s {before / after:>8.1f} "
+                  f"{str(kept == expected):>10}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Memory held by a fully loaded scan
+
+Parses a synthetic .nessus file with load_scan, as the run command and
+multi-file scans do, and reports the memory retained by the resulting
+ScanResults and the peak while parsing, both measured with tracemalloc.
+
+Usage:
+    python -m benchmarks.bench_scan_memory --hosts 10000 --items-per-host 100
+"""
+import argparse
+import gc
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from benchmarks.synthetic import write_nessus
+from core.scan_reader import load_scan
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the memory used by loaded scans")
+    parser.add_argument("--hosts", type=int, default=10000, help="Hosts in the synthetic scan")
+    parser.add_argument("--items-per-host", type=int, default=100, help="ReportItems per host")
+    parser.add_argument("--plugins", type=int, default=20000, help="Size of the plugin pool")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="oscal-bench-scan-memory-") as workdir:
+        path = write_nessus(Path(workdir) / "scan.nessus", hosts=args.hosts,
+                            items_per_host=args.items_per_host, plugins=args.plugins)
+        print(f"Scan: {path.stat().st_size / 1024 ** 2:.1f} MB, {args.hosts * args.items_per_host} ReportItems")
+
+        gc.collect()
+        tracemalloc.start()
+        start = time.perf_counter()
+        scan = load_scan(str(path))
+        seconds = time.perf_counter() - start
+        gc.collect()
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        findings = sum(len(host.findings) for host in scan.hosts)
+        print(f"{'seconds':>8} {'retained MB':>12} {'peak MB':>9} {'bytes/finding':>14}")
+        print(f"{seconds:>8.1f} {retained / 1024 ** 2:>12.1f} {peak / 1024 ** 2:>9.1f} "
+              f"{retained / max(findings, 1):>14.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Load and dump throughput of the JSON backends in core.serialization
+
+Usage:
+    python -m benchmarks.bench_serialization --size-mb 300
+"""
+import argparse
+import gc
+import time
+from core import serialization
+from benchmarks.synthetic import generate_ssp
+
+# Components, inventory items and controls per MB of serialized SSP
+_SCALE_PER_MB = 340
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JSON backends on a synthetic SSP")
+    parser.add_argument("--size-mb", type=int, default=200, help="Approximate document size in MB")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per operation")
+    args = parser.parse_args()
+
+    count = args.size_mb * _SCALE_PER_MB
+    document = generate_ssp(components=count, inventory_items=count, controls=count)
+    reference = serialization.get_backend("json").dumps(document)
+    size_mb = len(reference) / 1024 ** 2
+    print(f"Synthetic SSP: {size_mb:.1f} MB")
+    print(f"{'backend':<8} {'dump MB/s':>10} {'load MB/s':>10} {'identical':>10}")
+
+    # Collector pauses on a heap this size swamp the parsers themselves
+    gc.collect()
+    gc.disable()
+    for name in serialization.BACKENDS:
+        backend = serialization.get_backend(name)
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            encoded = backend.dumps(document)
+        dump_rate = size_mb * args.repeat / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            decoded = backend.loads(encoded)
+            del decoded
+        load_rate = size_mb * args.repeat / (time.perf_counter() - start)
+
+        print(f"{name:<8} {dump_rate:>10.1f} {load_rate:>10.1f} {str(encoded == reference):>10}")
+        del encoded
+    gc.enable()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Cold-start time of CLI commands compared with a bare interpreter
+
+Every command is run as a fresh `python main.py` process against the small
+example documents in docs/templates, so the time is dominated by interpreter
+startup and imports rather than by the command's own work.
+
+Usage:
+    python -m benchmarks.bench_startup --runs 20
+    python -m benchmarks.bench_startup --commands roles poams visualize-components
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+TEMPLATES = REPO_ROOT / "docs" / "templates"
+
+DEFAULT_COMMANDS = ["roles", "components", "poams", "activities", "security-levels",
+                    "user-privileges", "implemented-controls"]
+
+COMMAND_INPUTS = {
+    "poams": TEMPLATES / "ifa_poam_example.json",
+    "activities": TEMPLATES / "ifa_sap_example.json",
+    "portscheck": TEMPLATES / "scan_example.xml",
+}
+
+def time_process(args: List[str], runs: int) -> List[float]:
+    """Wall time in milliseconds of each of `runs` executions of a process"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(args, cwd=REPO_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CLI cold-start time")
+    parser.add_argument("--runs", type=int, default=10, help="Runs per command")
+    parser.add_argument("--commands", nargs="+", default=DEFAULT_COMMANDS, help="Commands to time")
+    args = parser.parse_args()
+
+    baseline = statistics.median(time_process([sys.executable, "-c", "pass"], args.runs))
+    print(f"{'command':<22} {'median ms':>10} {'over bare':>10}")
+    print(f"{'(bare interpreter)':<22} {baseline:>10.1f} {0:>10.1f}")
+
+    for command in args.commands:
+        document = COMMAND_INPUTS.get(command, TEMPLATES / "ifa_ssp_example.json")
+        median = statistics.median(time_process(
+            [sys.executable, "main.py", str(document), command, "--no-cache"], args.runs))
+        print(f"{command:<22} {median:>10.1f} {median - baseline:>10.1f}")
+
+if __name__ == "__main__":
+    main()
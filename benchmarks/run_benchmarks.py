@@ -0,0 +1,224 @@
+"""
+Time and memory-profile every registered command against synthetic inputs
+
+Each measurement runs in a freshly spawned process that reports its own
+wall time and peak RSS, so results are not skewed by earlier runs. Results
+are written as JSON and can be compared against a previous run to flag
+regressions.
+
+Usage:
+    python -m benchmarks.run_benchmarks --scale medium --output results.json
+    python -m benchmarks.run_benchmarks --baseline previous.json --threshold 1.25
+"""
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+SCALES = {
+    "small": {"components": 100, "inventory_items": 500, "controls": 300, "users": 20,
+              "poam_items": 1000, "activities": 50, "hosts": 100, "items_per_host": 100, "plugins": 2000},
+    "medium": {"components": 1000, "inventory_items": 5000, "controls": 1000, "users": 200,
+               "poam_items": 10000, "activities": 500, "hosts": 1000, "items_per_host": 100, "plugins": 5000},
+    "large": {"components": 10000, "inventory_items": 50000, "controls": 1000, "users": 2000,
+              "poam_items": 50000, "activities": 5000, "hosts": 5000, "items_per_host": 200, "plugins": 20000},
+}
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+def _measure_command(command: str, inputs: Dict[str, str], workdir: str) -> Dict[str, Any]:
+    """Child process: run one registered command the way main.py would"""
+    os.chdir(workdir)
+    sys.path.insert(0, str(REPO_ROOT))
+    import main
+    from core import core_functionality
+    from core.scan_ingest import open_scans
+
+    registry = main.setup_registry()
+    func, validator = registry.get_command(command)
+    document = command_input(command, validator, inputs)
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if command in main.SCAN_INPUT_COMMANDS:
+            func(open_scans([inputs["scan"]], use_cache=False))
+        else:
+            oscal_file = core_functionality.load_file(document, registry.get_paths(command))
+            scan = open_scans([inputs["scan"]], use_cache=False) if command in main.SCAN_COMMANDS else None
+            main.dispatch_command(command, func, validator, oscal_file, scan)
+    return {"seconds": time.perf_counter() - start, "peak_rss_mb": _peak_rss_mb()}
+
+def _measure_phase(phase: str, inputs: Dict[str, str], workdir: str) -> Dict[str, Any]:
+    """Child process: run one internal phase (scan parse or POA&M reconciliation)"""
+    os.chdir(workdir)
+    sys.path.insert(0, str(REPO_ROOT))
+    from core import serialization
+    from core.scan_reader import NessusScanReader, load_scan
+    from core.poam_reconciler import PoamReconciler
+
+    if phase == "scan-parse":
+        start = time.perf_counter()
+        count = sum(len(host.findings) for host in NessusScanReader(inputs["scan"]))
+        return {"seconds": time.perf_counter() - start, "peak_rss_mb": _peak_rss_mb(), "records": count}
+
+    if phase == "poam-reconcile":
+        items = serialization.load(inputs["poam"])["plan-of-action-and-milestones"]["poam-items"]
+        findings = [f for f in load_scan(inputs["scan"]).findings() if f.severity >= 2]
+        start = time.perf_counter()
+        result = PoamReconciler(items).reconcile(findings)
+        return {"seconds": time.perf_counter() - start, "peak_rss_mb": _peak_rss_mb(),
+                "records": len(result.items)}
+
+    raise ValueError(f"Unknown phase {phase}")
+
+PHASES = ["scan-parse", "poam-reconcile"]
+
+def command_input(command: str, validator, inputs: Dict[str, str]) -> str:
+    """Pick the synthetic document a command runs against from its validator"""
+    import main
+
+    if command in main.SCAN_INPUT_COMMANDS:
+        return inputs["scan"]
+    name = getattr(validator, "__name__", "")
+    if "sap" in name:
+        return inputs["sap"]
+    if "poam" in name:
+        return inputs["poam"]
+    return inputs["ssp"]
+
+def generate_inputs(workdir: Path, scale: Dict[str, int], seed: int = 0) -> Dict[str, str]:
+    """Write the synthetic SSP, POA&M, SAP and scan used by the benchmarks"""
+    from core import serialization
+    from benchmarks import synthetic
+
+    inputs = {
+        "ssp": workdir / "ssp.json",
+        "poam": workdir / "poam.json",
+        "sap": workdir / "sap.json",
+        "scan": workdir / "scan.nessus",
+    }
+    serialization.dump(synthetic.generate_ssp(scale["components"], scale["inventory_items"],
+                                              scale["controls"], scale["users"], seed=seed), inputs["ssp"])
+    serialization.dump(synthetic.generate_poam(scale["poam_items"], scale["hosts"],
+                                               scale["plugins"], seed=seed), inputs["poam"])
+    serialization.dump(synthetic.generate_sap(scale["activities"], seed=seed), inputs["sap"])
+    synthetic.write_nessus(inputs["scan"], scale["hosts"], scale["items_per_host"], scale["plugins"], seed=seed)
+
+    template = REPO_ROOT / "docs" / "templates" / "monthly-report-template.md"
+    (workdir / "docs" / "templates").mkdir(parents=True, exist_ok=True)
+    shutil.copy(template, workdir / "docs" / "templates" / template.name)
+    return {name: str(path) for name, path in inputs.items()}
+
+def _run_isolated(target, *args) -> Dict[str, Any]:
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(1) as pool:
+        try:
+            return {"status": "ok", **pool.apply(target, args)}
+        except Exception as e:
+            return {"status": "error", "error": f"{type(e).__name__}: {e}"}
+
+def run_benchmarks(scale_name: str, scale: Dict[str, int], commands: Optional[List[str]] = None,
+                   workdir: Optional[str] = None, seed: int = 0) -> Dict[str, Any]:
+    """Generate inputs, then measure every phase and registered command"""
+    sys.path.insert(0, str(REPO_ROOT))
+    import main
+
+    with contextlib.ExitStack() as stack:
+        if workdir is None:
+            workdir = stack.enter_context(tempfile.TemporaryDirectory(prefix="oscal-bench-"))
+        workdir_path = Path(workdir)
+        workdir_path.mkdir(parents=True, exist_ok=True)
+
+        start = time.perf_counter()
+        inputs = generate_inputs(workdir_path, scale, seed)
+        print(f"Generated {scale_name} inputs in {time.perf_counter() - start:.1f}s")
+
+        results = []
+        for phase in PHASES:
+            result = {"name": phase, "kind": "phase", **_run_isolated(_measure_phase, phase, inputs, workdir)}
+            results.append(result)
+            _print_result(result)
+
+        for command in commands or main.setup_registry().list_commands():
+            result = {"name": command, "kind": "command",
+                      **_run_isolated(_measure_command, command, inputs, workdir)}
+            results.append(result)
+            _print_result(result)
+
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scale": {"name": scale_name, **scale},
+        "inputs": {name: os.path.basename(path) for name, path in inputs.items()},
+        "results": results,
+    }
+
+def _print_result(result: Dict[str, Any]) -> None:
+    if result["status"] == "ok":
+        print(f"{result['name']:<22} {result['seconds']:>9.3f}s {result['peak_rss_mb']:>9.1f} MB")
+    else:
+        print(f"{result['name']:<22} {'failed':>10} {result['error']}")
+
+def find_regressions(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """List measurements that got slower or bigger than baseline by more than threshold"""
+    previous = {r["name"]: r for r in baseline.get("results", []) if r.get("status") == "ok"}
+    regressions = []
+    for result in current["results"]:
+        before = previous.get(result["name"])
+        if result.get("status") != "ok" or not before:
+            continue
+        for metric in ("seconds", "peak_rss_mb"):
+            if before[metric] > 0 and result[metric] / before[metric] > threshold:
+                regressions.append(f"{result['name']} {metric}: {before[metric]:.3f} -> {result[metric]:.3f}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark OSCAL Swiss Army Knife commands")
+    parser.add_argument("--scale", choices=SCALES, default="small", help="Preset input sizes")
+    for key in SCALES["small"]:
+        parser.add_argument(f"--{key.replace('_', '-')}", type=int, dest=key,
+                            help=f"Override the preset {key.replace('_', ' ')}")
+    parser.add_argument("--commands", nargs="+", help="Only benchmark these commands")
+    parser.add_argument("--workdir", help="Keep generated inputs and outputs in this directory")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the generators")
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to write the JSON results")
+    parser.add_argument("--baseline", help="Previous results file to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="Ratio over baseline that counts as a regression")
+    args = parser.parse_args()
+
+    scale = dict(SCALES[args.scale])
+    for key in scale:
+        if getattr(args, key) is not None:
+            scale[key] = getattr(args, key)
+
+    results = run_benchmarks(args.scale, scale, args.commands, args.workdir, args.seed)
+    Path(args.output).write_text(json.dumps(results, indent=2))
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        regressions = find_regressions(results, json.loads(Path(args.baseline).read_text()), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Generators for synthetic OSCAL documents and Nessus scans at configurable scale
+
+All generators are seeded so repeated runs produce the same documents, and
+the POA&M and scan generators draw from the same host and plugin pools so
+that reconciliation has real matches, new findings and resolved items.
+"""
+import random
+import uuid
+from pathlib import Path
+from typing import Dict, Any, List, Union
+from xml.sax.saxutils import escape, quoteattr
+
+CONTROL_FAMILIES = ["ac", "at", "au", "ca", "cm", "cp", "ia", "ir", "ma", "mp",
+                    "pe", "pl", "ps", "ra", "sa", "sc", "si", "sr"]
+SEVERITY_WEIGHTS = {0: 80, 1: 10, 2: 6, 3: 3, 4: 1}
+PORTS = [("0", "general", "tcp"), ("22", "ssh", "tcp"), ("80", "www", "tcp"),
+         ("443", "www", "tcp"), ("445", "cifs", "tcp"), ("3389", "msrdp", "tcp"),
+         ("161", "snmp", "udp"), ("1433", "mssql", "tcp")]
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+def host_names(hosts: int) -> List[str]:
+    return [f"host{i:06d}" for i in range(hosts)]
+
+def plugin_ids(plugins: int) -> List[str]:
+    return [str(10000 + i) for i in range(plugins)]
+
+def control_ids(controls: int) -> List[str]:
+    return [f"{CONTROL_FAMILIES[i % len(CONTROL_FAMILIES)]}-{i // len(CONTROL_FAMILIES) + 1}"
+            for i in range(controls)]
+
+def generate_ssp(components: int = 100, inventory_items: int = 500, controls: int = 300,
+                 users: int = 20, back_matter_resources: int = 0, seed: int = 0) -> Dict[str, Any]:
+    """
+    Build a system security plan
+
+    Args:
+        components: Number of system-implementation components
+        inventory_items: Number of inventory items, each implementing a component
+        controls: Number of implemented requirements
+        users: Number of system users
+        back_matter_resources: Number of back-matter resources with embedded base64 content
+        seed: Random seed
+    """
+    rng = random.Random(seed)
+    roles = [{"id": role_id, "title": f"Synthetic {role_id}"}
+             for role_id in ["owner", "developer", "system-engineer", "public-affairs-office", "admin"]]
+
+    component_list = []
+    for i in range(components):
+        component_list.append({
+            "uuid": _uuid(rng),
+            "type": rng.choice(["software", "hardware", "service", "policy", "this-system"]),
+            "title": f"Component {i}",
+            "description": f"Synthetic component {i} used for benchmarks.",
+            "props": [{"name": "asset-type", "value": "software"}],
+            "status": {"state": "operational"}
+        })
+    for comp in component_list:
+        if component_list and rng.random() < 0.3:
+            comp["links"] = [{"href": f"#{rng.choice(component_list)['uuid']}", "rel": "depends-on",
+                              "text": "Dependency"}]
+
+    items = []
+    for i in range(inventory_items):
+        items.append({
+            "uuid": _uuid(rng),
+            "description": f"Inventory item {i} in the synthetic boundary",
+            "props": [{"name": "asset-id", "value": f"asset-{i}"},
+                      {"name": "ipv4-address", "value": f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}"}],
+            "implemented-components": [{"component-uuid": rng.choice(component_list)["uuid"]}]
+            if component_list else []
+        })
+
+    requirements = []
+    for control_id in control_ids(controls):
+        statements = []
+        for part in "abc"[:rng.randint(0, 3)]:
+            by_components = []
+            for comp in rng.sample(component_list, min(len(component_list), rng.randint(1, 3))):
+                by_components.append({
+                    "component-uuid": comp["uuid"],
+                    "uuid": _uuid(rng),
+                    "description": f"{comp['title']} implements {control_id} part {part}.",
+                    "set-parameters": [{"param-id": f"{control_id}_prm_1",
+                                        "values": [rng.choice(["30 days", "90 days", "annually"])]}]
+                })
+            statements.append({"statement-id": f"{control_id}_smt.{part}", "uuid": _uuid(rng),
+                               "by-components": by_components})
+        requirement = {"uuid": _uuid(rng), "control-id": control_id}
+        if statements:
+            requirement["statements"] = statements
+        requirements.append(requirement)
+
+    user_list = [{
+        "uuid": _uuid(rng),
+        "title": f"User {i}",
+        "props": [{"name": "type", "value": rng.choice(["internal", "external"])}],
+        "role-ids": [rng.choice(roles)["id"]],
+        "authorized-privileges": [{"title": "Administer", "functions-performed": ["manage", "audit"]}]
+    } for i in range(users)]
+
+    ssp = {
+        "uuid": _uuid(rng),
+        "metadata": {"title": "Synthetic SSP", "last-modified": "2024-01-01T00:00:00Z",
+                     "version": "1.0", "oscal-version": "1.1.2", "roles": roles},
+        "system-characteristics": {
+            "system-ids": [{"identifier-type": "https://fedramp.gov", "id": "SYN-0001"}],
+            "system-name": "Synthetic System",
+            "security-impact-level": {"security-objective-confidentiality": "high",
+                                      "security-objective-integrity": "high",
+                                      "security-objective-availability": "moderate"},
+            "system-information": {"information-types": [{
+                "title": "Synthetic Information", "description": "Generated",
+                "confidentiality-impact": {"base": "high"},
+                "integrity-impact": {"base": "high"},
+                "availability-impact": {"base": "moderate"}}]}
+        },
+        "system-implementation": {"users": user_list, "components": component_list,
+                                  "inventory-items": items},
+        "control-implementation": {"description": "Synthetic control implementation",
+                                   "implemented-requirements": requirements}
+    }
+    if back_matter_resources:
+        ssp["back-matter"] = {"resources": [{
+            "uuid": _uuid(rng), "title": f"Attachment {i}",
+            "base64": {"filename": f"attachment{i}.pdf", "value": "QUJD" * 25000}
+        } for i in range(back_matter_resources)]}
+
+    return {"system-security-plan": ssp}
+
+def generate_poam(items: int = 1000, hosts: int = 100, plugins: int = 2000, seed: int = 0) -> Dict[str, Any]:
+    """
+    Build a plan of action and milestones whose items reference scan findings
+
+    Items are spread over the same host and plugin pools as generate_nessus.
+    """
+    rng = random.Random(seed + 1)
+    host_pool = host_names(hosts)
+    plugin_pool = plugin_ids(plugins)
+    poam_items = []
+    for i in range(items):
+        status = rng.choice(["open", "open", "in-progress", "pending", "completed"])
+        poam_items.append({
+            "uuid": _uuid(rng),
+            "title": f"POA&M item {i}",
+            "description": f"Remediate synthetic finding {i}.",
+            "status": status,
+            "related-findings": {"plugin_id": rng.choice(plugin_pool), "host": rng.choice(host_pool),
+                                 "severity": rng.randint(2, 4)}
+        })
+
+    return {"plan-of-action-and-milestones": {
+        "uuid": _uuid(rng),
+        "metadata": {"title": "Synthetic POA&M", "last-modified": "2024-01-01T00:00:00Z",
+                     "version": "1.0", "oscal-version": "1.1.2"},
+        "system-id": {"identifier-type": "https://fedramp.gov", "id": "SYN-0001"},
+        "poam-items": poam_items,
+        "risks": [{"uuid": _uuid(rng), "title": f"Risk {i}", "status": "open",
+                   "characterizations": [{"facets": [{"name": "impact", "value": rng.choice(["high", "low"])}]}]}
+                  for i in range(max(1, items // 10))]
+    }}
+
+def generate_sap(activities: int = 50, seed: int = 0) -> Dict[str, Any]:
+    """Build an assessment plan with the given number of activities"""
+    rng = random.Random(seed + 2)
+    return {"assessment-plan": {
+        "uuid": _uuid(rng),
+        "metadata": {"title": "Synthetic SAP", "version": "1.0", "oscal-version": "1.1.2",
+                     "roles": [{"id": "assessor", "title": "Synthetic 3PAO"}]},
+        "local-definitions": {"activities": [{
+            "uuid": _uuid(rng), "title": f"Activity {i}",
+            "description": "Synthetic assessment activity",
+            "steps": [{"uuid": _uuid(rng), "title": f"Step 1 of activity {i}"}]
+        } for i in range(activities)]}
+    }}
+
+def write_nessus(path: Union[str, Path], hosts: int = 100, items_per_host: int = 100,
+                 plugins: int = 2000, seed: int = 0) -> Path:
+    """
+    Write a .nessus v2 scan file, streaming it so very large scans fit in memory
+
+    Args:
+        path: Output file
+        hosts: Number of ReportHost elements
+        items_per_host: ReportItems per host
+        plugins: Size of the plugin pool findings are drawn from
+        seed: Random seed
+    """
+    rng = random.Random(seed + 3)
+    path = Path(path)
+    host_pool = host_names(hosts)
+    plugin_pool = plugin_ids(plugins)
+    severities = list(SEVERITY_WEIGHTS)
+    weights = list(SEVERITY_WEIGHTS.values())
+    families = ["General", "Windows", "Web Servers", "Databases", "Misc."]
+
+    with path.open("w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" ?>\n<NessusClientData_v2>\n<Policy><policyName>Synthetic</policyName>\n')
+        f.write("<Preferences><ServerPreferences><preference><name>TARGET</name>\n")
+        f.write(f"<value>{escape(','.join(host_pool[:1000]))}</value>\n")
+        f.write("</preference>\n</ServerPreferences>\n</Preferences>\n</Policy>\n")
+        f.write('<Report name="Synthetic">\n')
+        for index, hostname in enumerate(host_pool):
+            f.write(f'<ReportHost name={quoteattr(hostname)}><HostProperties>\n')
+            f.write(f'<tag name="operating-system">{rng.choice(["Linux Kernel 5.15", "Windows Server 2019"])}</tag>\n')
+            f.write(f'<tag name="host-ip">10.{index // 65536 % 256}.{index // 256 % 256}.{index % 256}</tag>\n')
+            f.write("</HostProperties>\n")
+            for _ in range(items_per_host):
+                plugin_id = rng.choice(plugin_pool)
+                port, service, protocol = rng.choice(PORTS)
+                severity = rng.choices(severities, weights)[0]
+                name = f"Synthetic Plugin {plugin_id}"
+                if int(plugin_id) % 97 == 0:
+                    name += " FIPS-140 Compliance"
+                elif int(plugin_id) % 89 == 0:
+                    name += " End of Life Detection"
+                f.write(f'<ReportItem port="{port}" svc_name="{service}" protocol="{protocol}" '
+                        f'severity="{severity}" pluginID="{plugin_id}" pluginName={quoteattr(name)} '
+                        f'pluginFamily="{families[int(plugin_id) % len(families)]}">\n')
+                f.write(f"<description>Synthetic description for plugin {plugin_id}. "
+                        "The remote host is affected by a synthetic vulnerability used for benchmarks."
+                        "</description>\n")
+                f.write(f"<plugin_name>{escape(name)}</plugin_name>\n")
+                f.write(f"<solution>Apply the synthetic patch for plugin {plugin_id}.</solution>\n")
+                f.write("</ReportItem>\n")
+            f.write("</ReportHost>\n")
+        f.write("</Report>\n</NessusClientData_v2>\n")
+
+    return path
@@ -0,0 +1,70 @@
+import csv
+import sys
+from typing import Dict, Any, Optional
+from core import serialization
+from core.control_coverage import ControlCoverage, control_family
+from core.document_index import DocumentIndex
+
+OUTPUT_FORMATS = ["text", "json", "csv"]
+
+def analyze_control_coverage(oscal_file: Dict[str, Any], family: Optional[str] = None,
+                             component: Optional[str] = None, param: Optional[str] = None,
+                             missing_statements: bool = False, output_format: str = "text") -> None:
+    """
+    Query which controls are implemented by which components
+
+    Args:
+        oscal_file: Loaded SSP
+        family: Only controls in this family (e.g. "ac")
+        component: Only controls implemented by this component (uuid or title)
+        param: Only controls using this set-parameter value ("value" or "param-id=value")
+        missing_statements: Only controls without implementation statements
+        output_format: "text" for a readable listing, "json" for the matching
+            controls and summary, "csv" for the controls x components matrix
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"control-coverage cannot write {output_format} "
+                         f"(expected one of: {', '.join(OUTPUT_FORMATS)})")
+    index = DocumentIndex(oscal_file)
+    coverage = ControlCoverage(index)
+    mask = coverage.query(family, component, param, missing_statements)
+    filters = {"family": family, "component": component, "param": param,
+               "missing_statements": missing_statements}
+
+    if output_format == "csv":
+        matrix = coverage.matrix(mask)
+        writer = csv.writer(sys.stdout)
+        writer.writerow(["control-id"] + [index.component_title(uuid) or uuid for uuid in matrix["components"]])
+        for control_id, row in zip(matrix["controls"], matrix["rows"]):
+            writer.writerow([control_id] + row)
+        return
+
+    controls = [{
+        "control-id": control_id,
+        "family": control_family(control_id),
+        "statements": len(index.requirements[control_id].get("statements", [])),
+        "components": coverage.components_for(control_id),
+    } for control_id in coverage.controls(mask)]
+    summary = coverage.summary(mask)
+
+    if output_format == "json":
+        print(serialization.dumps({
+            "filters": {key: value for key, value in filters.items() if value},
+            "summary": summary,
+            "controls": controls,
+            "components": {uuid: index.component_title(uuid) for uuid in coverage.component_ids},
+        }).decode("utf-8"))
+        return
+
+    print("\nControl Coverage Analysis")
+    print("=========================")
+    active = ", ".join(f"{key}={value}" for key, value in filters.items() if value)
+    if active:
+        print(f"Filters: {active}")
+    for control in controls:
+        names = [index.component_title(uuid) or uuid for uuid in control["components"]]
+        print(f"\n{control['control-id']}: {control['statements']} statements, {len(names)} components")
+        for name in names:
+            print(f"  * {name}")
+    print(f"\nCoverage: {summary['implemented']} of {summary['controls']} controls "
+          f"implemented by at least one component ({summary['percent']}%)")
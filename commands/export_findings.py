@@ -0,0 +1,56 @@
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+from core.compression import logical_stem
+from core.findings_export import DEFAULT_BATCH_SIZE, EXPORT_FORMATS, export_findings as write_findings
+from core.scan_filter import ScanFilter
+from core.scan_reader import ScanSource, open_scan
+
+def export_findings(scan_file_path: ScanSource, output_format: Optional[str] = None,
+                    output: Optional[str] = None, batch_size: Optional[int] = None,
+                    min_severity: Optional[int] = None, hosts: Optional[List[str]] = None,
+                    plugin_families: Optional[List[str]] = None, ports: Optional[str] = None,
+                    artifact_dir: Optional[str] = None) -> None:
+    """
+    Convert the findings of a Nessus scan into a columnar dataset
+
+    Args:
+        scan_file_path: Path to the Nessus scan XML file, or a scan already
+            loaded with core.scan_reader.load_scan
+        output_format: "csv" (default), "parquet" or "arrow"
+        output: Output file, defaults to docs/<scan>_findings_<timestamp> with
+            the format's suffix
+        batch_size: Rows converted and written at a time
+        min_severity: Only export findings of at least this severity
+        hosts: Only these host names, IP addresses or CIDR networks
+        plugin_families: Only findings from these plugin families
+        ports: Only findings on these ports, e.g. "22,80-443"
+        artifact_dir: Directory to write to instead of docs/. A given output
+            file name is placed in it as well, so batch runs do not share one
+            output file.
+    """
+    output_format = output_format or "csv"
+    if output_format not in EXPORT_FORMATS:
+        raise ValueError(f"export-findings cannot write {output_format} "
+                         f"(expected one of: {', '.join(EXPORT_FORMATS)})")
+
+    scan = open_scan(scan_file_path, ScanFilter.from_options(min_severity, hosts, plugin_families, ports))
+    if artifact_dir:
+        Path(artifact_dir).mkdir(parents=True, exist_ok=True)
+    if output:
+        output_path = Path(artifact_dir) / Path(output).name if artifact_dir else Path(output)
+    else:
+        docs_dir = Path(artifact_dir or "docs")
+        docs_dir.mkdir(exist_ok=True)
+        # Merged scans list every source file; name the export after the first
+        stem = logical_stem(scan.scan_file_path.split(", ")[0])
+        output_path = docs_dir / (f"{stem}_findings_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+                                  f"{EXPORT_FORMATS[output_format]}")
+
+    try:
+        rows = write_findings(scan, output_path, output_format, batch_size or DEFAULT_BATCH_SIZE)
+    except Exception as e:
+        logging.error(f"Error exporting findings: {str(e)}")
+        raise
+    print(f"Exported {rows} findings to {output_path}")
@@ -1,19 +1,26 @@
 # commands/poam_generator.py
-import xml.etree.ElementTree as ET
 from datetime import datetime
 import uuid
-import json
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from pathlib import Path
+from core import serialization
+from core.compression import compression_format
+from core.scan_filter import ScanFilter
+from core.scan_reader import ScanFinding, ScanSource, iter_scan_findings
+from core.poam_reconciler import PoamReconciler
+from core.poam_delta import (compute_delta, current_findings, fingerprint_path, iter_delta_items,
+                             load_fingerprint, save_fingerprint)
+
+# Path of the list streamed item by item when a POA&M is written
+POAM_ITEMS_PATH = ["plan-of-action-and-milestones", "poam-items"]
 
 def load_existing_poam() -> Dict[str, Any]:
     """Load existing POA&M if available"""
     try:
         poam_path = Path("poam.json")
         if poam_path.exists():
-            with poam_path.open('r') as f:
-                return json.load(f)
+            return serialization.load(poam_path)
     except Exception as e:
         logging.warning(f"Could not load existing POA&M: {str(e)}")
     
@@ -36,30 +43,22 @@ def ensure_docs_directory() -> Path:
     docs_dir.mkdir(exist_ok=True)
     return docs_dir
 
-def parse_scan_findings(scan_file_path: str) -> List[Dict[str, Any]]:
+def output_file(name: str, gzip: bool = False, artifact_dir: Optional[str] = None) -> Path:
+    """Timestamped output path in docs/ (or artifact_dir), e.g. docs/generated_poam_20240101_120000.json"""
+    suffix = ".json.gz" if gzip else ".json"
+    if artifact_dir:
+        directory = Path(artifact_dir)
+        directory.mkdir(parents=True, exist_ok=True)
+    else:
+        directory = ensure_docs_directory()
+    return directory / f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}{suffix}"
+
+def parse_scan_findings(scan_file_path: ScanSource) -> List[ScanFinding]:
     """Parse findings from Nessus scan XML"""
     findings = []
     try:
-        tree = ET.parse(scan_file_path)
-        root = tree.getroot()
-        
-        for report_host in root.findall(".//ReportHost"):
-            hostname = report_host.get("name")
-            
-            for report_item in report_host.findall("ReportItem"):
-                severity = int(report_item.get("severity", 0))
-                # Only process medium and high severity findings
-                if severity >= 2:
-                    plugin_name = report_item.find("plugin_name")
-                    description = report_item.find("description")
-                    finding = {
-                        "host": hostname,
-                        "title": plugin_name.text if plugin_name is not None else "Unknown Finding",
-                        "description": description.text if description is not None else "No description available",
-                        "severity": severity,
-                        "plugin_id": report_item.get("pluginID")
-                    }
-                    findings.append(finding)
+        # Only process medium and high severity findings; the rest is skipped while reading
+        findings.extend(iter_scan_findings(scan_file_path, ScanFilter(min_severity=2)))
                     
     except Exception as e:
         logging.error(f"Error parsing scan file: {str(e)}")
@@ -67,18 +66,102 @@ def parse_scan_findings(scan_file_path: str) -> List[Dict[str, Any]]:
         
     return findings
 
-def generate_poam(oscal_file: Dict[str, Any], scan_file_path: str) -> None:
+def update_poam_delta(oscal_file: Dict[str, Any], scan_findings: List[ScanFinding],
+                      delta_mode: str, document_path: str, compact: bool = False, gzip: bool = False,
+                      group_by_plugin: bool = False, artifact_dir: Optional[str] = None) -> None:
+    """
+    Update a POA&M with only what changed since the previous scan
+    
+    The finding keys of each scan are kept in a fingerprint file next to the
+    POA&M. The next run compares the new scan with them and only opens items
+    for added findings and closes items for resolved ones. When there is no
+    fingerprint for the current revision of the POA&M, a full reconciliation
+    is done instead. Patch mode does not change the POA&M, so successive
+    patches each hold the changes since the previous one and are applied
+    in order.
+    
+    Args:
+        oscal_file: Loaded POA&M
+        scan_findings: Findings that should be tracked
+        delta_mode: "apply" to rewrite the POA&M file in place, "patch" to
+            write the changes to a patch file in docs/
+        document_path: Path the POA&M was loaded from
+        compact: Write JSON without indentation
+        gzip: Gzip the patch file (in apply mode the POA&M keeps its own format)
+        group_by_plugin: Open one item per plugin listing its hosts. Host
+            lists of existing grouped items are only refreshed by a full run.
+        artifact_dir: Directory for the patch file instead of docs/
+    
+    Raises:
+        ValueError: In apply mode, if the POA&M is compressed with anything
+            other than gzip, which cannot be written back
+    """
+    compression = compression_format(document_path)
+    if delta_mode == "apply" and compression not in ("", "gzip"):
+        raise ValueError(f"Cannot update {compression}-compressed POA&M {document_path} in place; use --delta patch")
+    
+    plan = oscal_file["plan-of-action-and-milestones"]
+    fingerprint = fingerprint_path(document_path)
+    current = current_findings(scan_findings)
+    delta = compute_delta(plan, current, load_fingerprint(fingerprint, plan), group_by_plugin)
+    # A patch leaves the POA&M file as it was, so the fingerprint has to stay
+    # tied to that revision for the next run to be incremental as well
+    last_modified = delta.last_modified if delta and delta_mode == "apply" else delta.base_last_modified
+    
+    if not delta:
+        print(f"POA&M {document_path} is up to date")
+    elif delta_mode == "apply":
+        updated = dict(plan)
+        updated["metadata"] = {**plan.get("metadata", {}), "last-modified": delta.last_modified}
+        serialization.dump_streaming({**oscal_file, "plan-of-action-and-milestones": updated}, document_path,
+                                     POAM_ITEMS_PATH, iter_delta_items(plan, delta), indent=not compact,
+                                     compress=compression == "gzip")
+        print(f"Updated POA&M {document_path} in place")
+    else:
+        output_path = output_file("poam_delta", gzip, artifact_dir)
+        with serialization.atomic_open(output_path, compress=gzip) as f:
+            f.write(serialization.dumps(delta.to_dict(), indent=not compact))
+        print(f"POA&M delta saved to {output_path}")
+        
+    save_fingerprint(fingerprint, delta.poam_uuid, last_modified, current)
+    mode = "incremental" if delta.incremental else "full"
+    print(f"Opened: {len(delta.opened)}, Closed: {len(delta.closed)} ({mode})")
+
+def generate_poam(oscal_file: Dict[str, Any], scan_file_path: ScanSource, delta: Optional[str] = None,
+                  document_path: Optional[str] = None, compact: bool = False, gzip: bool = False,
+                  group_by_plugin: bool = False, artifact_dir: Optional[str] = None) -> None:
     """
     Generate a POA&M by comparing SSP/POA&M and scan results
     
     Args:
         oscal_file: Loaded OSCAL data (can be SSP or POA&M)
-        scan_file_path: Path to Nessus scan XML file
+        scan_file_path: Path to Nessus scan XML file, or already loaded scan results
+        delta: "apply" or "patch" to update an existing POA&M incrementally
+            (see update_poam_delta) instead of writing a full copy
+        document_path: Path oscal_file was loaded from, required with delta
+        compact: Write JSON without indentation
+        gzip: Gzip the output file (adds a .gz suffix)
+        group_by_plugin: Open one item per plugin listing the affected hosts,
+            with the plugin's description and solution written once, instead
+            of one item per plugin and host
+        artifact_dir: Directory for the generated file instead of docs/, so
+            batch runs give every document its own output
     """
     try:
-        # If we got a POA&M file, use it as the existing POA&M
+        if delta:
+            if "plan-of-action-and-milestones" not in oscal_file or not document_path:
+                raise ValueError("Incremental POA&M updates need an existing POA&M file as input")
+            update_poam_delta(oscal_file, parse_scan_findings(scan_file_path), delta, document_path,
+                              compact, gzip, group_by_plugin, artifact_dir)
+            return
+            
+        # If we got a POA&M file, use it as the existing POA&M. The plan and its
+        # metadata are copied so the caller's document is left untouched when
+        # it is shared with other commands in a pipeline run.
         if "plan-of-action-and-milestones" in oscal_file:
-            existing_poam = oscal_file
+            plan = dict(oscal_file["plan-of-action-and-milestones"])
+            plan["metadata"] = dict(plan.get("metadata", {}))
+            existing_poam = {**oscal_file, "plan-of-action-and-milestones": plan}
         else:
             # If we got an SSP, try to load existing POA&M or create new
             existing_poam = load_existing_poam()
@@ -96,56 +179,17 @@ def generate_poam(oscal_file: Dict[str, Any], scan_file_path: str) -> None:
         # Parse scan findings
         scan_findings = parse_scan_findings(scan_file_path)
         
-        # Track which existing POA&M items are still valid
-        existing_findings = set()
-        new_items = []
-        
-        # Process scan findings
-        for finding in scan_findings:
-            finding_id = finding["plugin_id"]
-            existing_findings.add(finding_id)
-            
-            # Check if finding already has a POA&M
-            has_poam = False
-            for item in existing_poam["plan-of-action-and-milestones"].get("poam-items", []):
-                if item.get("related-findings", {}).get("plugin_id") == finding_id:
-                    has_poam = True
-                    # Keep existing POA&M if finding still exists
-                    new_items.append(item)
-                    break
-                    
-            if not has_poam:
-                # Create new POA&M item for finding
-                new_item = {
-                    "uuid": str(uuid.uuid4()),
-                    "title": finding["title"],
-                    "description": finding["description"],
-                    "related-findings": {
-                        "plugin_id": finding_id,
-                        "host": finding["host"],
-                        "severity": finding["severity"]
-                    }
-                }
-                new_items.append(new_item)
-                
-        # Close out POA&M items for resolved findings
-        for item in existing_poam["plan-of-action-and-milestones"].get("poam-items", []):
-            finding_id = item.get("related-findings", {}).get("plugin_id")
-            if finding_id and finding_id not in existing_findings:
-                item["status"] = "completed"
-                new_items.append(item)
-                
-        # Update the POA&M with new items
-        existing_poam["plan-of-action-and-milestones"]["poam-items"] = new_items
+        # Match findings against the existing POA&M items
+        reconciler = PoamReconciler(existing_poam["plan-of-action-and-milestones"].get("poam-items", []))
+        result = reconciler.reconcile(scan_findings, group_by_plugin)
         existing_poam["plan-of-action-and-milestones"]["metadata"]["last-modified"] = datetime.now().isoformat()
        
-        # Save the new POA&M
-        docs_dir = ensure_docs_directory()
-        output_path = docs_dir / f"generated_poam_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        
-        with output_path.open('w') as f:
-            json.dump(existing_poam, f, indent=2)
+        # Save the new POA&M, streaming the items rather than building the full list
+        output_path = output_file("generated_poam", gzip, artifact_dir)
+        serialization.dump_streaming(existing_poam, output_path, POAM_ITEMS_PATH, result.iter_items(),
+                                     indent=not compact, compress=gzip)
         print(f"Generated POA&M saved to {output_path}")
+        print(f"Opened: {len(result.opened)}, Kept: {len(result.kept)}, Closed: {len(result.closed)}")
             
     except Exception as e:
         logging.error(f"Error generating POA&M: {str(e)}")
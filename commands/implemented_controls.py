@@ -1,6 +1,9 @@
+from core.document_index import DocumentIndex
+
 def analyze_implemented_controls(oscal_file):
     """Lists and analyzes implemented security controls"""
     implementation = oscal_file["system-security-plan"]["control-implementation"]
+    index = DocumentIndex(oscal_file)
     
     print("\nImplemented Controls Analysis")
     print("==========================")
@@ -19,11 +22,18 @@ def analyze_implemented_controls(oscal_file):
                 if "by-components" in stmt:
                     print("  Implemented By Components:")
                     for comp in stmt["by-components"]:
-                        print(f"  * Component: {comp.get('component-uuid', 'Unknown')}")
+                        print(f"  * Component: {component_label(index, comp.get('component-uuid'))}")
                         print(f"    Description: {comp.get('description', 'No description')}")
                         
                         # Print parameters if set
                         if "set-parameters" in comp:
                             print("    Parameters:")
                             for param in comp["set-parameters"]:
-                                print(f"    - {param['param-id']}: {', '.join(param['values'])}")
\ No newline at end of file
+                                print(f"    - {param['param-id']}: {', '.join(param['values'])}")
+
+def component_label(index, uuid):
+    """Component title followed by its uuid, or just the uuid if it is not a known component"""
+    if uuid is None:
+        return "Unknown"
+    title = index.component_title(uuid)
+    return f"{title} ({uuid})" if title else uuid
@@ -1,47 +1,49 @@
+import re
 from datetime import datetime
-import xml.etree.ElementTree as ET
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from pathlib import Path
 import logging
 from collections import defaultdict
+from core.scan_filter import ScanFilter
+from core.scan_reader import ScanSource, open_scan
+from core.trend_store import TrendStore, SEVERITY_LEVELS, SEVERITY_SERIES, scan_version
 
-def calculate_finding_trends() -> Dict[str, List[int]]:
-    """Generate finding trends data for the last 6 months"""
-    return {
-        "months": ["Aug", "Sep", "Oct", "Nov", "Dec", "Jan"],
-        "critical": [10, 15, 12, 8, 11, 14],
-        "high": [20, 25, 18, 22, 19, 21],
-        "medium": [30, 28, 32, 25, 29, 27],
-        "low": [15, 12, 14, 18, 13, 16],
-        "total": [75, 80, 76, 73, 72, 78]
-    }
+def calculate_finding_trends(system_id: str, months: int = 6,
+                             store: Optional[TrendStore] = None) -> Dict[str, List[int]]:
+    """Get finding trends for the last N months from the trend store"""
+    if store is not None:
+        return store.monthly_trends(system_id, months)
+    with TrendStore() as trend_store:
+        return trend_store.monthly_trends(system_id, months)
+
+def percent_change(current: int, previous: int) -> float:
+    """Percentage change between two counts, treating growth from zero as 0%"""
+    if not previous:
+        return 0.0
+    return (current - previous) / previous * 100
 
-def analyze_scan_findings(scan_file: str) -> Dict[str, Any]:
+def analyze_scan_findings(scan_file: ScanSource) -> Dict[str, Any]:
     """Analyze findings from Nessus scan file"""
     findings = {
         "severity_counts": defaultdict(int),
         "hosts": defaultdict(list),
         "critical_items": [],
-        "component_findings": defaultdict(int)
+        "component_findings": defaultdict(int),
+        "error": None,
     }
     
     try:
-        tree = ET.parse(scan_file)
-        root = tree.getroot()
-        
-        for host in root.findall(".//ReportHost"):
-            hostname = host.get("name")
+        # Informational findings are not counted, so they are skipped while reading
+        for host in open_scan(scan_file, ScanFilter(min_severity=1)):
+            hostname = host.name
             
-            for item in host.findall("ReportItem"):
-                severity = int(item.get("severity", "0"))
-                plugin_name = item.get("pluginName", "")
+            for item in host.findings:
+                severity = item.severity
+                plugin_name = item.plugin_name
                 
                 if severity > 0:
                     findings["severity_counts"][severity] += 1
-                    findings["hosts"][hostname].append({
-                        "severity": severity,
-                        "name": plugin_name
-                    })
+                    findings["hosts"][hostname].append(item)
                     findings["component_findings"][hostname] += 1
                     
                     if severity >= 3:
@@ -52,6 +54,7 @@ def analyze_scan_findings(scan_file: str) -> Dict[str, Any]:
                         
     except Exception as e:
         logging.error(f"Error analyzing scan file: {str(e)}")
+        findings["error"] = str(e)
         
     return findings
 
@@ -101,7 +104,7 @@ def create_mermaid_chart(trends: Dict[str, List[int]]) -> str:
 xychart-beta
     title "Six Month Finding Trends"
     x-axis {trends["months"]}
-    y-axis "Number of Findings" 0 --> 100
+    y-axis "Number of Findings" 0 --> {max(trends["total"] + [100])}
     bar {trends["critical"]} "Critical"
     bar {trends["high"]} "High"
     bar {trends["medium"]} "Medium"
@@ -109,8 +112,15 @@ xychart-beta
     line {trends["total"]} "Total Findings"
 ```'''
 
-def generate_monthly_report(oscal_file: Dict[str, Any], scan_file_path: str) -> None:
-    """Generate monthly security report combining scan and POA&M data"""
+def generate_monthly_report(oscal_file: Dict[str, Any], scan_file_path: ScanSource, months: int = 6,
+                            artifact_dir: Optional[str] = None) -> None:
+    """
+    Generate monthly security report combining scan and POA&M data
+
+    The scan's finding counts are appended to the trend store so that the
+    trend chart and analysis cover the last `months` months of recorded scans.
+    The report is written to reports/, or to artifact_dir when given.
+    """
     try:
         # Get template
         template_path = Path("docs/templates/monthly-report-template.md")
@@ -125,11 +135,25 @@ def generate_monthly_report(oscal_file: Dict[str, Any], scan_file_path: str) ->
         system_id = oscal_file["plan-of-action-and-milestones"].get("system-id", {}).get("id", "Unknown ID")
             
         # Analyze current findings
-        scan_findings = analyze_scan_findings(scan_file_path)
+        scan = open_scan(scan_file_path)
+        scan_findings = analyze_scan_findings(scan)
         poam_data = analyze_poams(oscal_file)
         
-        # Get historical trends
-        trends = calculate_finding_trends()
+        # Record this scan and get historical trends. A scan that could not be
+        # read completely would store partial counts as the month's latest data.
+        with TrendStore() as trend_store:
+            if scan_findings["error"]:
+                logging.warning(f"Not recording finding trends for unreadable scan {scan.scan_file_path}")
+                print(f"Warning: scan could not be read ({scan_findings['error']}); "
+                      f"finding trends were not updated")
+            else:
+                trend_store.record_snapshot(system_id, scan.scan_file_path,
+                                            scan_findings["severity_counts"],
+                                            scan_findings["component_findings"],
+                                            scan_version=scan_version(scan.scan_file_path))
+            trends = calculate_finding_trends(system_id, months, trend_store)
+        critical = scan_findings["severity_counts"][SEVERITY_LEVELS["critical"]]
+        high = scan_findings["severity_counts"][SEVERITY_LEVELS["high"]]
         
         # Create report sections
         report_sections = {
@@ -137,20 +161,20 @@ def generate_monthly_report(oscal_file: Dict[str, Any], scan_file_path: str) ->
             
             "### Key Metrics": f"""### Key Metrics
 - Total Open POA&Ms: {len(poam_data['open_items'])}
-- Critical/High Findings: {scan_findings['severity_counts'][3] + scan_findings['severity_counts'][2]}
+- Critical/High Findings: {critical + high}
 - Risk Level Trend: {"Increasing" if trends["critical"][-1] > trends["critical"][-2] else "Decreasing"}""",
             
             "```mermaid\nxychart-beta": create_mermaid_chart(trends),
             
             "### Trend Analysis": f"""### Trend Analysis
-- Month-over-month change in total findings: {((trends["total"][-1] - trends["total"][-2]) / trends["total"][-2] * 100):.1f}%
-- Most frequent finding category: Medium
-- Notable changes: {len(scan_findings["critical_items"])} new critical findings""",
+- Month-over-month change in total findings: {percent_change(trends["total"][-1], trends["total"][-2]):.1f}%
+- Most frequent finding category: {max(SEVERITY_SERIES.values(), key=lambda series: trends[series][-1]).title()}
+- Notable changes: {len(scan_findings["critical_items"])} new critical or high findings""",
             
             "[POA&M-Items-Here]": "\n".join([f"- {item}" for item in poam_data["high_risk_items"][:5]]),
             
-            "| Critical   | [Number]": f"| Critical   | {scan_findings['severity_counts'][3]}",
-            "| High       | [Number]": f"| High       | {scan_findings['severity_counts'][2]}",
+            "| Critical   | [Number]": f"| Critical   | {critical}",
+            "| High       | [Number]": f"| High       | {high}",
             
             "[Scan-Findings-Here]": "\n".join([f"- {item['finding']} ({item['host']})" 
                                              for item in scan_findings["critical_items"][:5]]),
@@ -167,14 +191,22 @@ def generate_monthly_report(oscal_file: Dict[str, Any], scan_file_path: str) ->
             "[POA&M-ID]": metadata.get("version", "Unknown")
         }
         
-        # Replace all sections in template
+        # Replace all sections in template. Headed sections and the chart
+        # replace the template's sample bullets and sample chart data too.
         report_content = template_content
         for placeholder, content in report_sections.items():
-            report_content = report_content.replace(placeholder, content)
+            if placeholder.startswith("```mermaid"):
+                pattern = re.escape(placeholder) + r".*?```"
+            elif placeholder.startswith("### "):
+                pattern = re.escape(placeholder) + r"(?:\n- [^\n]*)*"
+            else:
+                report_content = report_content.replace(placeholder, content)
+                continue
+            report_content = re.sub(pattern, lambda _: content, report_content, flags=re.DOTALL)
         
         # Save report
-        output_path = Path("reports") / f"monthly_report_{datetime.now().strftime('%Y%m')}.md"
-        output_path.parent.mkdir(exist_ok=True)
+        output_path = Path(artifact_dir or "reports") / f"monthly_report_{datetime.now().strftime('%Y%m')}.md"
+        output_path.parent.mkdir(parents=True, exist_ok=True)
         output_path.write_text(report_content)
         
         print(f"Monthly report generated: {output_path}")
@@ -2,29 +2,30 @@ import xml.etree.ElementTree as ET
 from collections import defaultdict
 import logging
 from pathlib import Path
-from typing import Dict, Set, List
+from typing import Dict, Set, List, Optional
+from core.scan_filter import ScanFilter
+from core.scan_reader import ScanSource, open_scan
+from core.trend_store import SEVERITY_LEVELS
 
-def portscheck(scan_file_path: str) -> None:
+# Nessus severities as monthly-report labels them: 4 Critical, 3 High, 2 Medium, 1 Low
+SEVERITY_LABELS = {severity: series.title() for series, severity in SEVERITY_LEVELS.items()}
+
+def portscheck(scan_file_path: ScanSource, min_severity: Optional[int] = None,
+               hosts: Optional[List[str]] = None, plugin_families: Optional[List[str]] = None,
+               ports: Optional[str] = None) -> None:
     """
     Analyze ports and security findings from a Nessus scan file.
     
     Args:
-        scan_file_path: Path to the Nessus scan XML file
+        scan_file_path: Path to the Nessus scan XML file, or a scan already
+            loaded with core.scan_reader.load_scan
+        min_severity: Only findings of at least this severity. Open ports
+            and services come from informational findings, so ports are
+            only listed for the findings that are kept.
+        hosts: Only these host names, IP addresses or CIDR networks
+        plugin_families: Only findings from these plugin families
+        ports: Only findings on these ports, e.g. "22,80-443"
     """
-    try:
-        # Parse the XML file
-        tree = ET.parse(scan_file_path)
-        root = tree.getroot()
-    except FileNotFoundError:
-        print(f"Error: Scan file not found: {scan_file_path}")
-        return
-    except ET.ParseError as e:
-        print(f"Error: Failed to parse scan file: {str(e)}")
-        return
-    except Exception as e:
-        print(f"Error processing scan file: {str(e)}")
-        return
-
     host_data = defaultdict(lambda: {
         "ports": set(),
         "protocols": set(),
@@ -36,74 +37,71 @@ def portscheck(scan_file_path: str) -> None:
     unique_findings = defaultdict(set)  # Plugin IDs by severity
     fips_findings = []
     eol_findings = []
-    
+
+    reader = open_scan(scan_file_path, ScanFilter.from_options(min_severity, hosts, plugin_families, ports))
+    try:
+        # Stream each host in the results
+        for report_host in reader:
+            hostname = report_host.name
+            if report_host.os:
+                host_data[hostname]["os"] = report_host.os
+            if report_host.ip:
+                host_data[hostname]["ip"] = report_host.ip
+
+            # Process findings for this host
+            for finding in report_host.findings:
+                port = finding.port
+                protocol = finding.protocol
+                severity = finding.severity
+                plugin_name = finding.plugin_name
+
+                # Process ports (exclude port 0 which is typically used for host-based findings)
+                if port != "0":
+                    host_data[hostname]["ports"].add(port)
+                    if protocol:
+                        host_data[hostname]["protocols"].add(protocol)
+                    # Keep the finding itself for each port; its plugin details are shared
+                    host_data[hostname]["findings"][port].append(finding)
+
+                # Process findings
+                if severity > 0:  # Only count actual findings
+                    severity_counts[severity] += 1
+                    unique_findings[severity].add(finding.plugin_id)
+
+                    # Check for FIPS-related findings
+                    if "FIPS" in plugin_name or "FIPS-140" in plugin_name:
+                        fips_findings.append({
+                            "host": hostname,
+                            "plugin_name": plugin_name,
+                            "severity": severity
+                        })
+
+                    # Check for EOL-related findings
+                    if any(term in plugin_name for term in ["EOL", "End of Life", "end-of-life"]):
+                        eol_findings.append({
+                            "host": hostname,
+                            "plugin_name": plugin_name,
+                            "severity": severity
+                        })
+    except FileNotFoundError:
+        print(f"Error: Scan file not found: {reader.scan_file_path}")
+        return
+    except ET.ParseError as e:
+        print(f"Error: Failed to parse scan file: {str(e)}")
+        return
+    except Exception as e:
+        print(f"Error processing scan file: {str(e)}")
+        return
+
     # Print scan targets from policy preferences
-    target_element = root.find('.//preference[name="TARGET"]/value')
-    if target_element is not None:
-        hostnames = [hostname.strip() for hostname in target_element.text.split(",")]
+    if reader.targets:
         print("\nConfigured Scan Targets:")
-        for hostname in hostnames:
+        for hostname in reader.targets:
             print(hostname)
 
     print("\nScanned Hosts Summary:")
     print("-" * 50)
     
-    # Process each host in the results
-    for report_host in root.findall(".//ReportHost"):
-        hostname = report_host.get("name")
-        
-        # Get host properties
-        props = report_host.find("HostProperties")
-        if props is not None:
-            for tag in props.findall("tag"):
-                if tag.get("name") == "operating-system":
-                    host_data[hostname]["os"] = tag.text
-                elif tag.get("name") == "host-ip":
-                    host_data[hostname]["ip"] = tag.text
-        
-        # Process findings for this host
-        for report_item in report_host.findall("ReportItem"):
-            port = report_item.get("port")
-            protocol = report_item.get("protocol")
-            severity = int(report_item.get("severity", "0"))
-            plugin_id = report_item.get("pluginID")
-            plugin_name = report_item.get("pluginName", "")
-            svc_name = report_item.get("svc_name", "")
-
-            # Process ports (exclude port 0 which is typically used for host-based findings)
-            if port != "0":
-                host_data[hostname]["ports"].add(port)
-                if protocol:
-                    host_data[hostname]["protocols"].add(protocol)
-                # Store finding details for each port
-                host_data[hostname]["findings"][port].append({
-                    "service": svc_name,
-                    "protocol": protocol,
-                    "severity": severity,
-                    "name": plugin_name
-                })
-            
-            # Process findings
-            if severity > 0:  # Only count actual findings
-                severity_counts[severity] += 1
-                unique_findings[severity].add(plugin_id)
-                
-                # Check for FIPS-related findings
-                if "FIPS" in plugin_name or "FIPS-140" in plugin_name:
-                    fips_findings.append({
-                        "host": hostname,
-                        "plugin_name": plugin_name,
-                        "severity": severity
-                    })
-                
-                # Check for EOL-related findings
-                if any(term in plugin_name for term in ["EOL", "End of Life", "end-of-life"]):
-                    eol_findings.append({
-                        "host": hostname,
-                        "plugin_name": plugin_name,
-                        "severity": severity
-                    })
-
     # Print detailed host results
     for hostname, data in host_data.items():
         print(f"\nHost: {hostname}")
@@ -117,18 +115,18 @@ def portscheck(scan_file_path: str) -> None:
             for port in sorted(data["ports"], key=int):
                 print(f"  Port {port}/{list(data['protocols'])[0]}:")
                 for finding in data["findings"][port]:
-                    if finding["service"]:
-                        print(f"    Service: {finding['service']}")
-                    if finding["severity"] > 0:
-                        severity_label = {3: "High", 2: "Medium", 1: "Low"}.get(finding["severity"], "Info")
-                        print(f"    Finding: {finding['name']} (Severity: {severity_label})")
+                    if finding.service:
+                        print(f"    Service: {finding.service}")
+                    if finding.severity > 0:
+                        severity_label = SEVERITY_LABELS.get(finding.severity, "Info")
+                        print(f"    Finding: {finding.plugin_name} (Severity: {severity_label})")
         else:
             print("No open ports found in scan results")
 
     # Print severity statistics
     print("\nFinding Severity Statistics:")
     print("-" * 50)
-    severity_labels = {3: "High", 2: "Medium", 1: "Low"}
+    severity_labels = SEVERITY_LABELS
     for severity in sorted(severity_labels.keys(), reverse=True):
         if severity in severity_counts:
             print(f"{severity_labels[severity]} Severity Findings:")
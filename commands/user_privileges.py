@@ -1,8 +1,9 @@
+from core.document_index import DocumentIndex
+
 def analyze_user_privileges(oscal_file):
     """Analyzes and reports on user privileges and roles in the system"""
     users = oscal_file["system-security-plan"]["system-implementation"]["users"]
-    roles = {role["id"]: role["title"] 
-            for role in oscal_file["system-security-plan"]["metadata"]["roles"]}
+    index = DocumentIndex(oscal_file)
     
     print("\nUser Privilege Analysis")
     print("=====================")
@@ -18,7 +19,7 @@ def analyze_user_privileges(oscal_file):
         # Print assigned roles
         print("Assigned Roles:")
         for role_id in user.get("role-ids", []):
-            print(f"- {roles.get(role_id, role_id)}")
+            print(f"- {index.role_title(role_id)}")
         
         # Print authorized privileges
         if "authorized-privileges" in user:
@@ -1,26 +1,118 @@
-from typing import Dict, Any, List
-import json
+from typing import Dict, Any, List, Optional
 from pathlib import Path
-import matplotlib.pyplot as plt
 import networkx as nx
 from datetime import datetime
 import logging
+from core import serialization
+from core.document_index import DocumentIndex
+
+# Above this many nodes the PNG uses a shell layout and drops node labels
+LARGE_GRAPH_NODES = 500
+GRAPH_FORMATS = ["png", "graphml", "dot", "json"]
+
+def aggregate_by_type(G: nx.DiGraph) -> nx.DiGraph:
+    """
+    Collapse a component graph to one node per component type
+    
+    Each node records how many nodes it stands for, and each edge how many
+    edges ran between nodes of the two types.
+    """
+    aggregated = nx.DiGraph()
+    for node, data in G.nodes(data=True):
+        node_type = data.get('type', 'unknown')
+        if node_type in aggregated:
+            aggregated.nodes[node_type]['count'] += 1
+        else:
+            aggregated.add_node(node_type, title=node_type, type=node_type,
+                                node_type=data.get('node_type', 'component'), count=1)
+    for source, target in G.edges():
+        source_type = G.nodes[source].get('type', 'unknown')
+        target_type = G.nodes[target].get('type', 'unknown')
+        if aggregated.has_edge(source_type, target_type):
+            aggregated[source_type][target_type]['weight'] += 1
+        else:
+            aggregated.add_edge(source_type, target_type, weight=1)
+    for node, data in aggregated.nodes(data=True):
+        data['title'] = f"{data['count']} x {node}"
+    return aggregated
+
+def _dot_quote(value: Any) -> str:
+    return '"' + str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+
+def write_dot(G: nx.DiGraph, output_path: Path) -> None:
+    """Write the graph in Graphviz DOT format, one line per node and edge"""
+    with open(output_path, "w") as f:
+        f.write("digraph components {\n")
+        for node, data in G.nodes(data=True):
+            attrs = ", ".join(f"{key}={_dot_quote(value)}" for key, value in data.items())
+            f.write(f"  {_dot_quote(node)} [{attrs}];\n")
+        for source, target, data in G.edges(data=True):
+            attrs = ", ".join(f"{key}={_dot_quote(value)}" for key, value in data.items())
+            f.write(f"  {_dot_quote(source)} -> {_dot_quote(target)} [{attrs}];\n")
+        f.write("}\n")
+
+def write_node_link_json(G: nx.DiGraph, output_path: Path) -> None:
+    """Write the graph as node-link JSON (the layout used by networkx's json_graph)"""
+    serialization.dump({
+        "directed": True,
+        "multigraph": False,
+        "graph": {},
+        "nodes": [{"id": node, **data} for node, data in G.nodes(data=True)],
+        "links": [{"source": source, "target": target, **data} for source, target, data in G.edges(data=True)],
+    }, output_path)
+
+_HTML_HEAD = """
+            <!DOCTYPE html>
+            <html>
+            <head>
+                <title>OSCAL Component Analysis Report</title>
+                <style>
+                    body { font-family: Arial, sans-serif; margin: 40px; }
+                    .section { margin-bottom: 30px; }
+                    .metadata { background-color: #f5f5f5; padding: 15px; border-radius: 5px; }
+                    .component { border: 1px solid #ddd; padding: 15px; margin: 10px 0; border-radius: 5px; }
+                    .inventory-item { background-color: #f9f9f9; padding: 15px; margin: 10px 0; border-radius: 5px; }
+                    .relationship { margin-left: 20px; color: #666; }
+                    h2 { color: #333; border-bottom: 2px solid #eee; padding-bottom: 5px; }
+                </style>
+            </head>
+            <body>
+            """
+
+_HTML_FOOT = """
+            </body>
+            </html>
+            """
 
 class OSCALVisualizer:
     """Class for creating visualizations of OSCAL data"""
     
     def __init__(self, output_dir: str = "reports"):
         self.output_dir = Path(output_dir)
-        self.output_dir.mkdir(exist_ok=True)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
         
-    def create_component_graph(self, oscal_file: Dict[str, Any]) -> str:
-        """Create a graph visualization of system components and inventory items"""
+    def create_component_graph(self, oscal_file: Dict[str, Any], graph_format: str = "png",
+                               aggregate: bool = False, index: Optional[DocumentIndex] = None) -> str:
+        """
+        Create a graph of system components and inventory items
+        
+        Args:
+            oscal_file: Loaded SSP
+            graph_format: "png" to render an image, or "graphml", "dot" or
+                "json" to write the graph data without rendering it
+            aggregate: Collapse the graph to one node per component type
+            index: Index of oscal_file, built here if not given
+            
+        Returns:
+            Path of the written file, or "" if there was nothing to draw
+        """
         G = nx.DiGraph()
         
         try:
             ssp = oscal_file.get("system-security-plan")
             if not ssp:
                 raise ValueError("Not a valid SSP file")
+            index = index or DocumentIndex(oscal_file)
                 
             system_impl = ssp.get("system-implementation", {})
             
@@ -36,12 +128,12 @@ class OSCALVisualizer:
                           type=comp_type,
                           node_type="component")
                 
-                # Add edges for component links
+                # Add edges for component links that point at another component
                 if "links" in comp:
                     for link in comp["links"]:
-                        target_href = link.get("href", "").strip("#")
-                        if target_href:
-                            G.add_edge(comp_id, target_href, 
+                        target = index.resolve_href(link.get("href", ""))
+                        if target and target.get("uuid") in index.components:
+                            G.add_edge(comp_id, target["uuid"], 
                                      relationship=link.get("rel", "unknown"))
                 
             # Add nodes for inventory items
@@ -59,7 +151,7 @@ class OSCALVisualizer:
                 if "implemented-components" in item:
                     for impl_comp in item["implemented-components"]:
                         comp_id = impl_comp.get("component-uuid")
-                        if comp_id:
+                        if comp_id in index.components:
                             G.add_edge(item_id, comp_id,
                                      relationship="implements")
                             
@@ -67,35 +159,22 @@ class OSCALVisualizer:
                 logging.warning("No components or inventory items found to visualize")
                 return ""
                 
-            # Generate the visualization
-            plt.figure(figsize=(15, 10))
-            pos = nx.spring_layout(G, k=2, iterations=50)
-            
-            # Draw different node types with different colors
-            component_nodes = [n for n,d in G.nodes(data=True) 
-                             if d.get('node_type') == 'component']
-            inventory_nodes = [n for n,d in G.nodes(data=True) 
-                             if d.get('node_type') == 'inventory']
-            
-            # Draw nodes
-            nx.draw_networkx_nodes(G, pos, nodelist=component_nodes, 
-                                 node_color='lightblue', node_size=2000)
-            nx.draw_networkx_nodes(G, pos, nodelist=inventory_nodes,
-                                 node_color='lightgreen', node_size=2000)
-            
-            # Draw edges
-            nx.draw_networkx_edges(G, pos)
-            
-            # Add labels
-            labels = {node: f"{data['title']}\n({data['type']})"
-                     for node, data in G.nodes(data=True)}
-            nx.draw_networkx_labels(G, pos, labels, font_size=8)
-            
+            if aggregate:
+                G = aggregate_by_type(G)
+                
             # Save the graph
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            output_path = self.output_dir / f"component_graph_{timestamp}.png"
-            plt.savefig(output_path, bbox_inches='tight', dpi=300)
-            plt.close()
+            output_path = self.output_dir / f"component_graph_{timestamp}.{graph_format}"
+            if graph_format == "png":
+                self._render_png(G, output_path)
+            elif graph_format == "graphml":
+                nx.write_graphml(G, output_path)
+            elif graph_format == "dot":
+                write_dot(G, output_path)
+            elif graph_format == "json":
+                write_node_link_json(G, output_path)
+            else:
+                raise ValueError(f"Unknown graph format: {graph_format}")
             
             return str(output_path)
             
@@ -103,109 +182,177 @@ class OSCALVisualizer:
             logging.error(f"Error creating component graph: {str(e)}")
             raise
             
-    def generate_html_report(self, oscal_file: Dict[str, Any]) -> str:
-        """Generate an HTML report of the OSCAL document"""
+    def _render_png(self, G: nx.DiGraph, output_path: Path) -> None:
+        """Draw the graph with matplotlib, switching to a linear-time layout for large graphs"""
+        import matplotlib.pyplot as plt
+        
+        large = len(G) > LARGE_GRAPH_NODES
+        plt.figure(figsize=(30, 20) if large else (15, 10))
+        if large:
+            # Spring layout is quadratic per iteration; shells by node type are linear
+            shells = {}
+            for node, data in G.nodes(data=True):
+                shells.setdefault(data.get('type', 'unknown'), []).append(node)
+            pos = nx.shell_layout(G, nlist=sorted(shells.values(), key=len))
+        else:
+            pos = nx.spring_layout(G, k=2, iterations=50)
+        
+        # Draw different node types with different colors
+        component_nodes = [n for n,d in G.nodes(data=True) 
+                         if d.get('node_type') == 'component']
+        inventory_nodes = [n for n,d in G.nodes(data=True) 
+                         if d.get('node_type') == 'inventory']
+        node_size = 50 if large else 2000
+        
+        # Draw nodes
+        nx.draw_networkx_nodes(G, pos, nodelist=component_nodes, 
+                             node_color='lightblue', node_size=node_size)
+        nx.draw_networkx_nodes(G, pos, nodelist=inventory_nodes,
+                             node_color='lightgreen', node_size=node_size)
+        
+        # Draw edges
+        nx.draw_networkx_edges(G, pos, alpha=0.3 if large else 1.0,
+                             arrows=not large)
+        
+        # Labels are unreadable at this size, so large graphs go without
+        if not large:
+            labels = {node: f"{data['title']}\n({data['type']})"
+                     for node, data in G.nodes(data=True)}
+            nx.draw_networkx_labels(G, pos, labels, font_size=8)
+        
+        plt.savefig(output_path, bbox_inches='tight', dpi=100 if large else 300)
+        plt.close()
+        
+    def generate_html_report(self, oscal_file: Dict[str, Any], page_size: Optional[int] = None,
+                             index: Optional[DocumentIndex] = None) -> str:
+        """
+        Generate an HTML report of the OSCAL document
+        
+        The report is written to the file section by section as it is
+        generated, so memory use does not grow with the size of the
+        inventory.
+        
+        Args:
+            oscal_file: Loaded SSP
+            page_size: When set, inventory items are written to separate
+                pages of this many items, linked from the main report
+            index: Index of oscal_file, built here if not given
+                
+        Returns:
+            Path of the main report file
+        """
         try:
-            # Basic template
-            html_content = """
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <title>OSCAL Component Analysis Report</title>
-                <style>
-                    body { font-family: Arial, sans-serif; margin: 40px; }
-                    .section { margin-bottom: 30px; }
-                    .metadata { background-color: #f5f5f5; padding: 15px; border-radius: 5px; }
-                    .component { border: 1px solid #ddd; padding: 15px; margin: 10px 0; border-radius: 5px; }
-                    .inventory-item { background-color: #f9f9f9; padding: 15px; margin: 10px 0; border-radius: 5px; }
-                    .relationship { margin-left: 20px; color: #666; }
-                    h2 { color: #333; border-bottom: 2px solid #eee; padding-bottom: 5px; }
-                </style>
-            </head>
-            <body>
-            """
-            
             ssp = oscal_file.get("system-security-plan")
             if not ssp:
                 raise ValueError("Not a valid SSP file")
+            index = index or DocumentIndex(oscal_file)
             
-            # Add metadata
-            metadata = ssp.get("metadata", {})
-            html_content += f"""
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            output_path = self.output_dir / f"oscal_report_{timestamp}.html"
+            
+            with open(output_path, "w") as f:
+                f.write(_HTML_HEAD)
+                
+                # Add metadata
+                metadata = ssp.get("metadata", {})
+                f.write(f"""
             <div class="section metadata">
                 <h2>System Information</h2>
                 <p><strong>Title:</strong> {metadata.get('title', 'N/A')}</p>
                 <p><strong>Version:</strong> {metadata.get('version', 'N/A')}</p>
                 <p><strong>Last Modified:</strong> {metadata.get('last-modified', 'N/A')}</p>
             </div>
-            """
-            
-            # Add components section
-            system_impl = ssp.get("system-implementation", {})
-            components = system_impl.get("components", [])
-            
-            html_content += """
+            """)
+                
+                # Add components section
+                system_impl = ssp.get("system-implementation", {})
+                f.write("""
             <div class="section">
                 <h2>System Components</h2>
-            """
+            """)
+                for comp in system_impl.get("components", []):
+                    f.write(self._format_component(comp, index))
+                    
+                # Add inventory items section
+                inventory_items = system_impl.get("inventory-items", [])
+                f.write("""
+            <div class="section">
+                <h2>Inventory Items</h2>
+            """)
+                if page_size:
+                    pages = self._write_inventory_pages(inventory_items, page_size, output_path, index)
+                    f.write("<ul>")
+                    for number, (page_path, count) in enumerate(pages, 1):
+                        f.write(f"""<li><a href="{page_path.name}">Page {number}</a> ({count} items)</li>""")
+                    f.write("</ul>")
+                else:
+                    for item in inventory_items:
+                        f.write(self._format_inventory_item(item, index))
+                    
+                f.write(_HTML_FOOT)
             
-            for comp in components:
-                html_content += f"""
+            return str(output_path)
+            
+        except Exception as e:
+            logging.error(f"Error generating HTML report: {str(e)}")
+            raise
+            
+    def _write_inventory_pages(self, inventory_items: List[Dict[str, Any]], page_size: int,
+                               output_path: Path, index: DocumentIndex) -> List[tuple]:
+        """Write inventory items to numbered pages next to the main report, returning (path, item count) per page"""
+        pages = []
+        for start in range(0, len(inventory_items), page_size):
+            number = len(pages) + 1
+            page_path = output_path.with_name(f"{output_path.stem}_inventory_{number}.html")
+            items = inventory_items[start:start + page_size]
+            with open(page_path, "w") as f:
+                f.write(_HTML_HEAD)
+                f.write(f"""
+            <div class="section">
+                <h2>Inventory Items (page {number})</h2>
+                <p><a href="{output_path.name}">Back to report</a></p>
+            """)
+                for item in items:
+                    f.write(self._format_inventory_item(item, index))
+                f.write(_HTML_FOOT)
+            pages.append((page_path, len(items)))
+        return pages
+        
+    def _format_component(self, comp: Dict[str, Any], index: DocumentIndex) -> str:
+        return f"""
                 <div class="component">
                     <h3>{comp.get('title', 'Unnamed Component')}</h3>
                     <p><strong>Type:</strong> {comp.get('type', 'N/A')}</p>
                     <p><strong>Description:</strong> {comp.get('description', 'N/A')}</p>
                     
-                    {self._format_links(comp.get('links', []))}
+                    {self._format_links(comp.get('links', []), index)}
                     {self._format_status(comp.get('status', {}))}
+                    {self._format_controls(index.controls_for_component(comp.get('uuid')))}
                 </div>
                 """
-                
-            # Add inventory items section
-            inventory_items = system_impl.get("inventory-items", [])
-            
-            html_content += """
-            <div class="section">
-                <h2>Inventory Items</h2>
-            """
-            
-            for item in inventory_items:
-                html_content += f"""
+        
+    def _format_inventory_item(self, item: Dict[str, Any], index: DocumentIndex) -> str:
+        return f"""
                 <div class="inventory-item">
                     <p><strong>Description:</strong> {item.get('description', 'N/A')}</p>
                     {self._format_properties(item.get('props', []))}
-                    {self._format_implemented_components(item.get('implemented-components', []))}
+                    {self._format_implemented_components(item.get('implemented-components', []), index)}
                 </div>
                 """
             
-            html_content += """
-            </body>
-            </html>
-            """
-            
-            # Save the report
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            output_path = self.output_dir / f"oscal_report_{timestamp}.html"
-            output_path.write_text(html_content)
-            
-            return str(output_path)
-            
-        except Exception as e:
-            logging.error(f"Error generating HTML report: {str(e)}")
-            raise
-            
-    def _format_links(self, links: List[Dict[str, Any]]) -> str:
+    def _format_links(self, links: List[Dict[str, Any]], index: DocumentIndex) -> str:
         if not links:
             return ""
             
-        html = "<p><strong>Links:</strong></p><ul>"
+        parts = ["<p><strong>Links:</strong></p><ul>"]
         for link in links:
-            html += f"""<li>
+            target = index.resolve_href(link.get('href', '')) or {}
+            parts.append(f"""<li>
                 {link.get('text', 'No description')}
-                ({link.get('rel', 'unknown')} relationship)
-            </li>"""
-        html += "</ul>"
-        return html
+                ({link.get('rel', 'unknown')} relationship{f" to {target['title']}" if 'title' in target else ''})
+            </li>""")
+        parts.append("</ul>")
+        return "".join(parts)
         
     def _format_status(self, status: Dict[str, Any]) -> str:
         if not status:
@@ -217,36 +364,47 @@ class OSCALVisualizer:
         if not props:
             return ""
             
-        html = "<p><strong>Properties:</strong></p><ul>"
+        parts = ["<p><strong>Properties:</strong></p><ul>"]
         for prop in props:
-            html += f"""<li>
+            parts.append(f"""<li>
                 {prop.get('name', 'unnamed')}: {prop.get('value', 'N/A')}
                 {f"({prop.get('class')})" if 'class' in prop else ''}
-            </li>"""
-        html += "</ul>"
-        return html
+            </li>""")
+        parts.append("</ul>")
+        return "".join(parts)
         
-    def _format_implemented_components(self, implemented: List[Dict[str, Any]]) -> str:
+    def _format_implemented_components(self, implemented: List[Dict[str, Any]], index: DocumentIndex) -> str:
         if not implemented:
             return ""
             
-        html = "<p><strong>Implemented Components:</strong></p><ul>"
+        parts = ["<p><strong>Implemented Components:</strong></p><ul>"]
         for impl in implemented:
-            html += f"""<li>Component ID: {impl.get('component-uuid', 'N/A')}</li>"""
-        html += "</ul>"
-        return html
+            uuid = impl.get('component-uuid', 'N/A')
+            title = index.component_title(uuid)
+            parts.append(f"""<li>Component ID: {f"{title} ({uuid})" if title else uuid}</li>""")
+        parts.append("</ul>")
+        return "".join(parts)
+        
+    def _format_controls(self, control_ids: List[str]) -> str:
+        if not control_ids:
+            return ""
+            
+        return f"""<p><strong>Implements Controls:</strong> {', '.join(control_ids)}</p>"""
 
-def visualize_components(oscal_file: Dict[str, Any]) -> None:
-    """Create visual representation of components"""
-    visualizer = OSCALVisualizer()
+def visualize_components(oscal_file: Dict[str, Any], graph_format: str = "png", aggregate: bool = False,
+                         page_size: Optional[int] = None, artifact_dir: Optional[str] = None) -> None:
+    """Create visual representation of components in reports/ (or artifact_dir)"""
+    visualizer = OSCALVisualizer(artifact_dir or "reports")
     try:
+        index = DocumentIndex(oscal_file)
+
         # Generate component graph
-        graph_path = visualizer.create_component_graph(oscal_file)
+        graph_path = visualizer.create_component_graph(oscal_file, graph_format, aggregate, index)
         if graph_path:
             print(f"Component graph generated: {graph_path}")
         
         # Generate HTML report
-        report_path = visualizer.generate_html_report(oscal_file)
+        report_path = visualizer.generate_html_report(oscal_file, page_size, index)
         print(f"HTML report generated: {report_path}")
         
     except Exception as e:
@@ -0,0 +1,123 @@
+import json
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional
+from core.compression import logical_stem, logical_suffix
+
+@dataclass
+class BatchResult:
+    """Outcome of running a command against one document of a batch"""
+    document: str
+    output: str
+    status: str = "ok"
+    seconds: float = 0.0
+    error: str = ""
+
+def expand_batch_inputs(spec: str, extensions: Iterable[str] = (".json",)) -> List[str]:
+    """
+    Resolve a batch argument into the list of documents to process
+
+    Args:
+        spec: A directory, whose files with a matching extension (optionally
+            compressed, e.g. ssp.json.gz) are used, or a manifest file listing one document path per line. Blank
+            lines and lines starting with # are ignored, and relative paths
+            are resolved against the manifest's directory.
+        extensions: File extensions picked up from a directory
+
+    Returns:
+        Sorted list of document paths for a directory, or the manifest order
+    """
+    path = Path(spec)
+    if path.is_dir():
+        return sorted(str(p) for p in path.iterdir()
+                      if p.is_file() and logical_suffix(p) in extensions)
+
+    if not path.exists():
+        raise FileNotFoundError(f"Batch input not found: {spec}")
+
+    documents = []
+    for line in path.read_text().splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        document = Path(line)
+        if not document.is_absolute():
+            document = path.parent / document
+        documents.append(str(document))
+    return documents
+
+def output_paths(documents: List[str], output_dir: Path, command: str) -> List[Path]:
+    """Give every document a distinct output file named after it"""
+    paths = []
+    used = set()
+    for document in documents:
+        stem = f"{logical_stem(document)}.{command}"
+        name, suffix = stem, 1
+        while name in used:
+            suffix += 1
+            name = f"{stem}-{suffix}"
+        used.add(name)
+        paths.append(output_dir / f"{name}.txt")
+    return paths
+
+def _timed(task: Callable[[str, str], None], document: str, output: str) -> float:
+    start = time.perf_counter()
+    task(document, output)
+    return time.perf_counter() - start
+
+def run_batch(task: Callable[[str, str], None], documents: List[str], output_dir: str,
+              command: str, workers: Optional[int] = None) -> List[BatchResult]:
+    """
+    Run a task over many documents in a process pool
+
+    A document that raises is recorded as failed and the rest of the batch
+    carries on.
+
+    Args:
+        task: Picklable callable taking (document path, output path) that
+            runs the command and writes its output
+        documents: Documents to process
+        output_dir: Directory for per-document output and summary.json
+        command: Command name, used for output file names and the summary
+        workers: Number of worker processes (defaults to the CPU count)
+
+    Returns:
+        One BatchResult per document, in input order
+    """
+    out_dir = Path(output_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    results = [BatchResult(document=document, output=str(output))
+               for document, output in zip(documents, output_paths(documents, out_dir, command))]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_timed, task, result.document, result.output): result
+                   for result in results}
+        for future in as_completed(futures):
+            result = futures[future]
+            try:
+                result.seconds = future.result()
+            except Exception as e:
+                result.status = "error"
+                result.error = f"{type(e).__name__}: {e}"
+                logging.error(f"Batch {command} failed for {result.document}: {result.error}")
+
+    write_summary(results, out_dir, command)
+    return results
+
+def write_summary(results: List[BatchResult], output_dir: Path, command: str) -> Path:
+    """Write summary.json for a batch run and return its path"""
+    summary = {
+        "command": command,
+        "generated": datetime.now().isoformat(),
+        "total": len(results),
+        "succeeded": sum(1 for r in results if r.status == "ok"),
+        "failed": sum(1 for r in results if r.status != "ok"),
+        "documents": [asdict(r) for r in results],
+    }
+    summary_path = output_dir / "summary.json"
+    summary_path.write_text(json.dumps(summary, indent=2))
+    return summary_path
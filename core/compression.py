@@ -0,0 +1,77 @@
+import gzip
+from pathlib import Path
+from typing import BinaryIO, Union
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Leading bytes of each supported compressed format
+_MAGIC = {
+    "gzip": b"\x1f\x8b",
+    "bzip2": b"BZh",
+    "xz": b"\xfd7zXZ\x00",
+    "zstd": b"\x28\xb5\x2f\xfd",
+}
+# File suffixes of the compressed formats, stripped to find a file's real type
+COMPRESSED_SUFFIXES = {".gz": "gzip", ".bz2": "bzip2", ".xz": "xz", ".zst": "zstd"}
+
+def compression_format(file_path: Union[str, Path]) -> str:
+    """
+    Detect how a file is compressed from its first bytes
+
+    The content is checked rather than the suffix, so a renamed or
+    mislabelled file is still read correctly.
+
+    Returns:
+        "gzip", "bzip2", "xz" or "zstd", or "" for an uncompressed file
+    """
+    with open(file_path, "rb") as f:
+        head = f.read(6)
+    for name, magic in _MAGIC.items():
+        if head.startswith(magic):
+            return name
+    return ""
+
+def open_input(file_path: Union[str, Path]) -> BinaryIO:
+    """
+    Open a file for binary reading, decompressing it on the fly if needed
+
+    Compressed data is decoded as it is read, so parsers can consume
+    .gz, .bz2, .xz and .zst files directly without a decompressed copy
+    on disk.
+
+    Raises:
+        ValueError: If the file is zstd-compressed and the optional
+            zstandard package is not installed
+    """
+    fmt = compression_format(file_path)
+    if fmt == "gzip":
+        return gzip.open(file_path, "rb")
+    # bz2 and lzma are only imported when needed to keep command start-up fast
+    if fmt == "bzip2":
+        import bz2
+        return bz2.open(file_path, "rb")
+    if fmt == "xz":
+        import lzma
+        return lzma.open(file_path, "rb")
+    if fmt == "zstd":
+        if zstandard is None:
+            raise ValueError(f"{file_path} is zstd-compressed; install the zstandard package to read it")
+        return zstandard.ZstdDecompressor().stream_reader(open(file_path, "rb"), closefd=True)
+    return open(file_path, "rb")
+
+def logical_suffix(file_path: Union[str, Path]) -> str:
+    """Suffix of a file ignoring a compression suffix, e.g. ".nessus" for scan.nessus.gz"""
+    path = Path(file_path)
+    if path.suffix.lower() in COMPRESSED_SUFFIXES:
+        path = path.with_suffix("")
+    return path.suffix.lower()
+
+def logical_stem(file_path: Union[str, Path]) -> str:
+    """Stem of a file ignoring a compression suffix, e.g. "ssp" for ssp.json.gz"""
+    path = Path(file_path)
+    if path.suffix.lower() in COMPRESSED_SUFFIXES:
+        path = path.with_suffix("")
+    return path.stem
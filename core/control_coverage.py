@@ -0,0 +1,169 @@
+from typing import Dict, Any, Iterator, List, Optional
+from core.document_index import DocumentIndex
+
+def control_family(control_id: str) -> str:
+    """Family of a control id, e.g. "ac" for "ac-2.1" """
+    return control_id.split("-", 1)[0].lower()
+
+def _bits(mask: int) -> Iterator[int]:
+    """Positions of the set bits of a mask, lowest first"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+class ControlCoverage:
+    """
+    Controls x components coverage matrix over an SSP's control-implementation
+
+    Controls and components are numbered once and every relationship is
+    stored as a bitset (a Python int), one per control and one per
+    component. Filters are then combined with a few integer AND operations
+    regardless of how many controls or components the document has.
+
+    Components referenced by a by-component entry but missing from
+    system-implementation are still included, under their uuid.
+    """
+
+    def __init__(self, index: DocumentIndex):
+        self.index = index
+        self.control_ids: List[str] = list(index.requirements)
+        self.component_ids: List[str] = list(index.components)
+        self._control_pos = {control_id: i for i, control_id in enumerate(self.control_ids)}
+        self._component_pos = {uuid: j for j, uuid in enumerate(self.component_ids)}
+
+        # Components implementing each control, and controls implemented by each component
+        self.control_components: List[int] = [0] * len(self.control_ids)
+        self.component_controls: List[int] = [0] * len(self.component_ids)
+        self.families: Dict[str, int] = {}
+        self.params: Dict[tuple, int] = {}
+        self.without_statements = 0
+
+        for i, control_id in enumerate(self.control_ids):
+            bit = 1 << i
+            req = index.requirements[control_id]
+            family = control_family(control_id)
+            self.families[family] = self.families.get(family, 0) | bit
+            if not req.get("statements"):
+                self.without_statements |= bit
+            self._add_params(req, bit)
+
+        for uuid, entries in index.component_statements.items():
+            j = self._component_position(uuid)
+            for entry in entries:
+                i = self._control_pos[entry.control_id]
+                self.control_components[i] |= 1 << j
+                self.component_controls[j] |= 1 << i
+                self._add_params(entry.by_component, 1 << i)
+
+    def _component_position(self, uuid: str) -> int:
+        j = self._component_pos.get(uuid)
+        if j is None:
+            j = self._component_pos[uuid] = len(self.component_ids)
+            self.component_ids.append(uuid)
+            self.component_controls.append(0)
+        return j
+
+    def _add_params(self, node: Dict[str, Any], bit: int) -> None:
+        for param in node.get("set-parameters", []):
+            for value in param.get("values", []):
+                key = (param.get("param-id", ""), str(value).lower())
+                self.params[key] = self.params.get(key, 0) | bit
+
+    @property
+    def all_controls(self) -> int:
+        return (1 << len(self.control_ids)) - 1
+
+    def find_component(self, component: str) -> Optional[int]:
+        """Position of a component given by uuid or (case-insensitive) title"""
+        if component in self._component_pos:
+            return self._component_pos[component]
+        wanted = component.lower()
+        for j, uuid in enumerate(self.component_ids):
+            if (self.index.component_title(uuid) or "").lower() == wanted:
+                return j
+        return None
+
+    def query(self, family: Optional[str] = None, component: Optional[str] = None,
+              param: Optional[str] = None, missing_statements: bool = False) -> int:
+        """
+        Select controls matching every given filter
+
+        Args:
+            family: Control family, e.g. "ac"
+            component: Component uuid or title the control must be implemented by
+            param: Set-parameter value the control must use, either "value"
+                (any parameter, substring match) or "param-id=value" (exact)
+            missing_statements: Only controls with no implementation statements
+
+        Returns:
+            Bitset of the matching control positions
+
+        Raises:
+            ValueError: If the component does not exist in the document
+        """
+        mask = self.all_controls
+        if family:
+            mask &= self.families.get(family.lower(), 0)
+        if component:
+            j = self.find_component(component)
+            if j is None:
+                raise ValueError(f"Component not found: {component}")
+            mask &= self.component_controls[j]
+        if param:
+            param_id, sep, value = param.partition("=")
+            matched = 0
+            if sep:
+                matched = self.params.get((param_id, value.lower()), 0)
+            else:
+                wanted = param.lower()
+                for (_, param_value), bits in self.params.items():
+                    if wanted in param_value:
+                        matched |= bits
+            mask &= matched
+        if missing_statements:
+            mask &= self.without_statements
+        return mask
+
+    def controls(self, mask: int) -> List[str]:
+        """Control ids selected by a bitset"""
+        return [self.control_ids[i] for i in _bits(mask)]
+
+    def components_for(self, control_id: str) -> List[str]:
+        """Uuids of the components implementing a control"""
+        return [self.component_ids[j] for j in _bits(self.control_components[self._control_pos[control_id]])]
+
+    def matrix(self, mask: int, component_mask: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Coverage matrix for the selected controls
+
+        Args:
+            mask: Bitset of controls (rows)
+            component_mask: Bitset of components (columns), defaults to
+                every component implementing one of the selected controls
+
+        Returns:
+            Dict with "controls", "components" (uuids) and "rows", a list of
+            0/1 lists with one entry per component
+        """
+        rows = list(_bits(mask))
+        if component_mask is None:
+            component_mask = 0
+            for i in rows:
+                component_mask |= self.control_components[i]
+        columns = list(_bits(component_mask))
+        return {
+            "controls": [self.control_ids[i] for i in rows],
+            "components": [self.component_ids[j] for j in columns],
+            "rows": [[self.control_components[i] >> j & 1 for j in columns] for i in rows],
+        }
+
+    def summary(self, mask: int) -> Dict[str, Any]:
+        """Counts of selected controls and how many are implemented by at least one component"""
+        total = bin(mask).count("1")
+        implemented = sum(1 for i in _bits(mask) if self.control_components[i])
+        return {
+            "controls": total,
+            "implemented": implemented,
+            "percent": round(100 * implemented / total, 1) if total else 0.0,
+        }
@@ -1,7 +1,9 @@
 import json
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 import logging
 from pathlib import Path
+from core import serialization
+from core.lazy_loader import load_paths
 
 class OSCALError(Exception):
     """Base exception class for OSCAL-related errors"""
@@ -37,12 +39,15 @@ def validate_oscal_type(data: Dict[str, Any]) -> str:
         return "sap"
     return "unknown"
 
-def load_file(file_path: str) -> Dict[str, Any]:
+def load_file(file_path: str, paths: Optional[List[str]] = None) -> Dict[str, Any]:
     """
     Load and validate an OSCAL JSON file
     
     Args:
         file_path: Path to the OSCAL JSON file
+        paths: Optional dotted paths (e.g. "system-security-plan.metadata.roles")
+            to materialize. When given, only those subtrees are decoded and
+            the rest of the document is skipped.
         
     Returns:
         Dict containing the parsed OSCAL data
@@ -57,11 +62,13 @@ def load_file(file_path: str) -> Dict[str, Any]:
         if not path.exists():
             raise FileNotFoundError(f"File not found: {file_path}")
             
-        with path.open('r') as file:
-            try:
-                data = json.load(file)
-            except json.JSONDecodeError as e:
-                raise FileFormatError(f"Invalid JSON format: {str(e)}")
+        try:
+            if paths:
+                data = load_paths(file_path, paths)
+            else:
+                data = serialization.load(path)
+        except json.JSONDecodeError as e:
+            raise FileFormatError(f"Invalid JSON format: {str(e)}")
                 
         # Validate it's an OSCAL document
         doc_type = validate_oscal_type(data)
@@ -0,0 +1,91 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional
+
+@dataclass
+class ComponentStatement:
+    """One by-component entry: how a component implements part of a control"""
+    control_id: str
+    statement_id: Optional[str]
+    by_component: Dict[str, Any]
+
+class DocumentIndex:
+    """
+    Cross-reference index over an SSP
+
+    Built in a single pass over the document so commands can resolve
+    references and answer reverse queries ("which controls does component
+    X implement") with dictionary lookups instead of walking lists. The
+    caller owns the index: build it once per command and pass it along, so
+    it is freed together with the document it points into.
+
+    Attributes:
+        by_uuid: Every object in the document that has a uuid
+        roles: metadata roles by role id
+        components: system-implementation components by uuid
+        requirements: implemented requirements by control id
+        component_statements: by-component entries by component uuid
+    """
+
+    def __init__(self, oscal_file: Dict[str, Any]):
+        self.by_uuid: Dict[str, Dict[str, Any]] = {}
+        self.roles: Dict[str, Dict[str, Any]] = {}
+        self.components: Dict[str, Dict[str, Any]] = {}
+        self.requirements: Dict[str, Dict[str, Any]] = {}
+        self.component_statements: Dict[str, List[ComponentStatement]] = defaultdict(list)
+
+        ssp = oscal_file.get("system-security-plan", {})
+        self._index_uuids(ssp)
+
+        for role in ssp.get("metadata", {}).get("roles", []):
+            self.roles[role.get("id")] = role
+
+        system_impl = ssp.get("system-implementation", {})
+        for comp in system_impl.get("components", []):
+            self.components[comp.get("uuid")] = comp
+
+        for req in ssp.get("control-implementation", {}).get("implemented-requirements", []):
+            control_id = req.get("control-id")
+            self.requirements[control_id] = req
+            for by_comp in req.get("by-components", []):
+                self.component_statements[by_comp.get("component-uuid")].append(
+                    ComponentStatement(control_id, None, by_comp))
+            for stmt in req.get("statements", []):
+                for by_comp in stmt.get("by-components", []):
+                    self.component_statements[by_comp.get("component-uuid")].append(
+                        ComponentStatement(control_id, stmt.get("statement-id"), by_comp))
+
+    def _index_uuids(self, node: Any) -> None:
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, dict):
+                uuid = node.get("uuid")
+                if isinstance(uuid, str):
+                    self.by_uuid.setdefault(uuid, node)
+                stack.extend(value for value in node.values() if isinstance(value, (dict, list)))
+            elif isinstance(node, list):
+                stack.extend(value for value in node if isinstance(value, (dict, list)))
+
+    def get(self, uuid: str) -> Optional[Dict[str, Any]]:
+        """Object with the given uuid anywhere in the document"""
+        return self.by_uuid.get(uuid)
+
+    def resolve_href(self, href: str) -> Optional[Dict[str, Any]]:
+        """Object referenced by a "#uuid" fragment link, or None for external links"""
+        if not href.startswith("#"):
+            return None
+        return self.by_uuid.get(href[1:])
+
+    def role_title(self, role_id: str) -> str:
+        """Title of a role, falling back to its id"""
+        return self.roles.get(role_id, {}).get("title", role_id)
+
+    def component_title(self, uuid: str) -> Optional[str]:
+        """Title of a component, or None if the uuid is not a component"""
+        comp = self.components.get(uuid)
+        return comp.get("title") if comp else None
+
+    def controls_for_component(self, uuid: str) -> List[str]:
+        """Control ids a component helps implement, in document order"""
+        return list(dict.fromkeys(entry.control_id for entry in self.component_statements.get(uuid, [])))
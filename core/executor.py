@@ -0,0 +1,164 @@
+import asyncio
+import io
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Any, Callable, List, Optional
+
+# Pools a job can run in: threads for file I/O, processes for CPU-bound parsing
+THREAD = "thread"
+PROCESS = "process"
+
+@dataclass
+class Job:
+    """
+    One unit of work in a job graph
+
+    A job runs func(*args, *dependency results), with the results of its
+    dependencies appended in the order they are listed. Anything it prints
+    is captured in output rather than written to the console.
+    """
+    name: str
+    func: Callable
+    args: tuple = ()
+    deps: List[str] = field(default_factory=list)
+    pool: str = THREAD
+    status: str = "pending"
+    seconds: float = 0.0
+    output: str = ""
+    error: str = ""
+    result: Any = None
+
+class _ThreadLocalStdout(io.TextIOBase):
+    """stdout replacement that sends each thread's prints to its own buffer when one is set"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def write(self, text):
+        buffer = getattr(self.local, "buffer", None)
+        return (self.stream if buffer is None else buffer).write(text)
+
+    def flush(self):
+        buffer = getattr(self.local, "buffer", None)
+        (self.stream if buffer is None else buffer).flush()
+
+def _install_stdout() -> None:
+    """Process pool initializer, so process jobs capture their output the same way"""
+    sys.stdout = _ThreadLocalStdout(sys.stdout)
+
+def _call(func: Callable, args: tuple) -> tuple:
+    """Run a job function in a pool worker, capturing its output and timing it"""
+    stdout = sys.stdout
+    stdout.local.buffer = io.StringIO()
+    start = time.perf_counter()
+    try:
+        result = func(*args)
+        return result, stdout.local.buffer.getvalue(), time.perf_counter() - start
+    finally:
+        stdout.local.buffer = None
+
+class JobGraph:
+    """
+    Run jobs concurrently in dependency order
+
+    Jobs start as soon as their dependencies have finished, up to a
+    concurrency limit, so independent chains (one per document, say) overlap
+    and the total run time is bounded by the slowest chain rather than the
+    sum of all of them. A job whose dependency failed is skipped.
+    """
+
+    def __init__(self):
+        self.jobs: Dict[str, Job] = {}
+
+    def add(self, name: str, func: Callable, *args, deps: Optional[List[str]] = None,
+            pool: str = THREAD) -> Job:
+        """
+        Add a job to the graph
+
+        Args:
+            name: Unique job name, used to refer to it from later jobs
+            func: Function to run; must be picklable for process jobs
+            *args: Leading arguments, before the dependency results
+            deps: Names of jobs that must finish first
+            pool: THREAD for I/O-bound work, PROCESS for CPU-bound work
+
+        Raises:
+            ValueError: If the name is taken, a dependency is unknown or
+                the pool is not recognised
+        """
+        if name in self.jobs:
+            raise ValueError(f"Duplicate job name: {name}")
+        unknown = [dep for dep in deps or [] if dep not in self.jobs]
+        if unknown:
+            raise ValueError(f"Job {name} depends on unknown jobs: {', '.join(unknown)}")
+        if pool not in (THREAD, PROCESS):
+            raise ValueError(f"Unknown pool {pool} for job {name}")
+
+        job = Job(name=name, func=func, args=args, deps=list(deps or []), pool=pool)
+        self.jobs[name] = job
+        return job
+
+    def run(self, concurrency: Optional[int] = None, workers: Optional[int] = None) -> Dict[str, Job]:
+        """
+        Run every job and return them with status, timing, output and result filled in
+
+        Args:
+            concurrency: Maximum number of jobs running at once (defaults to
+                the CPU count)
+            workers: Number of worker processes for process jobs (defaults
+                to the concurrency limit)
+        """
+        concurrency = concurrency or os.cpu_count() or 1
+        uses_processes = any(job.pool == PROCESS for job in self.jobs.values())
+
+        stdout = sys.stdout
+        sys.stdout = _ThreadLocalStdout(stdout)
+        try:
+            with ThreadPoolExecutor(max_workers=concurrency) as threads:
+                processes = (ProcessPoolExecutor(max_workers=workers or concurrency, initializer=_install_stdout)
+                             if uses_processes else None)
+                try:
+                    asyncio.run(self._run_all({THREAD: threads, PROCESS: processes}, concurrency))
+                finally:
+                    if processes:
+                        processes.shutdown()
+        finally:
+            sys.stdout = stdout
+        return self.jobs
+
+    async def _run_all(self, pools: Dict[str, Executor], concurrency: int) -> None:
+        limit = asyncio.Semaphore(concurrency)
+        tasks: Dict[str, asyncio.Task] = {}
+        # Jobs can only depend on earlier jobs, so insertion order is a valid schedule
+        for name, job in self.jobs.items():
+            tasks[name] = asyncio.create_task(self._run_job(job, tasks, pools, limit))
+        await asyncio.gather(*tasks.values())
+
+    async def _run_job(self, job: Job, tasks: Dict[str, asyncio.Task],
+                       pools: Dict[str, Executor], limit: asyncio.Semaphore) -> None:
+        if job.deps:
+            await asyncio.gather(*(tasks[dep] for dep in job.deps))
+        failed = [dep for dep in job.deps if self.jobs[dep].status != "ok"]
+        if failed:
+            job.status = "skipped"
+            job.error = f"Dependency failed: {', '.join(failed)}"
+            return
+
+        args = job.args + tuple(self.jobs[dep].result for dep in job.deps)
+        async with limit:
+            job.status = "running"
+            loop = asyncio.get_running_loop()
+            try:
+                job.result, job.output, job.seconds = await loop.run_in_executor(
+                    pools[job.pool], _call, job.func, args)
+                job.status = "ok"
+            except Exception as e:
+                job.status = "error"
+                job.error = f"{type(e).__name__}: {e}"
+                logging.error(f"Job {job.name} failed: {job.error}")
@@ -0,0 +1,124 @@
+import csv
+import io
+import logging
+from pathlib import Path
+from typing import Dict, Iterator, Union
+from core.serialization import atomic_open
+from core.scan_reader import ScanSource, open_scan
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# Columns of the exported dataset and their types, in output order
+FINDING_COLUMNS = [
+    ("host", "string"),
+    ("ip", "string"),
+    ("port", "int32"),
+    ("protocol", "string"),
+    ("plugin_id", "string"),
+    ("severity", "int8"),
+    ("service", "string"),
+    ("name", "string"),
+]
+# Output formats and their file suffixes; parquet and arrow need pyarrow
+EXPORT_FORMATS = {"csv": ".csv", "parquet": ".parquet", "arrow": ".arrow"}
+DEFAULT_BATCH_SIZE = 65536
+
+def iter_finding_batches(scan: ScanSource, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[Dict[str, list]]:
+    """
+    Stream the findings of a scan as column batches
+
+    Hosts are read one at a time, so at most one host and one batch of
+    rows are held in memory whatever the size of the scan.
+
+    Args:
+        scan: Scan file path, reader or loaded results
+        batch_size: Maximum number of rows per batch
+
+    Returns:
+        Iterator of dicts mapping each column name to a list of values
+    """
+    columns: Dict[str, list] = {name: [] for name, _ in FINDING_COLUMNS}
+    rows = 0
+    for host in open_scan(scan):
+        for finding in host.findings:
+            columns["host"].append(finding.host)
+            columns["ip"].append(host.ip)
+            columns["port"].append(int(finding.port or 0))
+            columns["protocol"].append(finding.protocol)
+            columns["plugin_id"].append(finding.plugin_id)
+            columns["severity"].append(finding.severity)
+            columns["service"].append(finding.service)
+            columns["name"].append(finding.plugin_name)
+            rows += 1
+            if rows == batch_size:
+                yield columns
+                columns = {name: [] for name, _ in FINDING_COLUMNS}
+                rows = 0
+    if rows:
+        yield columns
+
+def _write_csv(batches: Iterator[Dict[str, list]], output_path: Path) -> int:
+    rows = 0
+    names = [name for name, _ in FINDING_COLUMNS]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(names)
+    with atomic_open(output_path) as f:
+        for batch in batches:
+            writer.writerows(zip(*(batch[name] for name in names)))
+            rows += len(batch["host"])
+            f.write(buffer.getvalue().encode("utf-8"))
+            buffer.seek(0)
+            buffer.truncate()
+        f.write(buffer.getvalue().encode("utf-8"))
+    return rows
+
+def _write_arrow(batches: Iterator[Dict[str, list]], output_path: Path, output_format: str) -> int:
+    schema = pyarrow.schema([(name, getattr(pyarrow, kind)()) for name, kind in FINDING_COLUMNS])
+    rows = 0
+    with atomic_open(output_path) as f:
+        if output_format == "parquet":
+            writer = pyarrow.parquet.ParquetWriter(f, schema)
+        else:
+            writer = pyarrow.ipc.new_file(f, schema)
+        with writer:
+            for batch in batches:
+                arrays = [pyarrow.array(batch[field.name], type=field.type) for field in schema]
+                writer.write_batch(pyarrow.RecordBatch.from_arrays(arrays, schema=schema))
+                rows += len(batch["host"])
+    return rows
+
+def export_findings(scan: ScanSource, output_path: Union[str, Path], output_format: str = "csv",
+                    batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """
+    Write every finding of a scan to a columnar file
+
+    Args:
+        scan: Scan file path, reader or loaded results
+        output_path: File to write; it only appears once complete
+        output_format: "csv", "parquet" or "arrow" (Arrow IPC file)
+        batch_size: Rows converted and written at a time
+
+    Returns:
+        Number of rows written
+
+    Raises:
+        ValueError: If the format is unknown, or needs pyarrow and it is not installed
+    """
+    if output_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {output_format} (expected one of: {', '.join(EXPORT_FORMATS)})")
+    if output_format != "csv" and pyarrow is None:
+        raise ValueError(f"Exporting {output_format} needs the pyarrow package; install it or use csv")
+
+    batches = iter_finding_batches(scan, batch_size)
+    if output_format == "csv":
+        rows = _write_csv(batches, Path(output_path))
+    else:
+        rows = _write_arrow(batches, Path(output_path), output_format)
+    logging.info(f"Exported {rows} findings to {output_path} as {output_format}")
+    return rows
@@ -0,0 +1,167 @@
+import re
+import json
+import mmap
+import logging
+from pathlib import Path
+from typing import Dict, Any, List
+from core import serialization
+from core.compression import compression_format, open_input
+
+# Next structural character inside a container
+_STRUCTURAL = re.compile(rb'["\[\]{}]')
+# Remainder of a string literal after its opening quote
+_STRING_TAIL = re.compile(rb'[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+# A scalar value (number, true, false, null)
+_SCALAR = re.compile(rb'[^,}\]\s]+')
+_WHITESPACE = re.compile(rb'\s*')
+
+# Marker for a path that should be materialized in full
+_WHOLE = None
+
+def build_path_tree(paths: List[str]) -> Dict[str, Any]:
+    """
+    Turn dotted paths into a nested dict of keys to materialize
+
+    A leaf is None, meaning the subtree under that key is loaded in full.
+    A shorter path wins over a longer one that it contains.
+    """
+    tree: Dict[str, Any] = {}
+    for path in paths:
+        node = tree
+        keys = path.split(".")
+        for key in keys[:-1]:
+            if key in node and node[key] is _WHOLE:
+                break
+            node = node.setdefault(key, {})
+        else:
+            node[keys[-1]] = _WHOLE
+    return tree
+
+class _Scanner:
+    """Walks JSON bytes, skipping unwanted values without decoding them"""
+
+    def __init__(self, buf):
+        self.buf = buf
+
+    def ws(self, pos: int) -> int:
+        return _WHITESPACE.match(self.buf, pos).end()
+
+    def expect(self, pos: int, char: bytes) -> int:
+        pos = self.ws(pos)
+        if self.buf[pos:pos + 1] != char:
+            raise json.JSONDecodeError(f"Expecting {char.decode()!r}", "", pos)
+        return pos + 1
+
+    def skip_string(self, pos: int) -> int:
+        match = _STRING_TAIL.match(self.buf, pos + 1)
+        if not match:
+            raise json.JSONDecodeError("Unterminated string", "", pos)
+        return match.end()
+
+    def skip_value(self, pos: int) -> int:
+        pos = self.ws(pos)
+        char = self.buf[pos:pos + 1]
+        if char == b'"':
+            return self.skip_string(pos)
+        if char not in (b"{", b"["):
+            match = _SCALAR.match(self.buf, pos)
+            if not match:
+                raise json.JSONDecodeError("Expecting value", "", pos)
+            return match.end()
+
+        depth = 0
+        while True:
+            match = _STRUCTURAL.search(self.buf, pos)
+            if not match:
+                raise json.JSONDecodeError("Unterminated container", "", pos)
+            char = match.group()
+            if char == b'"':
+                pos = self.skip_string(match.start())
+                continue
+            pos = match.end()
+            if char in (b"{", b"["):
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return pos
+
+    def decode_value(self, pos: int) -> tuple:
+        start = self.ws(pos)
+        end = self.skip_value(start)
+        return serialization.loads(self.buf[start:end]), end
+
+    def select(self, pos: int, tree: Dict[str, Any], out: Dict[str, Any],
+               placeholders: bool = False) -> int:
+        """
+        Copy the members of the object at pos that appear in tree into out
+
+        With placeholders, members that are not selected are added to out as
+        empty objects instead of being left out.
+        """
+        pos = self.expect(pos, b"{")
+        pos = self.ws(pos)
+        if self.buf[pos:pos + 1] == b"}":
+            return pos + 1
+
+        while True:
+            pos = self.ws(pos)
+            key_end = self.skip_string(pos)
+            key = json.loads(bytes(self.buf[pos:key_end]))
+            pos = self.expect(key_end, b":")
+
+            pos = self.ws(pos)
+            if key not in tree:
+                pos = self.skip_value(pos)
+                if placeholders:
+                    out[key] = {}
+            elif tree[key] is _WHOLE or self.buf[pos:pos + 1] != b"{":
+                out[key], pos = self.decode_value(pos)
+            else:
+                out[key] = {}
+                pos = self.select(pos, tree[key], out[key])
+
+            pos = self.ws(pos)
+            char = self.buf[pos:pos + 1]
+            if char == b"}":
+                return pos + 1
+            if char != b",":
+                raise json.JSONDecodeError("Expecting ',' delimiter", "", pos)
+            pos += 1
+
+def load_paths(file_path: str, paths: List[str]) -> Dict[str, Any]:
+    """
+    Load only the given subtrees of a JSON document
+
+    The file is memory-mapped and scanned; values outside the requested
+    paths are skipped without being decoded, so memory use scales with the
+    size of the selected subtrees instead of the whole document. Top-level
+    keys that are not selected are kept as empty objects so the document
+    type can still be detected.
+
+    A compressed file cannot be mapped, so it is decompressed into memory
+    and scanned the same way; unselected values are still never decoded.
+
+    Args:
+        file_path: Path to the JSON file
+        paths: Dotted paths to materialize, e.g. "system-security-plan.metadata.roles"
+
+    Returns:
+        Dict with the same shape as the document, containing only the
+        requested subtrees (and the objects leading to them)
+    """
+    tree = build_path_tree(paths)
+    data: Dict[str, Any] = {}
+    if Path(file_path).stat().st_size == 0:
+        raise json.JSONDecodeError("Expecting value", "", 0)
+    if compression_format(file_path):
+        with open_input(file_path) as f:
+            _Scanner(f.read()).select(0, tree, data, placeholders=True)
+    else:
+        with open(file_path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                _Scanner(buf).select(0, tree, data, placeholders=True)
+
+    logging.debug(f"Lazily loaded {', '.join(paths)} from {file_path}")
+    return data
+
@@ -0,0 +1,141 @@
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Set
+from core import serialization
+from core.compression import logical_stem
+from core.poam_reconciler import FindingKey, PoamReconciler, add_group_host, create_poam_group, create_poam_item
+from core.scan_reader import ScanFinding
+
+FINGERPRINT_SUFFIX = ".fingerprint.json"
+
+@dataclass
+class PoamDelta:
+    """Changes to a POA&M: new items for added findings and items closed because their findings are resolved"""
+    poam_uuid: str
+    base_last_modified: str
+    last_modified: str
+    opened: List[Dict[str, Any]] = field(default_factory=list)
+    closed: List[str] = field(default_factory=list)
+    incremental: bool = True
+
+    def __bool__(self) -> bool:
+        return bool(self.opened or self.closed)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Patch document written in patch mode"""
+        return {
+            "poam-uuid": self.poam_uuid,
+            "base-last-modified": self.base_last_modified,
+            "last-modified": self.last_modified,
+            "opened": self.opened,
+            "closed": self.closed,
+        }
+
+def fingerprint_path(poam_path: str) -> Path:
+    """Fingerprint file kept next to a POA&M, e.g. poam.fingerprint.json for poam.json"""
+    path = Path(poam_path)
+    return path.with_name(logical_stem(path) + FINGERPRINT_SUFFIX)
+
+def current_findings(findings: Iterable[ScanFinding]) -> Dict[FindingKey, ScanFinding]:
+    """First finding reported for each (plugin_id, host)"""
+    current: Dict[FindingKey, ScanFinding] = {}
+    for finding in findings:
+        current.setdefault((finding.plugin_id, finding.host), finding)
+    return current
+
+def load_fingerprint(path: Path, plan: Dict[str, Any]) -> Optional[Set[FindingKey]]:
+    """
+    Finding keys of the scan the POA&M was last reconciled against
+
+    Returns None, so the caller falls back to a full reconciliation, when
+    there is no fingerprint or it was written for a different POA&M or a
+    different revision of it.
+    """
+    if not path.exists():
+        return None
+    try:
+        fingerprint = serialization.load(path)
+    except Exception as e:
+        logging.warning(f"Ignoring unreadable POA&M fingerprint {path}: {str(e)}")
+        return None
+    if (fingerprint.get("poam-uuid") != plan.get("uuid") or
+            fingerprint.get("last-modified") != plan.get("metadata", {}).get("last-modified")):
+        logging.info(f"POA&M has changed since fingerprint {path} was written")
+        return None
+    return {(plugin_id, host) for plugin_id, host in fingerprint.get("findings", [])}
+
+def save_fingerprint(path: Path, poam_uuid: str, last_modified: str, keys: Iterable[FindingKey]) -> None:
+    """Record the finding keys a POA&M revision was reconciled against"""
+    serialization.dump({
+        "poam-uuid": poam_uuid,
+        "last-modified": last_modified,
+        "findings": sorted(list(key) for key in keys),
+    }, path, indent=False)
+
+def compute_delta(plan: Dict[str, Any], current: Dict[FindingKey, ScanFinding],
+                  previous: Optional[Set[FindingKey]], group_by_plugin: bool = False) -> PoamDelta:
+    """
+    Work out what a new scan changes in a POA&M
+
+    With the previous scan's finding keys only the added and resolved keys
+    are looked at. Without them every finding is reconciled against the
+    POA&M as generate-poam does. Either way, items that are already
+    completed are not reported as closed again.
+
+    Args:
+        plan: The plan-of-action-and-milestones object
+        current: Findings of the new scan by (plugin_id, host)
+        previous: Finding keys of the previous scan, or None
+        group_by_plugin: Open one item per plugin listing its hosts
+
+    Returns:
+        PoamDelta with the items to open and the uuids of the items to close
+    """
+    items = plan.get("poam-items", [])
+    reconciler = PoamReconciler(items)
+    delta = PoamDelta(poam_uuid=plan.get("uuid", ""),
+                      base_last_modified=plan.get("metadata", {}).get("last-modified", ""),
+                      last_modified=datetime.now().isoformat(),
+                      incremental=previous is not None)
+
+    if previous is None:
+        result = reconciler.reconcile(current.values(), group_by_plugin)
+        was_open = {item.get("uuid") for item in items if item.get("status") != "completed"}
+        delta.opened = result.opened
+        delta.closed = [item["uuid"] for item in result.closed if item.get("uuid") in was_open]
+        return delta
+
+    added = [key for key in current if key not in previous]
+    resolved = previous - current.keys()
+    new_findings = [current[key] for key in added if not reconciler.matches(key)]
+    if group_by_plugin:
+        groups: Dict[str, Dict[str, Any]] = {}
+        for finding in new_findings:
+            if finding.plugin_id in groups:
+                add_group_host(groups[finding.plugin_id], finding)
+            else:
+                groups[finding.plugin_id] = create_poam_group(finding)
+        delta.opened = list(groups.values())
+    else:
+        delta.opened = [create_poam_item(finding) for finding in new_findings]
+
+    closing = []
+    for key in resolved:
+        closing.extend(reconciler.items_for(key))
+    # Items tracked per plugin stay open while any host still reports the plugin
+    current_plugins = {plugin_id for plugin_id, _ in current}
+    for plugin_id in {plugin_id for plugin_id, _ in resolved} - current_plugins:
+        closing.extend(reconciler.items_for((plugin_id, None)))
+    delta.closed = list(dict.fromkeys(item.get("uuid") for item in closing if item.get("status") != "completed"))
+
+    logging.info(f"POA&M delta: {len(added)} findings added, {len(resolved)} resolved")
+    return delta
+
+def iter_delta_items(plan: Dict[str, Any], delta: PoamDelta) -> Iterator[Dict[str, Any]]:
+    """POA&M items with a delta applied: existing items in order, closed ones completed, then the opened ones"""
+    closed = set(delta.closed)
+    for item in plan.get("poam-items", []):
+        yield {**item, "status": "completed"} if item.get("uuid") in closed else item
+    yield from delta.opened
@@ -0,0 +1,170 @@
+import uuid
+import logging
+import itertools
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Iterable, Iterator, Optional, Set, Tuple
+from core.scan_reader import ScanFinding
+
+# (plugin_id, host) - host is None for POA&M items tracked per plugin only
+FindingKey = Tuple[str, Optional[str]]
+
+@dataclass
+class ReconciliationResult:
+    """POA&M items sorted by what the latest scan says about them"""
+    opened: List[Dict[str, Any]] = field(default_factory=list)
+    kept: List[Dict[str, Any]] = field(default_factory=list)
+    closed: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def items(self) -> List[Dict[str, Any]]:
+        """All items in output order: kept, then newly opened, then closed"""
+        return self.kept + self.opened + self.closed
+
+    def iter_items(self) -> Iterator[Dict[str, Any]]:
+        """Items in the same order as items, without building the combined list"""
+        return itertools.chain(self.kept, self.opened, self.closed)
+
+def item_key(item: Dict[str, Any]) -> Optional[FindingKey]:
+    """
+    Return the (plugin_id, host) key of a POA&M item, or None if it is not tied to a scan finding
+
+    Per-host items record related-findings.host and give (plugin_id, host).
+    Grouped items record related-findings.hosts instead, and items that only
+    record a plugin_id, give (plugin_id, None).
+    """
+    related = item.get("related-findings", {})
+    plugin_id = related.get("plugin_id")
+    if not plugin_id:
+        return None
+    return (plugin_id, related.get("host"))
+
+def create_poam_item(finding: ScanFinding) -> Dict[str, Any]:
+    """Create a new POA&M item for a scan finding, with related-findings.host naming its host"""
+    return {
+        "uuid": str(uuid.uuid4()),
+        "title": finding.title or "Unknown Finding",
+        "description": finding.description or "No description available",
+        "related-findings": {
+            "plugin_id": finding.plugin_id,
+            "host": finding.host,
+            "severity": finding.severity
+        }
+    }
+
+def create_poam_group(finding: ScanFinding) -> Dict[str, Any]:
+    """
+    Create a new POA&M item tracking a plugin on every host it is reported on
+
+    The description and solution are written once per plugin rather than
+    once per host; the solution goes in the item's remarks, as OSCAL has
+    no solution field on poam-items. Unlike create_poam_item, the hosts
+    are listed in related-findings.hosts rather than related-findings.host,
+    so a POA&M may hold both shapes; further hosts are added with
+    add_group_host.
+    """
+    item = {
+        "uuid": str(uuid.uuid4()),
+        "title": finding.title or "Unknown Finding",
+        "description": finding.description or "No description available",
+        "related-findings": {
+            "plugin_id": finding.plugin_id,
+            "hosts": [finding.host],
+            "severity": finding.severity
+        }
+    }
+    if finding.solution:
+        item["remarks"] = finding.solution
+    return item
+
+def add_group_host(item: Dict[str, Any], finding: ScanFinding) -> None:
+    """Add the host of a finding to a grouped item, keeping the highest severity"""
+    related = item["related-findings"]
+    related["hosts"].append(finding.host)
+    related["severity"] = max(related["severity"], finding.severity)
+
+class PoamReconciler:
+    """
+    Reconciles existing POA&M items against scan findings in linear time
+
+    Existing items are indexed once by (plugin_id, host). Each finding is then
+    a single dictionary lookup, falling back to items that only record a
+    plugin_id, and repeated reports of the same plugin on the same host (for
+    example on several ports) collapse into one item.
+
+    Items grouped per plugin (see create_poam_group) are indexed by
+    (plugin_id, None) like any other per-plugin item; their host list is
+    refreshed from the scan when they are kept.
+    """
+
+    def __init__(self, poam_items: Iterable[Dict[str, Any]]):
+        self._index: Dict[FindingKey, List[Dict[str, Any]]] = {}
+        self._untracked: List[Dict[str, Any]] = []
+
+        for item in poam_items:
+            key = item_key(item)
+            if key is None:
+                self._untracked.append(item)
+            else:
+                self._index.setdefault(key, []).append(item)
+
+    def items_for(self, key: FindingKey) -> List[Dict[str, Any]]:
+        """Existing items recorded under exactly this key"""
+        return self._index.get(key, [])
+
+    def matches(self, key: FindingKey) -> List[Dict[str, Any]]:
+        """Existing items a finding with this key is matched to, using the same fallback as reconcile"""
+        return self._index.get(key) or self._index.get((key[0], None), [])
+
+    def reconcile(self, findings: Iterable[ScanFinding], group_by_plugin: bool = False) -> ReconciliationResult:
+        """
+        Match findings to existing POA&M items
+
+        Args:
+            findings: Scan findings that should be tracked in the POA&M
+            group_by_plugin: Open one item per plugin listing its hosts,
+                instead of one item per plugin and host
+
+        Returns:
+            ReconciliationResult with new items for unmatched findings, the
+            existing items that are still reported, and completed copies of
+            the existing items whose findings are resolved
+        """
+        seen: Set[FindingKey] = set()
+        matched: Set[FindingKey] = set()
+        opened: Dict[FindingKey, Dict[str, Any]] = {}
+        # Hosts matched to each per-plugin item, for refreshing grouped items
+        plugin_hosts: Dict[str, List[str]] = {}
+
+        for finding in findings:
+            key = (finding.plugin_id, finding.host)
+            if key in seen:
+                continue
+            seen.add(key)
+            if key in self._index:
+                matched.add(key)
+            elif (finding.plugin_id, None) in self._index:
+                matched.add((finding.plugin_id, None))
+                plugin_hosts.setdefault(finding.plugin_id, []).append(finding.host)
+            elif group_by_plugin:
+                group = opened.get((finding.plugin_id, None))
+                if group is None:
+                    opened[(finding.plugin_id, None)] = create_poam_group(finding)
+                else:
+                    add_group_host(group, finding)
+            else:
+                opened[key] = create_poam_item(finding)
+
+        result = ReconciliationResult(opened=list(opened.values()), kept=list(self._untracked))
+        for key, items in self._index.items():
+            if key in matched:
+                for item in items:
+                    related = item["related-findings"]
+                    if key[1] is None and "hosts" in related:
+                        item = {**item, "related-findings": {**related, "hosts": plugin_hosts[key[0]]}}
+                    result.kept.append(item)
+            else:
+                result.closed.extend({**item, "status": "completed"} for item in items)
+
+        logging.info(f"POA&M reconciliation: {len(result.opened)} opened, "
+                     f"{len(result.kept)} kept, {len(result.closed)} closed")
+        return result
@@ -0,0 +1,159 @@
+import os
+import sys
+import time
+import marshal
+import hashlib
+import logging
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+from core.scan_filter import ScanFilter
+from core.scan_reader import NessusScanReader, PluginInfo, ScanFinding, ScanHost, PARSER_VERSION, filter_host
+
+DEFAULT_CACHE_DIR = Path(".cache") / "scans"
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+DEFAULT_MAX_AGE_DAYS = 30
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+class ScanCache:
+    """
+    On-disk cache of parsed scans
+
+    Entries are keyed on the SHA-256 of the scan file content together with
+    the scan reader's PARSER_VERSION and the Python version (the records are
+    stored with marshal). The cache directory defaults to .cache/scans and can
+    be moved with the OSCAL_SAK_CACHE_DIR environment variable.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None,
+                 max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_age_days: float = DEFAULT_MAX_AGE_DAYS):
+        self.cache_dir = Path(cache_dir or os.environ.get("OSCAL_SAK_CACHE_DIR", DEFAULT_CACHE_DIR))
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_days * 24 * 60 * 60
+
+    def path_for(self, scan_file_path: str) -> Path:
+        """Return the cache entry path for the current content of a scan file"""
+        digest = hashlib.sha256()
+        digest.update(f"parser-v{PARSER_VERSION}:{sys.version_info[:2]}:".encode())
+        with open(scan_file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return self.cache_dir / f"{digest.hexdigest()}.scan"
+
+    def evict(self) -> None:
+        """Remove entries older than max_age_days, then the least recently used until under max_bytes"""
+        if not self.cache_dir.exists():
+            return
+
+        now = time.time()
+        entries = []
+        for entry in self.cache_dir.glob("*.scan"):
+            stat = entry.stat()
+            if now - stat.st_mtime > self.max_age_seconds:
+                entry.unlink(missing_ok=True)
+                logging.debug(f"Evicted expired scan cache entry {entry.name}")
+            else:
+                entries.append((stat.st_mtime, stat.st_size, entry))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            entry.unlink(missing_ok=True)
+            total -= size
+            logging.debug(f"Evicted scan cache entry {entry.name} to stay under {self.max_bytes} bytes")
+
+    def clear(self) -> None:
+        """Remove every cached scan"""
+        for entry in self.cache_dir.glob("*.scan"):
+            entry.unlink(missing_ok=True)
+
+class CachedScanReader(NessusScanReader):
+    """
+    Scan reader that replays a cached parse when one exists for the file
+
+    On a cache miss the XML is streamed as usual and each host is appended to
+    a temporary cache file, which only replaces the cache entry once the whole
+    scan has been read. Cached entries are streamed host by host as well, so
+    memory stays flat on both paths.
+
+    Plugin metadata is written once, the first time a plugin is seen, and
+    findings refer to it by number, so replayed findings share PluginInfo
+    records just like freshly parsed ones.
+
+    Entries always hold the whole scan. A filtered read replays an entry
+    and drops rejected rows before building findings; without an entry it
+    parses the whole file once, stores it and filters the hosts on the way
+    out, so the next read with any filter comes from the cache.
+    """
+
+    def __init__(self, scan_file_path: str, cache: Optional[ScanCache] = None,
+                 scan_filter: Optional[ScanFilter] = None):
+        super().__init__(scan_file_path, scan_filter)
+        self.cache = cache or ScanCache()
+
+    def __iter__(self) -> Iterator[ScanHost]:
+        entry = self.cache.path_for(self.scan_file_path)
+        if entry.exists():
+            logging.info(f"Loading parsed scan from cache {entry}")
+            os.utime(entry)
+            yield from self._read_entry(entry)
+        else:
+            yield from self._parse_and_store(entry)
+
+    def _read_entry(self, entry: Path) -> Iterator[ScanHost]:
+        plugins: List[PluginInfo] = []
+        with entry.open("rb") as f:
+            while True:
+                record = marshal.load(f)
+                if record[0] == "plugin":
+                    plugins.append(self.plugins.get(*record[1:]))
+                    continue
+                if record[0] == "end":
+                    self.targets = list(record[1])
+                    return
+                _, name, ip, os_name, rows = record
+                scan_filter = self.scan_filter
+                if scan_filter is not None:
+                    if not scan_filter.accepts_host(name, ip):
+                        continue
+                    rows = [row for row in rows
+                            if scan_filter.accepts_item(row[2], row[0], plugins[row[3]].plugin_family)]
+                name = sys.intern(name)
+                yield ScanHost(name=name, ip=ip, os=os_name,
+                               findings=[ScanFinding(name, sys.intern(port), sys.intern(protocol), severity,
+                                                     plugins[plugin], sys.intern(service))
+                                         for port, protocol, severity, plugin, service in rows])
+
+    def _parse_and_store(self, entry: Path) -> Iterator[ScanHost]:
+        self.cache.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = entry.with_suffix(f".{os.getpid()}.tmp")
+        complete = False
+        try:
+            numbers: Dict[PluginInfo, int] = {}
+            with tmp_path.open("wb") as f:
+                for host in self._parse(None):
+                    rows = []
+                    for finding in host.findings:
+                        plugin = finding.plugin
+                        number = numbers.get(plugin)
+                        if number is None:
+                            number = numbers[plugin] = len(numbers)
+                            marshal.dump(("plugin", plugin.plugin_id, plugin.plugin_name, plugin.plugin_family,
+                                          plugin.title, plugin.description, plugin.solution), f)
+                        rows.append((finding.port, finding.protocol, finding.severity, number, finding.service))
+                    marshal.dump(("host", host.name, host.ip, host.os, rows), f)
+                    if self.scan_filter is not None:
+                        host = filter_host(host, self.scan_filter)
+                        if host is None:
+                            continue
+                    yield host
+                marshal.dump(("end", self.targets), f)
+            os.replace(tmp_path, entry)
+            complete = True
+            logging.info(f"Cached parsed scan in {entry}")
+        finally:
+            if not complete:
+                tmp_path.unlink(missing_ok=True)
+        self.cache.evict()
@@ -0,0 +1,118 @@
+import ipaddress
+from dataclasses import dataclass
+from typing import FrozenSet, List, Optional, Tuple, Union
+
+Network = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+def parse_port_ranges(spec: str) -> Tuple[Tuple[int, int], ...]:
+    """
+    Parse a port list such as "22,80-443" into inclusive (low, high) ranges
+
+    Raises:
+        ValueError: If an entry is not a port or a low-high range of ports
+    """
+    ranges = []
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        low, _, high = entry.partition("-")
+        try:
+            bounds = (int(low), int(high or low))
+        except ValueError:
+            raise ValueError(f"Invalid port range: {entry}") from None
+        if not 0 <= bounds[0] <= bounds[1] <= 65535:
+            raise ValueError(f"Invalid port range: {entry}")
+        ranges.append(bounds)
+    return tuple(ranges)
+
+@dataclass(frozen=True)
+class ScanFilter:
+    """
+    Which hosts and findings of a scan a command needs
+
+    Every criterion that is set must hold for a finding to be kept; hosts
+    rejected by the host list are left out entirely. Readers check these
+    predicates on the raw ReportHost and ReportItem attributes, so whatever
+    is rejected is never turned into objects (see NessusScanReader).
+
+    Attributes:
+        min_severity: Lowest severity kept (0 keeps informational findings)
+        names: Host names to keep, compared case-insensitively; None keeps
+            every host
+        networks: IP networks to keep as well, matched against the host IP
+            and against the host name when it is an address
+        plugin_families: Plugin families to keep, compared case-insensitively
+        ports: Inclusive (low, high) port ranges to keep
+    """
+    min_severity: int = 0
+    names: Optional[FrozenSet[str]] = None
+    networks: Tuple[Network, ...] = ()
+    plugin_families: Optional[FrozenSet[str]] = None
+    ports: Optional[Tuple[Tuple[int, int], ...]] = None
+
+    @classmethod
+    def from_options(cls, min_severity: Optional[int] = None, hosts: Optional[List[str]] = None,
+                     plugin_families: Optional[List[str]] = None,
+                     ports: Optional[str] = None) -> Optional["ScanFilter"]:
+        """
+        Build a filter from command options
+
+        Args:
+            min_severity: Lowest severity to keep, 0 to 4
+            hosts: Host names, IP addresses or CIDR networks to keep
+            plugin_families: Plugin families to keep
+            ports: Port list such as "22,80-443"
+
+        Returns:
+            ScanFilter, or None when no option was given
+
+        Raises:
+            ValueError: For a severity outside 0-4 or an invalid port list
+        """
+        if min_severity is None and not hosts and not plugin_families and not ports:
+            return None
+        if min_severity is not None and not 0 <= min_severity <= 4:
+            raise ValueError(f"Invalid minimum severity {min_severity} (expected 0 to 4)")
+
+        names, networks = set(), []
+        for host in hosts or []:
+            try:
+                networks.append(ipaddress.ip_network(host, strict=False))
+            except ValueError:
+                names.add(host.casefold())
+        return cls(min_severity=min_severity or 0,
+                   names=frozenset(names) if hosts else None,
+                   networks=tuple(networks),
+                   plugin_families=frozenset(family.casefold() for family in plugin_families)
+                   if plugin_families else None,
+                   ports=parse_port_ranges(ports) if ports else None)
+
+    def accepts_host(self, name: str, ip: str = "") -> bool:
+        """Whether a host with this name and IP address is kept"""
+        if self.names is None:
+            return True
+        if name.casefold() in self.names:
+            return True
+        for candidate in (ip, name):
+            try:
+                address = ipaddress.ip_address(candidate)
+            except ValueError:
+                continue
+            if any(address in network for network in self.networks):
+                return True
+        return False
+
+    def accepts_item(self, severity: int, port: str = "0", plugin_family: str = "") -> bool:
+        """Whether a finding with these attributes is kept"""
+        if severity < self.min_severity:
+            return False
+        if self.plugin_families is not None and plugin_family.casefold() not in self.plugin_families:
+            return False
+        if self.ports is not None:
+            try:
+                number = int(port)
+            except ValueError:
+                return False
+            return any(low <= number <= high for low, high in self.ports)
+        return True
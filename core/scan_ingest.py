@@ -0,0 +1,113 @@
+import glob
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import List, Optional
+from core.scan_reader import ScanResults, ScanSource, load_scan
+from core.scan_cache import CachedScanReader
+from core.compression import logical_suffix
+
+# File extensions picked up when a directory is given as a scan source, with or
+# without a compression suffix (scan.nessus.gz)
+SCAN_EXTENSIONS = (".nessus", ".xml")
+
+def expand_scan_paths(specs: List[str]) -> List[str]:
+    """
+    Expand scan arguments into a sorted, de-duplicated list of scan files
+
+    Args:
+        specs: Scan file paths, glob patterns or directories
+
+    Returns:
+        List of scan file paths. Arguments that match nothing are passed
+        through unchanged so the error is reported when they are read.
+    """
+    paths = []
+    for spec in specs:
+        path = Path(spec)
+        if path.is_dir():
+            matches = sorted(str(p) for p in path.iterdir()
+                             if p.is_file() and logical_suffix(p) in SCAN_EXTENSIONS)
+        elif glob.has_magic(spec):
+            matches = sorted(glob.glob(spec, recursive=True))
+        else:
+            matches = [spec]
+
+        if not matches:
+            logging.warning(f"No scan files matched {spec}")
+        paths.extend(matches)
+
+    return list(dict.fromkeys(paths))
+
+def _load_scan_file(scan_file_path: str, use_cache: bool) -> ScanResults:
+    """Worker entry point: parse a single scan file into memory"""
+    reader = CachedScanReader(scan_file_path) if use_cache else scan_file_path
+    return load_scan(reader)
+
+def load_scans(scan_file_paths: List[str], workers: Optional[int] = None,
+               use_cache: bool = True) -> ScanResults:
+    """
+    Parse several scan files in parallel and merge them into one result
+
+    A file that cannot be parsed is logged and skipped so the remaining
+    scans are still returned.
+
+    Args:
+        scan_file_paths: Scan files to parse
+        workers: Number of worker processes (defaults to the CPU count)
+        use_cache: Reuse and populate the parsed-scan cache
+
+    Returns:
+        ScanResults with the hosts of every scan in input order and the
+        union of their configured targets
+
+    Raises:
+        ValueError: If none of the scan files could be parsed
+    """
+    results = {}
+    failed = []
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_load_scan_file, path, use_cache): path
+                   for path in scan_file_paths}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                results[path] = future.result()
+            except Exception as e:
+                logging.error(f"Error parsing scan file {path}: {str(e)}")
+                failed.append(path)
+
+    if not results:
+        raise ValueError(f"None of the {len(scan_file_paths)} scan files could be parsed")
+    if failed:
+        logging.warning(f"Skipped {len(failed)} of {len(scan_file_paths)} scan files: {', '.join(failed)}")
+
+    merged = ScanResults(scan_file_path=", ".join(path for path in scan_file_paths if path in results))
+    for path in scan_file_paths:
+        if path in results:
+            merged.hosts.extend(results[path].hosts)
+            merged.targets.extend(results[path].targets)
+            # Each worker built its own plugin table; share one set of records across the merged scan
+            for host in results[path].hosts:
+                for finding in host.findings:
+                    finding.plugin = merged.plugins.add(finding.plugin)
+    merged.targets = list(dict.fromkeys(merged.targets))
+
+    logging.info(f"Merged {len(merged.hosts)} hosts from {len(results)} scan files")
+    return merged
+
+def open_scans(specs: List[str], workers: Optional[int] = None,
+               use_cache: bool = True) -> ScanSource:
+    """
+    Resolve scan arguments into a scan source for the scan commands
+
+    A single file is streamed (through the cache unless disabled); several
+    files are parsed in parallel and merged with load_scans.
+    """
+    paths = expand_scan_paths(specs)
+    if len(paths) == 1:
+        return CachedScanReader(paths[0]) if use_cache else paths[0]
+    if not paths:
+        raise FileNotFoundError(f"No scan files found in: {', '.join(specs)}")
+    return load_scans(paths, workers=workers, use_cache=use_cache)
@@ -0,0 +1,377 @@
+import copy
+import html
+import re
+import sys
+import xml.etree.ElementTree as ET
+import logging
+from dataclasses import dataclass, field
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+from core.compression import open_input
+from core.scan_filter import ScanFilter
+
+# Bump whenever the records produced by the reader change so cached parses are rebuilt
+PARSER_VERSION = 3
+
+@dataclass(frozen=True, slots=True)
+class PluginInfo:
+    """Metadata of a Nessus plugin, shared by every finding it reports"""
+    plugin_id: str
+    plugin_name: str
+    plugin_family: str = ""
+    title: str = ""
+    description: str = ""
+    solution: str = ""
+
+class PluginTable:
+    """
+    One PluginInfo per distinct plugin metadata in a scan
+
+    A plugin reported on thousands of hosts then keeps a single copy of its
+    name, description and solution instead of one per ReportItem. Records are keyed
+    on all their fields, so plugins whose metadata differs between items
+    keep each variant.
+    """
+
+    def __init__(self):
+        self._records: Dict[tuple, PluginInfo] = {}
+
+    def get(self, plugin_id: str, plugin_name: str, plugin_family: str = "",
+            title: str = "", description: str = "", solution: str = "") -> PluginInfo:
+        """Shared record for the given metadata, created on first use"""
+        key = (plugin_id, plugin_name, plugin_family, title, description, solution)
+        record = self._records.get(key)
+        if record is None:
+            record = self._records[key] = PluginInfo(*key)
+        return record
+
+    def add(self, record: PluginInfo) -> PluginInfo:
+        """Shared record equal to one from another table, e.g. when merging scans"""
+        return self._records.setdefault(
+            (record.plugin_id, record.plugin_name, record.plugin_family, record.title, record.description,
+             record.solution), record)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __iter__(self) -> Iterator[PluginInfo]:
+        return iter(self._records.values())
+
+@dataclass(slots=True)
+class ScanFinding:
+    """
+    A single ReportItem from a Nessus scan
+
+    Plugin metadata lives in a shared PluginInfo; plugin_id, plugin_name,
+    plugin_family, title, description and solution read through to it.
+    """
+    host: str
+    port: str
+    protocol: str
+    severity: int
+    plugin: PluginInfo
+    service: str = ""
+
+    @property
+    def plugin_id(self) -> str:
+        return self.plugin.plugin_id
+
+    @property
+    def plugin_name(self) -> str:
+        return self.plugin.plugin_name
+
+    @property
+    def plugin_family(self) -> str:
+        return self.plugin.plugin_family
+
+    @property
+    def title(self) -> str:
+        return self.plugin.title
+
+    @property
+    def description(self) -> str:
+        return self.plugin.description
+
+    @property
+    def solution(self) -> str:
+        return self.plugin.solution
+
+@dataclass(slots=True)
+class ScanHost:
+    """A ReportHost and the findings reported against it"""
+    name: str
+    ip: str = ""
+    os: str = ""
+    findings: List[ScanFinding] = field(default_factory=list)
+
+def filter_host(host: ScanHost, scan_filter: ScanFilter) -> Optional[ScanHost]:
+    """Copy of a parsed host with only the findings the filter keeps, or None if the host is rejected"""
+    if not scan_filter.accepts_host(host.name, host.ip):
+        return None
+    return ScanHost(name=host.name, ip=host.ip, os=host.os,
+                    findings=[finding for finding in host.findings
+                              if scan_filter.accepts_item(finding.severity, finding.port, finding.plugin_family)])
+
+@dataclass
+class ScanResults:
+    """A fully ingested scan that can be handed to several commands in turn"""
+    scan_file_path: str
+    targets: List[str] = field(default_factory=list)
+    hosts: List[ScanHost] = field(default_factory=list)
+    plugins: PluginTable = field(default_factory=PluginTable)
+
+    def __iter__(self) -> Iterator[ScanHost]:
+        return iter(self.hosts)
+
+    def findings(self) -> Iterator[ScanFinding]:
+        """Iterate over every finding in the scan, host by host"""
+        for host in self.hosts:
+            yield from host.findings
+
+    def filtered(self, scan_filter: ScanFilter) -> "ScanResults":
+        """The hosts and findings kept by a filter; findings are shared, not copied"""
+        hosts = [filter_host(host, scan_filter) for host in self.hosts]
+        return ScanResults(scan_file_path=self.scan_file_path, targets=self.targets,
+                           hosts=[host for host in hosts if host is not None], plugins=self.plugins)
+
+# Reading a filtered scan: the raw bytes are cut into ReportHost blocks and the
+# ReportHost and ReportItem start tags are checked before anything is parsed
+READ_SIZE = 1 << 20
+REPORT_HOST_TAG = b"<ReportHost"
+REPORT_ITEM_TAG = b"<ReportItem"
+TAG_NAME_END = b" \t\r\n/>"
+_ATTRIBUTES = {name: re.compile(rb"\s" + name + rb"""\s*=\s*(?:"([^"]*)"|'([^']*)')""")
+               for name in (b"name", b"severity", b"port", b"pluginFamily")}
+_HOST_IP = re.compile(rb"""<tag\s+name\s*=\s*["']host-ip["']\s*>([^<]*)</tag>""")
+_TAG_DELIMITER = re.compile(rb"""["'>]""")
+
+def _attribute(tag: bytes, name: bytes, default: str = "") -> str:
+    """Value of an attribute in a raw start tag, with entities resolved"""
+    match = _ATTRIBUTES[name].search(tag)
+    if match is None:
+        return default
+    value = (match.group(1) if match.group(1) is not None else match.group(2)).decode("utf-8")
+    return html.unescape(value) if "&" in value else value
+
+def _find_tag(data: bytes, tag: bytes, start: int = 0) -> int:
+    """Position of the next start tag with exactly this name, or -1"""
+    position = data.find(tag, start)
+    while position >= 0 and data[position + len(tag):position + len(tag) + 1] not in TAG_NAME_END:
+        position = data.find(tag, position + len(tag))
+    return position
+
+def _tag_end(data: bytes, start: int) -> int:
+    """End of the start tag opened at start, skipping ">" inside quoted attribute values (-1 if not in data yet)"""
+    position = start
+    while True:
+        match = _TAG_DELIMITER.search(data, position)
+        if match is None:
+            return -1
+        if match.group() == b">":
+            return match.end()
+        # XML attribute values may hold a literal ">" but never their own quote character
+        close = data.find(match.group(), match.end())
+        if close < 0:
+            return -1
+        position = close + 1
+
+def _element_end(data: bytes, start: int, close_tag: bytes) -> Tuple[int, int]:
+    """End of the start tag opened at start and end of the whole element (-1 if not in data yet)"""
+    tag_end = _tag_end(data, start)
+    if tag_end < 0:
+        return -1, -1
+    if data[tag_end - 2:tag_end] == b"/>":
+        return tag_end, tag_end
+    end = data.find(close_tag, tag_end)
+    return tag_end, (end + len(close_tag) if end >= 0 else -1)
+
+def _filter_host_block(block: bytes, scan_filter: ScanFilter) -> bytes:
+    """A raw ReportHost element without the ReportItems the filter rejects, or b"" for a rejected host"""
+    tag_end, _ = _element_end(block, 0, b"</ReportHost>")
+    if scan_filter.names is not None:
+        properties_end = block.find(b"</HostProperties>")
+        match = _HOST_IP.search(block, tag_end, properties_end if properties_end >= 0 else len(block))
+        ip = html.unescape(match.group(1).decode("utf-8")).strip() if match else ""
+        if not scan_filter.accepts_host(_attribute(block[:tag_end], b"name"), ip):
+            return b""
+
+    parts = []
+    kept = 0
+    start = _find_tag(block, REPORT_ITEM_TAG, tag_end)
+    while start >= 0:
+        item_tag_end, end = _element_end(block, start, b"</ReportItem>")
+        if end < 0:
+            break
+        tag = block[start:item_tag_end]
+        severity = _attribute(tag, b"severity", "0")
+        if not scan_filter.accepts_item(int(severity) if severity.isdigit() else 0,
+                                        _attribute(tag, b"port", "0") if scan_filter.ports is not None else "0",
+                                        _attribute(tag, b"pluginFamily") if scan_filter.plugin_families else ""):
+            parts.append(block[kept:start])
+            kept = end
+        start = _find_tag(block, REPORT_ITEM_TAG, end)
+    parts.append(block[kept:])
+    return b"".join(parts)
+
+def _filtered_chunks(source: BinaryIO, scan_filter: ScanFilter) -> Iterator[bytes]:
+    """The bytes of a scan with rejected hosts and ReportItems cut out, in chunks for an incremental parser"""
+    buffer = b""
+    while True:
+        # Read at least as much as is buffered so a very large ReportHost is not rescanned over and over
+        data = source.read(max(READ_SIZE, len(buffer)))
+        buffer = buffer + data if buffer else data
+        position = 0
+        while True:
+            start = _find_tag(buffer, REPORT_HOST_TAG, position)
+            if start < 0:
+                break
+            _, end = _element_end(buffer, start, b"</ReportHost>")
+            if end < 0:
+                break
+            yield buffer[position:start]
+            yield _filter_host_block(buffer[start:end], scan_filter)
+            position = end
+        if not data:
+            yield buffer[position:]
+            return
+        # Keep an unfinished ReportHost, or enough bytes to recognise a tag split across reads
+        start = _find_tag(buffer, REPORT_HOST_TAG, position)
+        keep = start if start >= 0 else max(position, len(buffer) - len(REPORT_HOST_TAG))
+        yield buffer[position:keep]
+        buffer = buffer[keep:]
+
+class NessusScanReader:
+    """
+    Streaming reader for Nessus (.nessus v2) scan files
+
+    The file is read with iterparse and every ReportHost element is cleared
+    as soon as it has been converted to a ScanHost, so memory use depends on
+    the largest single host rather than on the size of the scan.
+    Compressed scans (.gz, .bz2, .xz, .zst) are decompressed as they are
+    parsed.
+
+    With a scan_filter, rejected hosts and ReportItems are cut out of the
+    raw bytes by looking at their start tags only, so the XML parser never
+    sees them. Scans that are mostly informational findings parse several
+    times faster when only the higher severities are needed.
+    """
+
+    def __init__(self, scan_file_path: str, scan_filter: Optional[ScanFilter] = None):
+        self.scan_file_path = scan_file_path
+        self.scan_filter = scan_filter
+        self.targets: List[str] = []
+        self.plugins = PluginTable()
+
+    def filtered(self, scan_filter: ScanFilter) -> "NessusScanReader":
+        """A reader for the same scan that only returns what the filter keeps"""
+        reader = copy.copy(self)
+        reader.scan_filter = scan_filter
+        return reader
+
+    def _events(self, source: BinaryIO, scan_filter: Optional[ScanFilter]) -> Iterator[Tuple[str, ET.Element]]:
+        if scan_filter is None:
+            yield from ET.iterparse(source, events=("start", "end"))
+            return
+        parser = ET.XMLPullParser(events=("start", "end"))
+        for chunk in _filtered_chunks(source, scan_filter):
+            parser.feed(chunk)
+            yield from parser.read_events()
+        parser.close()
+        yield from parser.read_events()
+
+    def __iter__(self) -> Iterator[ScanHost]:
+        return self._parse(self.scan_filter)
+
+    def _parse(self, scan_filter: Optional[ScanFilter]) -> Iterator[ScanHost]:
+        report: Optional[ET.Element] = None
+
+        with open_input(self.scan_file_path) as source:
+            for event, elem in self._events(source, scan_filter):
+                if event == "start":
+                    if elem.tag == "Report":
+                        report = elem
+                    continue
+
+                if elem.tag == "ReportHost":
+                    yield self._parse_host(elem)
+                    elem.clear()
+                    if report is not None:
+                        report.remove(elem)
+                elif elem.tag == "preference" and elem.findtext("name") == "TARGET":
+                    value = elem.findtext("value") or ""
+                    self.targets = [hostname.strip() for hostname in value.split(",")]
+
+    def findings(self) -> Iterator[ScanFinding]:
+        """Iterate over every finding in the scan, host by host"""
+        for host in self:
+            yield from host.findings
+
+    def _parse_host(self, report_host: ET.Element) -> ScanHost:
+        host = ScanHost(name=sys.intern(report_host.get("name", "")))
+
+        props = report_host.find("HostProperties")
+        if props is not None:
+            for tag in props.findall("tag"):
+                if tag.get("name") == "operating-system":
+                    host.os = tag.text or ""
+                elif tag.get("name") == "host-ip":
+                    host.ip = tag.text or ""
+
+        # Ports, protocols and services repeat across the scan, so a single copy of each is kept
+        for report_item in report_host.findall("ReportItem"):
+            host.findings.append(ScanFinding(
+                host=host.name,
+                port=sys.intern(report_item.get("port", "0")),
+                protocol=sys.intern(report_item.get("protocol", "")),
+                severity=int(report_item.get("severity", "0")),
+                plugin=self.plugins.get(
+                    report_item.get("pluginID", ""),
+                    report_item.get("pluginName", ""),
+                    report_item.get("pluginFamily", ""),
+                    report_item.findtext("plugin_name") or "",
+                    report_item.findtext("description") or "",
+                    report_item.findtext("solution") or ""),
+                service=sys.intern(report_item.get("svc_name", ""))
+            ))
+
+        logging.debug(f"Parsed scan host {host.name} with {len(host.findings)} findings")
+        return host
+
+ScanSource = Union[str, ScanResults, NessusScanReader]
+
+def open_scan(scan: ScanSource, scan_filter: Optional[ScanFilter] = None) -> Union[ScanResults, NessusScanReader]:
+    """
+    Return an iterable of hosts for a scan file path, a reader or already loaded results
+
+    Args:
+        scan: Scan file path, reader or loaded results
+        scan_filter: Only return the hosts and findings this filter keeps.
+            Files are filtered while they are read; loaded results are
+            filtered into a new ScanResults sharing the same findings.
+    """
+    if isinstance(scan, str):
+        return NessusScanReader(scan, scan_filter)
+    if scan_filter is None:
+        return scan
+    return scan.filtered(scan_filter)
+
+def load_scan(scan: ScanSource) -> ScanResults:
+    """
+    Parse a Nessus scan once into memory so it can be shared between commands
+
+    Args:
+        scan: Path to the Nessus scan XML file, or a reader for it
+
+    Returns:
+        ScanResults holding every host, finding and configured target
+    """
+    reader = open_scan(scan)
+    if isinstance(reader, ScanResults):
+        return reader
+    hosts = list(reader)
+    logging.info(f"Loaded {len(hosts)} hosts from scan {reader.scan_file_path}")
+    return ScanResults(scan_file_path=reader.scan_file_path, targets=reader.targets, hosts=hosts,
+                       plugins=reader.plugins)
+
+def iter_scan_findings(scan: ScanSource, scan_filter: Optional[ScanFilter] = None) -> Iterator[ScanFinding]:
+    """Stream every finding (or those kept by scan_filter) from a Nessus scan file or loaded scan results"""
+    return open_scan(scan, scan_filter).findings()
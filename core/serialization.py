@@ -0,0 +1,210 @@
+import os
+import gzip
+import json
+import math
+import uuid
+import contextlib
+import tempfile
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, Sequence, Union
+from core.compression import open_input
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+class StdlibBackend:
+    """JSON backend built on the standard library json module"""
+    name = "json"
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return json.loads(data)
+
+    def dumps(self, obj: Any, indent: bool = True) -> bytes:
+        if indent:
+            text = json.dumps(obj, indent=2, ensure_ascii=False)
+        else:
+            text = json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+        return text.encode("utf-8")
+
+# Values orjson writes the way the json module does; anything else goes through the stdlib
+_ORJSON_SCALARS = (str, int, bool, type(None))
+_ORJSON_INT_RANGE = range(-2 ** 63, 2 ** 64)
+
+def _orjson_compatible(obj: Any) -> bool:
+    """
+    Whether orjson encodes obj to exactly the bytes the json module would
+
+    orjson writes floats that repr() puts in exponent notation differently
+    (1e16 rather than 1e+16, 0.00001 rather than 1e-05), writes NaN and
+    infinities as null and rejects integers outside 64 bits, so documents
+    holding any of these, or types the json module does not know, are not.
+    """
+    stack = [obj]
+    while stack:
+        value = stack.pop()
+        kind = type(value)
+        if kind is str:
+            continue
+        if isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+        elif kind is float:
+            if not math.isfinite(value) or (value and not 1e-4 <= abs(value) < 1e16):
+                return False
+        elif kind not in _ORJSON_SCALARS or (kind is int and value not in _ORJSON_INT_RANGE):
+            return False
+    return True
+
+class OrjsonBackend:
+    """
+    JSON backend built on orjson, producing the same bytes as StdlibBackend
+
+    Documents orjson would encode differently (see _orjson_compatible) are
+    written with the json module instead.
+    """
+    name = "orjson"
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return orjson.loads(data)
+
+    def dumps(self, obj: Any, indent: bool = True) -> bytes:
+        if not _orjson_compatible(obj):
+            return StdlibBackend().dumps(obj, indent)
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+
+BACKENDS: Dict[str, Any] = {"json": StdlibBackend}
+if orjson is not None:
+    BACKENDS["orjson"] = OrjsonBackend
+
+def get_backend(name: str = None):
+    """
+    Return a JSON backend instance
+
+    Args:
+        name: "orjson" or "json". Defaults to the OSCAL_SAK_JSON_BACKEND
+            environment variable, then to the fastest installed backend.
+
+    Raises:
+        ValueError: If the requested backend is not installed
+    """
+    name = name or os.environ.get("OSCAL_SAK_JSON_BACKEND")
+    if not name:
+        name = "orjson" if "orjson" in BACKENDS else "json"
+    if name not in BACKENDS:
+        raise ValueError(f"JSON backend {name} is not available (installed: {', '.join(BACKENDS)})")
+    return BACKENDS[name]()
+
+# No logging here: a log call at import time would install the default
+# handler before the CLI configures logging
+_backend = get_backend()
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Decode a JSON document with the active backend"""
+    return _backend.loads(data)
+
+def dumps(obj: Any, indent: bool = True) -> bytes:
+    """Encode an object as UTF-8 JSON bytes (2-space indented unless indent is False)"""
+    return _backend.dumps(obj, indent)
+
+def load(file_path: Union[str, Path]) -> Any:
+    """Read and decode a JSON file, which may be compressed (see compression.open_input)"""
+    with open_input(file_path) as f:
+        return _backend.loads(f.read())
+
+def dump(obj: Any, file_path: Union[str, Path], indent: bool = True) -> None:
+    """Encode an object and write it to a JSON file atomically (see atomic_open)"""
+    with atomic_open(file_path) as f:
+        f.write(_backend.dumps(obj, indent))
+
+@contextlib.contextmanager
+def atomic_open(file_path: Union[str, Path], compress: bool = False) -> Iterator[BinaryIO]:
+    """
+    Open a file for binary writing that only appears once it is complete
+
+    Data goes to a temporary file in the same directory, which is flushed to
+    disk and renamed over file_path when the block exits normally. If the
+    block raises, the temporary file is removed and file_path is untouched.
+
+    Args:
+        file_path: Final path of the file
+        compress: Gzip the data written
+    """
+    path = Path(file_path)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        # mkstemp creates the file as 0600; give it the permissions open() would have
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmp_path, 0o666 & ~umask)
+        with os.fdopen(fd, "wb") as raw:
+            if compress:
+                with gzip.GzipFile(filename=path.name, mode="wb", fileobj=raw) as f:
+                    yield f
+            else:
+                yield raw
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp_path)
+        raise
+
+def dump_streaming(obj: Any, file_path: Union[str, Path], list_path: Sequence[str], items: Iterable[Any],
+                   indent: bool = True, compress: bool = False) -> None:
+    """
+    Write a JSON document whose largest list is streamed item by item
+
+    The list at list_path in obj is ignored; items are encoded and written
+    one at a time in its place, so neither the full list nor the encoded
+    document has to be held in memory. The output is byte-for-byte what
+    dump would write for the complete document, and it is written
+    atomically (see atomic_open).
+
+    Args:
+        obj: Document to write, whose nested dicts contain list_path
+        file_path: Output file
+        list_path: Keys leading to the streamed list, e.g.
+            ["plan-of-action-and-milestones", "poam-items"]
+        items: Items of the list, in order
+        indent: Indent the output by 2 spaces, otherwise write it compact
+        compress: Gzip the output
+    """
+    # Encode the document around a unique placeholder and stream the items in its place
+    marker = f"stream-{uuid.uuid4().hex}"
+    shell = dict(obj)
+    node = shell
+    for key in list_path[:-1]:
+        node[key] = dict(node[key])
+        node = node[key]
+    node[list_path[-1]] = marker
+    prefix, suffix = _backend.dumps(shell, indent).split(f'"{marker}"'.encode("utf-8"))
+
+    if indent:
+        # The list's key sits on the last line of the prefix; items go one level deeper
+        key_line = prefix[prefix.rfind(b"\n") + 1:]
+        depth = len(key_line) - len(key_line.lstrip(b" "))
+        item_indent = b"\n" + b" " * (depth + 2)
+        opening, separator, closing = b"[" + item_indent, b"," + item_indent, b"\n" + b" " * depth + b"]"
+    else:
+        item_indent = None
+        opening, separator, closing = b"[", b",", b"]"
+
+    with atomic_open(file_path, compress) as f:
+        f.write(prefix)
+        written = False
+        for item in items:
+            encoded = _backend.dumps(item, indent)
+            if item_indent:
+                encoded = encoded.replace(b"\n", item_indent)
+            f.write(separator if written else opening)
+            f.write(encoded)
+            written = True
+        f.write(closing if written else b"[]")
+        f.write(suffix)
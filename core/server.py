@@ -0,0 +1,220 @@
+import contextlib
+import io
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+# Limits of the server's document cache; sizes are those of the source files
+DEFAULT_MAX_ENTRIES = 32
+DEFAULT_MAX_BYTES = 1024 ** 3
+
+class DocumentCache:
+    """
+    In-memory registry of loaded OSCAL documents and parsed scans
+
+    Entries are keyed on the resolved file paths they were loaded from and
+    are reloaded when any of those files changes modification time or size,
+    so a long-running server never serves a stale document.
+
+    The cache is bounded by entry count and by the total size of the source
+    files; the least recently used entries are dropped first, so documents
+    and scans that are no longer requested (e.g. last night's scan) do not
+    stay in memory for the life of the server. Both limits can be set with
+    OSCAL_SAK_SERVER_MAX_ENTRIES and OSCAL_SAK_SERVER_MAX_BYTES.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        self._entries: "OrderedDict[Tuple[str, ...], Tuple[tuple, Any]]" = OrderedDict()
+        self.max_entries = max_entries or int(os.environ.get("OSCAL_SAK_SERVER_MAX_ENTRIES", DEFAULT_MAX_ENTRIES))
+        self.max_bytes = max_bytes or int(os.environ.get("OSCAL_SAK_SERVER_MAX_BYTES", DEFAULT_MAX_BYTES))
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _stamp(paths: Tuple[str, ...]) -> tuple:
+        stamps = []
+        for path in paths:
+            stat = os.stat(path)
+            stamps.append((stat.st_mtime_ns, stat.st_size))
+        return tuple(stamps)
+
+    def get(self, paths: List[str], loader: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for a set of files, loading it if needed
+
+        Args:
+            paths: Files the value is loaded from
+            loader: Called with no arguments to (re)load the value
+
+        Raises:
+            FileNotFoundError: If one of the files does not exist
+        """
+        key = tuple(str(Path(path).resolve()) for path in paths)
+        for path in key:
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"File not found: {path}")
+
+        stamp = self._stamp(key)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == stamp:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[1]
+
+        self.misses += 1
+        # Drop a stale copy before loading so both are never held at once
+        self._entries.pop(key, None)
+        value = loader()
+        self._entries[key] = (stamp, value)
+        logging.info(f"Cached {', '.join(key)}")
+        self._evict()
+        return value
+
+    @staticmethod
+    def _size(stamp: tuple) -> int:
+        return sum(size for _, size in stamp)
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until both limits hold, always keeping the newest"""
+        total = sum(self._size(stamp) for stamp, _ in self._entries.values())
+        while len(self._entries) > 1 and (len(self._entries) > self.max_entries or total > self.max_bytes):
+            key, (stamp, _) = self._entries.popitem(last=False)
+            total -= self._size(stamp)
+            self.evictions += 1
+            logging.info(f"Evicted {', '.join(key)} from the document cache")
+
+    def document(self, file_path: str) -> Dict[str, Any]:
+        """Return a whole OSCAL document, so it can serve every command"""
+        from core.core_functionality import load_file
+
+        return self.get([file_path], lambda: load_file(file_path))
+
+    def scan(self, specs: List[str], workers: Optional[int] = None, use_cache: bool = True):
+        """Return the merged, fully parsed scan for scan file arguments"""
+        from core.scan_ingest import expand_scan_paths, open_scans
+        from core.scan_reader import load_scan
+
+        paths = expand_scan_paths(specs)
+        if not paths:
+            raise FileNotFoundError(f"No scan files found in: {', '.join(specs)}")
+        return self.get(paths, lambda: load_scan(open_scans(paths, workers, use_cache)))
+
+    def clear(self) -> None:
+        """Drop every cached entry"""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Read one JSON request line, run it and answer with one JSON line"""
+
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+        response = self.server.run_request(line)
+        self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+class CommandServer(socketserver.UnixStreamServer):
+    """
+    Unix socket server that runs commands against a warm DocumentCache
+
+    Requests are handled one at a time: commands print to stdout and some
+    write files relative to the working directory, both of which are
+    process-wide, so each request gets the process to itself while its
+    output is captured and its working directory is the client's.
+    """
+
+    def __init__(self, socket_path: str, handler: Callable[[DocumentCache, Dict[str, Any]], None]):
+        """
+        Args:
+            socket_path: Path of the Unix socket to listen on
+            handler: Called with the document cache and a decoded request;
+                whatever it prints is returned to the client
+        """
+        self.socket_path = socket_path
+        self.handler = handler
+        self.documents = DocumentCache()
+        if os.path.exists(socket_path):
+            try:
+                connect(socket_path).close()
+            except OSError:
+                # Stale socket left behind by a server that did not exit cleanly
+                os.unlink(socket_path)
+            else:
+                raise OSError(f"A server is already listening on {socket_path}")
+        super().__init__(socket_path, _RequestHandler)
+
+    def run_request(self, line: bytes) -> Dict[str, Any]:
+        """Run one encoded request and build the response sent to the client"""
+        output = io.StringIO()
+        cwd = os.getcwd()
+        try:
+            request = json.loads(line)
+            if request.get("command") == "shutdown":
+                # shutdown() waits for serve_forever, so it cannot run on this thread
+                threading.Thread(target=self.shutdown).start()
+                return {"status": "ok", "output": "Server shutting down\n"}
+
+            os.chdir(request.get("cwd") or cwd)
+            with contextlib.redirect_stdout(output):
+                self.handler(self.documents, request)
+            return {"status": "ok", "output": output.getvalue()}
+        except Exception as e:
+            logging.error(f"Error processing request: {str(e)}")
+            return {"status": "error", "output": output.getvalue(), "error": str(e)}
+        finally:
+            os.chdir(cwd)
+
+    def server_close(self):
+        super().server_close()
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.socket_path)
+
+def serve(socket_path: str, handler: Callable[[DocumentCache, Dict[str, Any]], None]) -> None:
+    """Serve requests on a Unix socket until interrupted or sent a shutdown request"""
+    with CommandServer(socket_path, handler) as server:
+        logging.info(f"Listening on {socket_path}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        logging.info(f"Server stopped after {server.documents.hits} cache hits "
+                     f"and {server.documents.misses} loads, {server.documents.evictions} evicted")
+
+def connect(socket_path: str) -> socket.socket:
+    """Open a connection to a running server"""
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(socket_path)
+    except OSError:
+        client.close()
+        raise
+    return client
+
+def send_request(socket_path: str, request: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Send one request to a running server and wait for its response
+
+    Args:
+        socket_path: Path of the server's Unix socket
+        request: Request fields; "cwd" defaults to the current directory so
+            relative paths resolve as they would for a local run
+
+    Returns:
+        Response with "status" ("ok" or "error"), the command's "output"
+        and, on failure, an "error" message
+    """
+    request = {"cwd": os.getcwd(), **request}
+    with connect(socket_path) as client:
+        client.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        with client.makefile("rb") as response:
+            return json.loads(response.readline())
@@ -0,0 +1,200 @@
+import os
+import sqlite3
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional
+
+DEFAULT_TREND_DB = Path("reports") / "finding_trends.db"
+
+# Nessus severity value for each trend series; reports label severities with these names
+SEVERITY_SERIES = {4: "critical", 3: "high", 2: "medium", 1: "low"}
+SEVERITY_LEVELS = {series: severity for severity, series in SEVERITY_SERIES.items()}
+
+# Bump when the schema changes; _migrate brings older databases up to date
+SCHEMA_VERSION = 1
+
+_SNAPSHOTS_TABLE = """
+CREATE TABLE IF NOT EXISTS scan_snapshots (
+    id INTEGER PRIMARY KEY,
+    system_id TEXT NOT NULL,
+    scan_source TEXT NOT NULL,
+    scan_version TEXT NOT NULL DEFAULT '',
+    recorded_at TEXT NOT NULL,
+    UNIQUE (system_id, scan_source, scan_version)
+);
+"""
+
+_SCHEMA = _SNAPSHOTS_TABLE + """
+CREATE INDEX IF NOT EXISTS idx_snapshots_system_time
+    ON scan_snapshots (system_id, recorded_at);
+CREATE TABLE IF NOT EXISTS severity_counts (
+    snapshot_id INTEGER NOT NULL REFERENCES scan_snapshots (id),
+    severity INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (snapshot_id, severity)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS host_counts (
+    snapshot_id INTEGER NOT NULL REFERENCES scan_snapshots (id),
+    host TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (snapshot_id, host)
+) WITHOUT ROWID;
+"""
+
+def scan_version(scan_source: str) -> str:
+    """
+    Identify the content of a scan source by the size and modification time of its files
+
+    A scan overwritten at a fixed path (e.g. scans/latest.nessus) then counts
+    as a new scan. Merged scans list their files separated by ", ". Files
+    that no longer exist contribute an empty entry.
+    """
+    versions = []
+    for path in scan_source.split(", "):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            versions.append("")
+            continue
+        versions.append(f"{stat.st_size}:{stat.st_mtime_ns}")
+    return ",".join(versions)
+
+def _shift_month(year: int, month: int, offset: int) -> tuple:
+    index = year * 12 + (month - 1) + offset
+    return index // 12, index % 12 + 1
+
+class TrendStore:
+    """
+    Append-only SQLite history of scan finding counts
+
+    Every ingested scan adds one snapshot with its per-severity and per-host
+    finding counts. Reports read the history back with range queries on the
+    (system_id, recorded_at) index instead of re-parsing old scans. The
+    database defaults to reports/finding_trends.db and can be moved with the
+    OSCAL_SAK_TREND_DB environment variable.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = Path(db_path or os.environ.get("OSCAL_SAK_TREND_DB", DEFAULT_TREND_DB))
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path)
+        self._migrate()
+        self._conn.executescript(_SCHEMA)
+        self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _migrate(self) -> None:
+        """Rebuild snapshots of a version 0 database, which were unique on the scan path alone"""
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        exists = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'scan_snapshots'").fetchone()
+        if version >= 1 or not exists:
+            return
+        logging.info(f"Upgrading trend store {self.db_path} to schema version {SCHEMA_VERSION}")
+        # Build the new table and swap it in, so references from the count tables keep pointing at it
+        with self._conn:
+            self._conn.execute(_SNAPSHOTS_TABLE.replace("scan_snapshots", "scan_snapshots_new"))
+            self._conn.execute(
+                "INSERT INTO scan_snapshots_new (id, system_id, scan_source, recorded_at) "
+                "SELECT id, system_id, scan_source, recorded_at FROM scan_snapshots")
+            self._conn.execute("DROP TABLE scan_snapshots")
+            self._conn.execute("ALTER TABLE scan_snapshots_new RENAME TO scan_snapshots")
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "TrendStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def record_snapshot(self, system_id: str, scan_source: str,
+                        severity_counts: Mapping[int, int],
+                        host_counts: Mapping[str, int],
+                        recorded_at: Optional[datetime] = None,
+                        scan_version: str = "") -> bool:
+        """
+        Record the finding counts of an ingested scan
+
+        Args:
+            system_id: System the scan belongs to
+            scan_source: Identifier of the scan, such as its file path
+            severity_counts: Number of findings per Nessus severity
+            host_counts: Number of findings per host
+            recorded_at: Snapshot time (defaults to now)
+            scan_version: Identifies the content at scan_source (see
+                scan_version()), so a file replaced at the same path is
+                recorded again
+
+        Returns:
+            True if a snapshot was added, False if this version of the scan was already recorded
+        """
+        recorded_at = recorded_at or datetime.now()
+        with self._conn:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO scan_snapshots (system_id, scan_source, scan_version, recorded_at) "
+                "VALUES (?, ?, ?, ?)",
+                (system_id, scan_source, scan_version, recorded_at.isoformat()))
+            if cursor.rowcount == 0:
+                logging.debug(f"Scan {scan_source} already recorded for {system_id}")
+                return False
+
+            snapshot_id = cursor.lastrowid
+            self._conn.executemany(
+                "INSERT INTO severity_counts (snapshot_id, severity, count) VALUES (?, ?, ?)",
+                [(snapshot_id, severity, count) for severity, count in severity_counts.items()])
+            self._conn.executemany(
+                "INSERT INTO host_counts (snapshot_id, host, count) VALUES (?, ?, ?)",
+                [(snapshot_id, host, count) for host, count in host_counts.items()])
+
+        logging.info(f"Recorded finding trend snapshot for {system_id} from {scan_source}")
+        return True
+
+    def monthly_trends(self, system_id: str, months: int = 6,
+                       end: Optional[datetime] = None) -> Dict[str, List]:
+        """
+        Finding counts per severity for the last N calendar months
+
+        The latest snapshot of each month is used; months without a snapshot
+        report zero.
+
+        Args:
+            system_id: System to report on
+            months: Number of months, ending with the month of `end`
+            end: Last month to include (defaults to now)
+
+        Returns:
+            Dict with a "months" label list and one count list per severity
+            series plus "total", oldest month first
+        """
+        end = end or datetime.now()
+        start_year, start_month = _shift_month(end.year, end.month, -(months - 1))
+        end_year, end_month = _shift_month(end.year, end.month, 1)
+        keys = [_shift_month(start_year, start_month, i) for i in range(months)]
+
+        snapshots = self._conn.execute(
+            """
+            SELECT id, substr(recorded_at, 1, 7) FROM scan_snapshots
+            WHERE system_id = ? AND recorded_at >= ? AND recorded_at < ?
+            ORDER BY recorded_at
+            """,
+            (system_id, f"{start_year:04d}-{start_month:02d}", f"{end_year:04d}-{end_month:02d}")).fetchall()
+        latest = {month: snapshot_id for snapshot_id, month in snapshots}
+        month_of = {snapshot_id: month for month, snapshot_id in latest.items()}
+
+        counts = {f"{year:04d}-{month:02d}": {} for year, month in keys}
+        if month_of:
+            placeholders = ", ".join("?" * len(month_of))
+            rows = self._conn.execute(
+                f"SELECT snapshot_id, severity, count FROM severity_counts WHERE snapshot_id IN ({placeholders})",
+                list(month_of)).fetchall()
+            for snapshot_id, severity, count in rows:
+                counts[month_of[snapshot_id]][severity] = count
+
+        trends = {"months": [datetime(year, month, 1).strftime("%b") for year, month in keys]}
+        for severity, series in SEVERITY_SERIES.items():
+            trends[series] = [counts[month].get(severity, 0) for month in counts]
+        trends["total"] = [sum(trends[series][i] for series in SEVERITY_SERIES.values())
+                           for i in range(months)]
+        return trends
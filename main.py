@@ -1,34 +1,65 @@
 import argparse
+import contextlib
+import functools
+import importlib
 import logging
-from typing import Dict, Any, Optional, Callable
+import sys
+import time
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Callable, Union
 from core import core_functionality
-from commands import (
-    roles, 
-    components, 
-    poams, 
-    activities, 
-    portscheck, 
-    implemented_controls, 
-    security_levels, 
-    user_privileges, 
-    generate_poam,
-    visualize_components,
-    monthly_report
-)
+
+# Scan and batch modules are imported where they are used so that commands
+# which never touch a scan start as fast as possible
+if TYPE_CHECKING:
+    from core.batch import BatchResult
+    from core.scan_reader import ScanResults, ScanSource
+    from core.server import DocumentCache
 
 class CommandRegistry:
-    """Registry for command functions with validation"""
+    """
+    Registry for command functions with validation
+    
+    Commands can be registered by "module:function" path instead of by
+    function, in which case the module is only imported when the command is
+    dispatched. A run of one command then does not pay for importing every
+    other command's dependencies.
+    """
     
     def __init__(self):
-        self._commands: Dict[str, tuple[Callable, Optional[Callable]]] = {}
+        self._commands: Dict[str, tuple[Union[Callable, str], Optional[Callable]]] = {}
+        self._paths: Dict[str, Optional[List[str]]] = {}
         
-    def register(self, name: str, func: Callable, validator: Optional[Callable] = None) -> None:
-        """Register a command function with optional validator"""
+    def register(self, name: str, func: Union[Callable, str], validator: Optional[Callable] = None,
+                 paths: Optional[List[str]] = None) -> None:
+        """
+        Register a command function with optional validator
+        
+        func is the command function or its "module:function" path. paths
+        lists the dotted OSCAL paths the command reads; when given, only
+        those subtrees of the document are loaded for it.
+        """
         self._commands[name] = (func, validator)
+        self._paths[name] = paths
         
     def get_command(self, name: str) -> Optional[tuple[Callable, Optional[Callable]]]:
-        """Get registered command and validator by name"""
-        return self._commands.get(name)
+        """Get registered command and validator by name, importing the command if needed"""
+        entry = self._commands.get(name)
+        if entry is None:
+            return None
+        func, validator = entry
+        if isinstance(func, str):
+            module_name, _, attr = func.partition(":")
+            func = getattr(importlib.import_module(module_name), attr)
+            self._commands[name] = (func, validator)
+        return func, validator
+        
+    def has_command(self, name: str) -> bool:
+        """Check whether a command is registered without importing it"""
+        return name in self._commands
+        
+    def get_paths(self, name: str) -> Optional[List[str]]:
+        """Get the OSCAL paths a command reads, or None if it needs the whole document"""
+        return self._paths.get(name)
         
     def list_commands(self) -> list:
         """List all registered command names"""
@@ -59,21 +90,66 @@ def setup_registry():
     """Set up command registry with commands"""
     registry = CommandRegistry()
     
-    registry.register("monthly-report", monthly_report.generate_monthly_report, validate_poam)
-    registry.register("visualize-components", visualize_components.visualize_components, validate_ssp)    
-    registry.register("roles", roles.list_roles, validate_ssp)
-    registry.register("components", components.list_components, validate_ssp)
-    registry.register("poams", poams.list_poams, validate_poam)
-    registry.register("activities", activities.list_activities, validate_sap)
-    registry.register("security-levels", security_levels.analyze_security_levels, validate_ssp_metadata)
-    registry.register("user-privileges", user_privileges.analyze_user_privileges, validate_ssp_metadata)
-    registry.register("implemented-controls", implemented_controls.analyze_implemented_controls, validate_ssp)
-    registry.register("generate-poam", generate_poam.generate_poam, validate_poam_generator)        
-    # Register portscheck without OSCAL validation
-    registry.register("portscheck", lambda x: portscheck.portscheck(x))
+    registry.register("monthly-report", "commands.monthly_report:generate_monthly_report", validate_poam,
+                      paths=["plan-of-action-and-milestones.metadata",
+                             "plan-of-action-and-milestones.system-id",
+                             "plan-of-action-and-milestones.poam-items",
+                             "plan-of-action-and-milestones.risks"])
+    registry.register("visualize-components", "commands.visualize_components:visualize_components", validate_ssp,
+                      paths=["system-security-plan.metadata",
+                             "system-security-plan.system-implementation",
+                             "system-security-plan.control-implementation"])
+    registry.register("roles", "commands.roles:list_roles", validate_ssp,
+                      paths=["system-security-plan.metadata.roles"])
+    registry.register("components", "commands.components:list_components", validate_ssp,
+                      paths=["system-security-plan.system-implementation.inventory-items"])
+    registry.register("poams", "commands.poams:list_poams", validate_poam,
+                      paths=["plan-of-action-and-milestones.poam-items"])
+    registry.register("activities", "commands.activities:list_activities", validate_sap,
+                      paths=["assessment-plan.metadata.roles",
+                             "assessment-plan.local-definitions.activities"])
+    registry.register("security-levels", "commands.security_levels:analyze_security_levels", validate_ssp_metadata,
+                      paths=["system-security-plan.metadata.title",
+                             "system-security-plan.system-characteristics"])
+    registry.register("user-privileges", "commands.user_privileges:analyze_user_privileges", validate_ssp_metadata,
+                      paths=["system-security-plan.metadata.roles",
+                             "system-security-plan.system-implementation.users"])
+    registry.register("implemented-controls", "commands.implemented_controls:analyze_implemented_controls", validate_ssp,
+                      paths=["system-security-plan.system-implementation.components",
+                             "system-security-plan.control-implementation"])
+    registry.register("control-coverage", "commands.control_coverage:analyze_control_coverage", validate_ssp,
+                      paths=["system-security-plan.system-implementation.components",
+                             "system-security-plan.control-implementation"])
+    registry.register("generate-poam", "commands.generate_poam:generate_poam", validate_poam_generator)        
+    # Register the commands that read a scan instead of an OSCAL document without validation
+    registry.register("portscheck", "commands.portscheck:portscheck")
+    registry.register("export-findings", "commands.export_findings:export_findings")
     
     return registry
 
+# Commands that read a scan file, and the name of the pipeline command
+SCAN_COMMANDS = ["generate-poam", "monthly-report"]
+# Commands whose input is the scan itself rather than an OSCAL document
+SCAN_INPUT_COMMANDS = ["portscheck", "export-findings"]
+PIPELINE_COMMAND = "run"
+
+# Command-line options passed through to the commands that accept them. artifact_dir
+# is set by batch runs so that the files each document's command writes stay apart.
+SCAN_FILTER_OPTIONS = ["min_severity", "hosts", "plugin_families", "ports"]
+COMMAND_OPTIONS = {
+    "control-coverage": ["family", "component", "param", "missing_statements", "output_format"],
+    "visualize-components": ["graph_format", "aggregate", "page_size", "artifact_dir"],
+    "generate-poam": ["delta", "document_path", "compact", "gzip", "group_by_plugin", "artifact_dir"],
+    "monthly-report": ["artifact_dir"],
+    "export-findings": ["output_format", "output", "batch_size", "artifact_dir"] + SCAN_FILTER_OPTIONS,
+    "portscheck": SCAN_FILTER_OPTIONS,
+}
+
+def command_kwargs(name: str, options: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Options a command accepts; options that were not given fall back to the command's defaults"""
+    return {key: options[key] for key in COMMAND_OPTIONS.get(name, [])
+            if options and options.get(key) is not None}
+
 def execute_command(func: Callable, validator: Optional[Callable], oscal_file: Dict[str, Any], **kwargs) -> None:
     """Execute a command with validation"""
     if validator and not validator(oscal_file):
@@ -81,6 +157,241 @@ def execute_command(func: Callable, validator: Optional[Callable], oscal_file: D
         return
     func(oscal_file, **kwargs)
 
+def dispatch_command(name: str, func: Callable, validator: Optional[Callable],
+                     oscal_file: Dict[str, Any], scan: Optional["ScanSource"] = None,
+                     options: Optional[Dict[str, Any]] = None) -> None:
+    """Execute an OSCAL command, passing the scan and options to the commands that take them"""
+    kwargs = command_kwargs(name, options)
+    if name == "generate-poam":
+        execute_command(func, validator, oscal_file, scan_file_path=scan, **kwargs)
+    elif name == "monthly-report":
+        func(oscal_file, scan, **kwargs)
+    else:
+        execute_command(func, validator, oscal_file, **kwargs)
+
+def pipeline_paths(registry: CommandRegistry, steps: list) -> Optional[List[str]]:
+    """Union of the OSCAL paths read by the pipeline steps, or None if any step needs the whole document"""
+    paths = []
+    for step in steps:
+        if step in SCAN_INPUT_COMMANDS:
+            continue
+        step_paths = registry.get_paths(step)
+        if step_paths is None:
+            return None
+        paths.extend(step_paths)
+    return paths
+
+def open_scans(specs: List[str], workers: Optional[int] = None, use_cache: bool = True) -> "ScanSource":
+    """Resolve scan arguments into a scan source (see core.scan_ingest.open_scans)"""
+    from core import scan_ingest
+    
+    return scan_ingest.open_scans(specs, workers, use_cache)
+
+def run_pipeline(registry: CommandRegistry, steps: list, file_path: str, scan_path: Optional["ScanSource"],
+                 options: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Run several commands back to back against a single load of the inputs
+
+    The OSCAL file and the scan are each parsed once and the resulting
+    in-memory models are handed to every step in order.
+
+    Args:
+        registry: Command registry to resolve steps from
+        steps: Command names to run, in order
+        file_path: Path to the OSCAL JSON file
+        scan_path: Scan file, or reader for it, shared by the scan commands
+        options: Command-line options for the steps that take them
+    """
+    from core.scan_reader import load_scan
+    
+    scan = load_scan(scan_path) if scan_path else None
+    oscal_file = None
+    
+    for step in steps:
+        command_func, validator = registry.get_command(step)
+        print(f"\n=== {step} ===")
+        
+        if step in SCAN_INPUT_COMMANDS:
+            command_func(scan, **command_kwargs(step, options))
+            continue
+            
+        if oscal_file is None:
+            oscal_file = core_functionality.load_file(file_path, pipeline_paths(registry, steps))
+        dispatch_command(step, command_func, validator, oscal_file, scan, options)
+
+def load_scan_specs(specs: List[str], workers: Optional[int] = None, use_cache: bool = True) -> "ScanResults":
+    """Parse scan arguments fully into memory so they can be shared between jobs"""
+    from core.scan_reader import load_scan
+    
+    return load_scan(open_scans(specs, workers, use_cache))
+
+def run_step(registry: CommandRegistry, step: str, options: Optional[Dict[str, Any]],
+             oscal_file: Optional[Dict[str, Any]], scan: Optional["ScanSource"] = None) -> None:
+    """Run one command as a job, raising instead of printing when the document is the wrong type"""
+    command_func, validator = registry.get_command(step)
+    if step in SCAN_INPUT_COMMANDS:
+        command_func(scan, **command_kwargs(step, options))
+        return
+    if validator and not validator(oscal_file):
+        raise core_functionality.ValidationError("Command is not valid for this OSCAL file type")
+    dispatch_command(step, command_func, validator, oscal_file, scan, options)
+
+def run_portfolio(registry: CommandRegistry, steps: list, documents: List[str], scan_specs: Optional[List[str]],
+                  output_dir: str, workers: Optional[int] = None, concurrency: Optional[int] = None,
+                  use_cache: bool = True, options: Optional[Dict[str, Any]] = None) -> List["BatchResult"]:
+    """
+    Run several commands over many documents as one concurrent job graph
+
+    Every document is loaded once in a thread, the scan is parsed once in a
+    worker process, and each step starts as soon as the document and scan it
+    needs are ready. Steps run in worker processes too, so CPU-bound
+    commands do not contend for the GIL and commands that keep global state
+    (matplotlib's pyplot in visualize-components) never share a process
+    with another running step. Each document's output is written to its own file in
+    step order, as the run command would print it.
+
+    Args:
+        registry: Command registry to resolve steps from
+        steps: Command names to run against every document
+        documents: OSCAL documents to process
+        scan_specs: Scan arguments shared by the scan commands, if any
+        output_dir: Directory for per-document output and summary.json
+        workers: Number of worker processes for parsing scans and running steps
+        concurrency: Maximum number of jobs running at once
+        use_cache: Reuse and populate the parsed-scan cache
+        options: Command-line options for the steps that take them
+
+    Returns:
+        One BatchResult per document, in input order
+    """
+    from pathlib import Path
+    from core.batch import BatchResult, output_paths, write_summary
+    from core.executor import JobGraph, PROCESS
+    
+    out_dir = Path(output_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    outputs = output_paths(documents, out_dir, PIPELINE_COMMAND)
+    
+    # Files written by a step go to <output-dir>/<document output name>/, or
+    # <output-dir>/<step>/ for the steps that run once against the scan
+    graph = JobGraph()
+    scan_deps = []
+    if scan_specs:
+        graph.add("scan", load_scan_specs, scan_specs, workers, use_cache, pool=PROCESS)
+        scan_deps = ["scan"]
+    for step in steps:
+        if step in SCAN_INPUT_COMMANDS:
+            graph.add(step, run_step, registry, step, {**(options or {}), "artifact_dir": str(out_dir / step)},
+                      None, deps=scan_deps, pool=PROCESS)
+        
+    paths = pipeline_paths(registry, steps)
+    for document, output in zip(documents, outputs):
+        graph.add(f"load {document}", core_functionality.load_file, document, paths)
+        for step in steps:
+            if step not in SCAN_INPUT_COMMANDS:
+                deps = scan_deps if step in SCAN_COMMANDS else []
+                step_options = {**(options or {}), "document_path": document,
+                                "artifact_dir": str(output.with_suffix(""))}
+                graph.add(f"{step} {document}", run_step, registry, step, step_options,
+                          deps=[f"load {document}"] + deps, pool=PROCESS)
+                
+    jobs = graph.run(concurrency, workers)
+    
+    results = []
+    for document, output in zip(documents, outputs):
+        names = [f"load {document}"] + [step if step in SCAN_INPUT_COMMANDS else f"{step} {document}" for step in steps]
+        failed = [jobs[name] for name in names if jobs[name].status != "ok"]
+        with open(output, "w") as f:
+            for step, name in zip(steps, names[1:]):
+                job = jobs[name]
+                f.write(f"\n=== {step} ===\n{job.output}")
+                if job.status != "ok":
+                    f.write(f"Error: {job.error}\n")
+        results.append(BatchResult(document=document, output=str(output),
+                                   status="error" if failed else "ok",
+                                   seconds=sum(jobs[name].seconds for name in names),
+                                   error=f"{failed[0].name}: {failed[0].error}" if failed else ""))
+        
+    for job in jobs.values():
+        status = f"{job.seconds:.2f}s" if job.status == "ok" else f"{job.status.upper()} {job.error}"
+        logging.info(f"Job {job.name}: {status}")
+    write_summary(results, out_dir, f"{PIPELINE_COMMAND} {' '.join(steps)}")
+    return results
+
+def run_batch_document(command: str, scan_specs: Optional[List[str]], use_cache: bool,
+                       options: Optional[Dict[str, Any]], document: str, output_path: str) -> None:
+    """
+    Run one command against one batch document, writing its console output to output_path
+
+    Files the command writes go to a directory named after output_path
+    (batch_output/ssp.generate-poam/ for batch_output/ssp.generate-poam.txt),
+    so documents never overwrite each other's results.
+    """
+    from pathlib import Path
+    
+    registry = setup_registry()
+    command_func, validator = registry.get_command(command)
+    options = {**(options or {}), "artifact_dir": str(Path(output_path).with_suffix(""))}
+    
+    with open(output_path, "w") as output, contextlib.redirect_stdout(output):
+        if command in SCAN_INPUT_COMMANDS:
+            command_func(open_scans([document], use_cache=use_cache), **command_kwargs(command, options))
+            return
+            
+        oscal_file = core_functionality.load_file(document, registry.get_paths(command))
+        if validator and not validator(oscal_file):
+            raise core_functionality.ValidationError("Command is not valid for this OSCAL file type")
+        scan = open_scans(scan_specs, use_cache=use_cache) if scan_specs else None
+        dispatch_command(command, command_func, validator, oscal_file, scan,
+                         {**options, "document_path": document})
+
+def run_server_request(registry: CommandRegistry, documents: "DocumentCache", request: Dict[str, Any]) -> None:
+    """
+    Run one server request against documents held in memory
+
+    Requests carry the same fields as the command line: file_path, command,
+    steps for the run command, scan, workers, no_cache and the command
+    options. Documents and scans come from the server's cache and are only
+    re-read when their files change.
+    """
+    command = request.get("command")
+    steps = request.get("steps") or []
+    names = steps if command == PIPELINE_COMMAND else [command]
+    unknown = [name for name in names if not registry.has_command(name)]
+    if not names or unknown:
+        raise core_functionality.ValidationError(f"Unknown command: {', '.join(map(str, unknown or [command]))}")
+        
+    scan_specs = request.get("scan")
+    workers = request.get("workers")
+    use_cache = not request.get("no_cache", False)
+    
+    for name in names:
+        command_func, validator = registry.get_command(name)
+        if command == PIPELINE_COMMAND:
+            print(f"\n=== {name} ===")
+            
+        if name in SCAN_INPUT_COMMANDS:
+            specs = scan_specs if command == PIPELINE_COMMAND else [request["file_path"]]
+            if not specs:
+                raise core_functionality.ValidationError(f"The {name} step requires --scan argument")
+            command_func(documents.scan(specs, workers, use_cache), **command_kwargs(name, request.get("options")))
+            continue
+            
+        if name in SCAN_COMMANDS and not scan_specs:
+            raise core_functionality.ValidationError(f"The {name} command requires --scan argument")
+        oscal_file = documents.document(request["file_path"])
+        scan = documents.scan(scan_specs, workers, use_cache) if scan_specs else None
+        dispatch_command(name, command_func, validator, oscal_file, scan, request.get("options"))
+
+def print_batch_results(results: List["BatchResult"], output_dir: str) -> None:
+    """Print the outcome of each document of a batch and the totals"""
+    for result in results:
+        status = f"{result.seconds:.2f}s" if result.status == "ok" else f"FAILED {result.error}"
+        print(f"{result.document}: {status}")
+    failed = sum(1 for result in results if result.status != "ok")
+    print(f"Batch complete: {len(results) - failed} succeeded, {failed} failed. "
+          f"Summary written to {output_dir}/summary.json")
+
 def main():
     # Set up logging
     logging.basicConfig(level=logging.INFO)
@@ -90,20 +401,141 @@ def main():
     
     # Parse arguments
     parser = argparse.ArgumentParser(description="OSCAL Swiss Army Knife")
-    parser.add_argument("file_path", help="Path to the input file (OSCAL JSON or scan XML)")
-    parser.add_argument("command", choices=registry.list_commands(),
+    parser.add_argument("file_path", nargs="?", help="Path to the input file (OSCAL JSON or scan XML)")
+    parser.add_argument("command", nargs="?", choices=registry.list_commands() + [PIPELINE_COMMAND],
                        help="Command to execute")
+    parser.add_argument("steps", nargs="*",
+                       help=f"Commands to run in order (only used with the {PIPELINE_COMMAND} command)")
     parser.add_argument("--debug", action="store_true", 
                        help="Enable debug logging")
-    parser.add_argument("--scan", required=False,
-                    help="Path to scan file (required for generate-poam and monthly-report commands)")
+    parser.add_argument("--no-cache", action="store_true",
+                       help="Parse scan files directly instead of using the parsed-scan cache")
+    parser.add_argument("--scan", required=False, nargs="+",
+                    help="Scan files, globs or directories (required for generate-poam and monthly-report "
+                         "commands, and for portscheck and export-findings when run as a pipeline step)")
+    parser.add_argument("--workers", type=int, default=None,
+                       help="Number of worker processes used to parse multiple scan files or run a batch")
+    parser.add_argument("--concurrency", type=int, default=None,
+                       help="Maximum number of jobs running at once when the run command is used with --batch")
+    parser.add_argument("--batch", action="store_true",
+                       help="Treat file_path as a directory or manifest of documents and run the command on each")
+    parser.add_argument("--output-dir", default="batch_output",
+                       help="Directory for per-document output and summary.json in batch mode")
+    parser.add_argument("--family", help="control-coverage: only controls in this family (e.g. ac)")
+    parser.add_argument("--component", help="control-coverage: only controls implemented by this component (uuid or title)")
+    parser.add_argument("--param", help="control-coverage: only controls using this parameter value (value or param-id=value)")
+    parser.add_argument("--missing-statements", action="store_true",
+                       help="control-coverage: only controls without implementation statements")
+    parser.add_argument("--format", dest="output_format", choices=["text", "json", "csv", "parquet", "arrow"],
+                       help="control-coverage: text (default), json or csv; "
+                            "export-findings: csv (default), parquet or arrow")
+    parser.add_argument("--output", help="export-findings: output file (defaults to a timestamped file in docs/)")
+    parser.add_argument("--batch-size", type=int, default=None,
+                       help="export-findings: rows converted and written at a time")
+    parser.add_argument("--min-severity", type=int, choices=range(5), default=None,
+                       help="portscheck, export-findings: only findings of at least this severity (0-4)")
+    parser.add_argument("--hosts", nargs="+", default=None,
+                       help="portscheck, export-findings: only these host names, IP addresses or CIDR networks")
+    parser.add_argument("--plugin-families", nargs="+", default=None,
+                       help="portscheck, export-findings: only findings from these plugin families")
+    parser.add_argument("--ports", default=None,
+                       help="portscheck, export-findings: only findings on these ports, e.g. 22,80-443")
+    parser.add_argument("--graph-format", choices=["png", "graphml", "dot", "json"], default="png",
+                       help="visualize-components: render a PNG or write the graph data in this format")
+    parser.add_argument("--aggregate", action="store_true",
+                       help="visualize-components: collapse the graph to one node per component type")
+    parser.add_argument("--page-size", type=int, default=None,
+                       help="visualize-components: split inventory items of the HTML report into pages of this size")
+    parser.add_argument("--delta", choices=["apply", "patch"],
+                       help="generate-poam: only apply what changed since the previous scan, updating the "
+                            "POA&M file in place or writing a patch file")
+    parser.add_argument("--compact", action="store_true",
+                       help="generate-poam: write JSON without indentation")
+    parser.add_argument("--gzip", action="store_true",
+                       help="generate-poam: gzip the generated POA&M or patch file")
+    parser.add_argument("--group-by-plugin", action="store_true",
+                       help="generate-poam: open one POA&M item per plugin listing its hosts")
+    parser.add_argument("--serve", metavar="SOCKET",
+                       help="Run as a server on this Unix socket, keeping loaded documents in memory")
+    parser.add_argument("--connect", metavar="SOCKET",
+                       help="Send the command to a server started with --serve instead of running it here")
+    parser.add_argument("--stop", action="store_true",
+                       help="With --connect, shut the server down")
     
     args = parser.parse_args()
     
     if args.debug:
         logging.getLogger().setLevel(logging.DEBUG)
     
+    options = {key: getattr(args, key, None) for keys in COMMAND_OPTIONS.values() for key in keys}
+    options["document_path"] = args.file_path
+    
+    if args.serve:
+        from core.server import serve
+        serve(args.serve, functools.partial(run_server_request, registry))
+        return
+    if args.connect and args.stop:
+        args.command = "shutdown"
+    elif not args.file_path or not args.command:
+        parser.error("the following arguments are required: file_path, command")
+        
     try:
+        # Hand the command to a running server
+        if args.connect:
+            from core.server import send_request
+            response = send_request(args.connect, {
+                "file_path": args.file_path,
+                "command": args.command,
+                "steps": args.steps,
+                "scan": args.scan,
+                "workers": args.workers,
+                "no_cache": args.no_cache,
+                "options": options,
+            })
+            print(response["output"], end="")
+            if response["status"] != "ok":
+                print(f"Error: {response['error']}")
+                sys.exit(1)
+            return
+            
+        # Run several commands against one parse of the inputs
+        if args.command == PIPELINE_COMMAND:
+            unknown = [step for step in args.steps if not registry.has_command(step)]
+            if not args.steps or unknown:
+                parser.error(f"The {PIPELINE_COMMAND} command requires one or more of: "
+                             f"{', '.join(registry.list_commands())}")
+            if not args.scan and any(step in SCAN_COMMANDS + SCAN_INPUT_COMMANDS for step in args.steps):
+                parser.error(f"The {PIPELINE_COMMAND} command requires --scan argument for scan commands")
+            if args.batch:
+                from core.batch import expand_batch_inputs
+                
+                start = time.perf_counter()
+                results = run_portfolio(registry, args.steps, expand_batch_inputs(args.file_path), args.scan,
+                                        args.output_dir, args.workers, args.concurrency, not args.no_cache,
+                                        options)
+                print_batch_results(results, args.output_dir)
+                print(f"Wall time: {time.perf_counter() - start:.2f}s")
+                return
+            scan = open_scans(args.scan, args.workers, not args.no_cache) if args.scan else None
+            run_pipeline(registry, args.steps, args.file_path, scan, options)
+            return
+        elif args.steps:
+            parser.error(f"Extra arguments are only accepted by the {PIPELINE_COMMAND} command")
+            
+        # Run the command over a directory or manifest of documents
+        if args.batch:
+            if args.command in SCAN_COMMANDS and not args.scan:
+                parser.error(f"The {args.command} command requires --scan argument")
+            from core.batch import expand_batch_inputs, run_batch
+            from core.scan_ingest import SCAN_EXTENSIONS
+            
+            extensions = SCAN_EXTENSIONS if args.command in SCAN_INPUT_COMMANDS else (".json",)
+            documents = expand_batch_inputs(args.file_path, extensions)
+            task = functools.partial(run_batch_document, args.command, args.scan, not args.no_cache, options)
+            results = run_batch(task, documents, args.output_dir, args.command, args.workers)
+            print_batch_results(results, args.output_dir)
+            return
+            
         # Get command details
         command_result = registry.get_command(args.command)
         if not command_result:
@@ -112,25 +544,22 @@ def main():
         
         command_func, validator = command_result
         
-        # Handle portscheck command separately
-        if args.command == "portscheck":
-            command_func(args.file_path)
+        # Handle the commands that read the scan itself separately
+        if args.command in SCAN_INPUT_COMMANDS:
+            command_func(open_scans([args.file_path], args.workers, not args.no_cache),
+                         **command_kwargs(args.command, options))
             return
             
         # Validate scan file argument for commands that require it
-        if args.command in ["generate-poam", "monthly-report"] and not args.scan:
+        if args.command in SCAN_COMMANDS and not args.scan:
             parser.error(f"The {args.command} command requires --scan argument")
         
         # Load the OSCAL file
-        oscal_file = core_functionality.load_file(args.file_path)
+        oscal_file = core_functionality.load_file(args.file_path, registry.get_paths(args.command))
             
         # Execute command with appropriate arguments
-        if args.command == "generate-poam":
-            execute_command(command_func, validator, oscal_file, scan_file_path=args.scan)
-        elif args.command == "monthly-report":
-            command_func(oscal_file, args.scan)
-        else:
-            execute_command(command_func, validator, oscal_file)
+        scan = open_scans(args.scan, args.workers, not args.no_cache) if args.scan else None
+        dispatch_command(args.command, command_func, validator, oscal_file, scan, options)
             
     except Exception as e:
         logging.error(f"Error processing command: {str(e)}")
@@ -0,0 +1,110 @@
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+import main
+from commands.generate_poam import generate_poam
+from commands.portscheck import portscheck
+from core.server import serve
+
+SSP_TEMPLATE = str(Path(__file__).resolve().parent.parent / "docs" / "templates" / "ifa_ssp_example.json")
+
+def write_scan(path, items):
+    hosts = {}
+    for plugin_id, host in items:
+        hosts.setdefault(host, []).append(
+            f'<ReportItem port="443" severity="3" pluginID="{plugin_id}" pluginName="Plugin {plugin_id}" '
+            f'pluginFamily="Misc."><description>Description</description></ReportItem>')
+    path.write_text('<?xml version="1.0"?><NessusClientData_v2><Report name="test">'
+                    + "".join(f'<ReportHost name="{host}">{"".join(report_items)}</ReportHost>'
+                              for host, report_items in hosts.items())
+                    + "</Report></NessusClientData_v2>")
+    return str(path)
+
+def write_poam(path, items):
+    poam = {"plan-of-action-and-milestones": {
+        "uuid": "poam-1",
+        "metadata": {"title": "POA&M", "last-modified": "2024-01-01T00:00:00"},
+        "poam-items": items,
+    }}
+    path.write_text(json.dumps(poam))
+    return poam
+
+def test_generate_poam_patch_runs_stay_incremental(tmp_path, capsys):
+    poam_path = tmp_path / "poam.json"
+    poam = write_poam(poam_path, [{"uuid": "a", "related-findings": {"plugin_id": "1", "host": "web01"}}])
+    artifacts = tmp_path / "out"
+
+    generate_poam(poam, write_scan(tmp_path / "1.nessus", [("1", "web01"), ("2", "web01")]), "patch",
+                  str(poam_path), artifact_dir=str(artifacts))
+    assert "(full)" in capsys.readouterr().out
+    fingerprint = json.loads((tmp_path / "poam.fingerprint.json").read_text())
+    assert fingerprint["last-modified"] == "2024-01-01T00:00:00"
+
+    generate_poam(poam, write_scan(tmp_path / "2.nessus", [("2", "web01"), ("3", "db01")]), "patch",
+                  str(poam_path), artifact_dir=str(artifacts))
+    assert "Opened: 1, Closed: 1 (incremental)" in capsys.readouterr().out
+    assert json.loads(poam_path.read_text()) == poam
+
+def test_generate_poam_apply_updates_file_and_fingerprint(tmp_path, capsys):
+    poam_path = tmp_path / "poam.json"
+    poam = write_poam(poam_path, [{"uuid": "a", "related-findings": {"plugin_id": "1", "host": "web01"}}])
+
+    generate_poam(poam, write_scan(tmp_path / "1.nessus", [("2", "web01")]), "apply", str(poam_path))
+    updated = json.loads(poam_path.read_text())
+    plan = updated["plan-of-action-and-milestones"]
+    assert [(item["uuid"], item.get("status")) for item in plan["poam-items"]][0] == ("a", "completed")
+    assert plan["poam-items"][1]["related-findings"]["plugin_id"] == "2"
+    fingerprint = json.loads((tmp_path / "poam.fingerprint.json").read_text())
+    assert fingerprint["last-modified"] == plan["metadata"]["last-modified"]
+
+    generate_poam(updated, write_scan(tmp_path / "2.nessus", [("2", "web01")]), "apply", str(poam_path))
+    assert "is up to date" in capsys.readouterr().out
+
+def test_portscheck_labels_severities_like_monthly_report(tmp_path, capsys):
+    path = tmp_path / "scan.nessus"
+    items = "".join(f'<ReportItem port="443" protocol="tcp" severity="{severity}" pluginID="{severity}" '
+                    f'pluginName="{name} bug" pluginFamily="Misc."/>' for severity, name in ((4, "Critical"), (3, "High")))
+    path.write_text('<?xml version="1.0"?><NessusClientData_v2><Report name="test">'
+                    f'<ReportHost name="web01">{items}</ReportHost></Report></NessusClientData_v2>')
+    portscheck(str(path))
+    output = capsys.readouterr().out
+    assert "Finding: Critical bug (Severity: Critical)" in output
+    assert "Finding: High bug (Severity: High)" in output
+    assert "Critical Severity Findings:\n  Total Findings: 1" in output
+
+def run_main(monkeypatch, *argv):
+    monkeypatch.setattr(sys, "argv", ["main.py", *argv])
+    main.main()
+
+def test_server_round_trip_from_the_command_line(tmp_path, monkeypatch, capsys):
+    socket_path = str(tmp_path / "server.sock")
+    server = threading.Thread(target=serve, args=(socket_path, functools.partial(main.run_server_request,
+                                                                                  main.setup_registry())))
+    server.start()
+    try:
+        for _ in range(100):
+            if os.path.exists(socket_path):
+                break
+            time.sleep(0.05)
+        run_main(monkeypatch, SSP_TEMPLATE, "roles", "--connect", socket_path)
+        first = capsys.readouterr().out
+        assert "The System Owner is:" in first
+        run_main(monkeypatch, SSP_TEMPLATE, "roles", "--connect", socket_path)
+        assert capsys.readouterr().out == first
+
+        with pytest.raises(SystemExit):
+            run_main(monkeypatch, str(tmp_path / "missing.json"), "roles", "--connect", socket_path)
+        assert capsys.readouterr().out.startswith("Error: ")
+    finally:
+        run_main(monkeypatch, "--connect", socket_path, "--stop")
+        server.join(timeout=10)
+    assert "Server shutting down" in capsys.readouterr().out
+    assert not server.is_alive()
+    assert not os.path.exists(socket_path)
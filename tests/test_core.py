@@ -0,0 +1,693 @@
+import gzip
+import io
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from benchmarks.synthetic import generate_ssp
+from core import findings_export, scan_reader, serialization
+from core.control_coverage import ControlCoverage, control_family
+from core.document_index import DocumentIndex
+from core.executor import PROCESS, JobGraph
+from core.lazy_loader import build_path_tree, load_paths
+from core.poam_delta import (PoamDelta, compute_delta, current_findings, fingerprint_path, iter_delta_items,
+                             load_fingerprint, save_fingerprint)
+from core.poam_reconciler import PoamReconciler, add_group_host, create_poam_group, item_key
+from core.scan_cache import CachedScanReader, ScanCache
+from core.scan_filter import ScanFilter
+from core.scan_ingest import expand_scan_paths, load_scans
+from core.scan_reader import (NessusScanReader, PluginTable, ScanFinding, _filter_host_block,
+                              _filtered_chunks)
+from core.server import CommandServer, DocumentCache, connect, send_request
+from core.trend_store import SEVERITY_LEVELS, TrendStore, scan_version
+
+WEB_HOST = (b'<ReportHost name="web01"><HostProperties>'
+            b'<tag name="host-ip">10.0.0.5</tag></HostProperties>'
+            b'<ReportItem port="443" severity="3" pluginID="1" pluginName="A &gt; B" pluginFamily="Web Servers">'
+            b'<solution>Upgrade</solution></ReportItem>'
+            b"<ReportItem port='0' severity='0' pluginID='2' pluginName='Ping' pluginFamily='General'/>"
+            b'<ReportItem port="22" severity="2" pluginID="3" pluginName="SSH" pluginFamily="Misc."></ReportItem>'
+            b'</ReportHost>')
+DB_HOST = (b'<ReportHost name="db01"><HostProperties>'
+           b'<tag name="host-ip">10.0.1.9</tag></HostProperties>'
+           b'<ReportItem port="5432" severity="4" pluginID="4" pluginName="PG" pluginFamily="Databases"/>'
+           b'</ReportHost>')
+SCAN = (b'<?xml version="1.0"?><NessusClientData_v2><Report name="test">'
+        + WEB_HOST + DB_HOST + b'</Report></NessusClientData_v2>')
+
+def plugin_ids(block: bytes):
+    return [int(value) for value in re.findall(rb"""pluginID=["'](\d+)""", block)]
+
+def test_filter_host_block_drops_rejected_items():
+    scan_filter = ScanFilter(min_severity=2)
+    assert plugin_ids(_filter_host_block(WEB_HOST, scan_filter)) == [1, 3]
+
+def test_filter_host_block_reads_single_quoted_self_closing_items():
+    scan_filter = ScanFilter(plugin_families=frozenset({"general"}))
+    assert plugin_ids(_filter_host_block(WEB_HOST, scan_filter)) == [2]
+
+def test_filter_host_block_rejects_host():
+    assert _filter_host_block(WEB_HOST, ScanFilter(names=frozenset({"db01"}))) == b""
+    assert _filter_host_block(WEB_HOST, ScanFilter.from_options(hosts=["10.0.0.0/24"])) == WEB_HOST
+
+def test_filter_host_block_skips_gt_inside_attribute():
+    item = (b'<ReportHost name="web01"><ReportItem port="80" severity="2" pluginID="9" '
+            b'pluginName="A > B" pluginFamily="Web Servers"></ReportItem></ReportHost>')
+    scan_filter = ScanFilter.from_options(plugin_families=["web servers"])
+    assert _filter_host_block(item, scan_filter) == item
+
+@pytest.mark.parametrize("read_size", [7, 64, 1 << 20])
+def test_filtered_chunks_with_tags_split_across_reads(monkeypatch, read_size):
+    monkeypatch.setattr(scan_reader, "READ_SIZE", read_size)
+    scan_filter = ScanFilter.from_options(min_severity=3)
+    data = b"".join(_filtered_chunks(io.BytesIO(SCAN), scan_filter))
+    assert plugin_ids(data) == [1, 4]
+    assert data.startswith(b'<?xml version="1.0"?><NessusClientData_v2>')
+    assert data.endswith(b"</Report></NessusClientData_v2>")
+
+def test_filtered_chunks_drops_rejected_host(monkeypatch):
+    monkeypatch.setattr(scan_reader, "READ_SIZE", 16)
+    data = b"".join(_filtered_chunks(io.BytesIO(SCAN), ScanFilter.from_options(hosts=["db01"])))
+    assert b"web01" not in data
+    assert data == SCAN.replace(WEB_HOST, b"")
+
+def test_filtered_reader_matches_filtering_parsed_hosts(tmp_path):
+    path = tmp_path / "scan.nessus"
+    path.write_bytes(SCAN)
+    scan_filter = ScanFilter.from_options(min_severity=2, ports="400-6000")
+    hosts = list(NessusScanReader(str(path), scan_filter))
+    assert [(host.name, [finding.plugin_id for finding in host.findings]) for host in hosts] == \
+        [("web01", ["1"]), ("db01", ["4"])]
+    assert hosts[0].findings[0].plugin_name == "A > B"
+
+def test_filtered_read_fills_scan_cache(tmp_path):
+    path = tmp_path / "scan.nessus"
+    path.write_bytes(SCAN)
+    cache = ScanCache(str(tmp_path / "cache"))
+    hosts = list(CachedScanReader(str(path), cache, ScanFilter.from_options(hosts=["web01"])))
+    assert [host.name for host in hosts] == ["web01"]
+    assert cache.path_for(str(path)).exists()
+
+    replayed = list(CachedScanReader(str(path), cache, ScanFilter.from_options(min_severity=4)))
+    assert [(host.name, len(host.findings)) for host in replayed] == [("web01", 0), ("db01", 1)]
+    assert len(list(CachedScanReader(str(path), cache))) == 2
+
+PLUGINS = PluginTable()
+
+def finding(plugin_id: str, host: str, severity: int = 3) -> ScanFinding:
+    return ScanFinding(host, "443", "tcp", severity,
+                       PLUGINS.get(plugin_id, f"Plugin {plugin_id}", "Misc.", f"Title {plugin_id}", "Description"))
+
+def poam_plan(*items):
+    return {"uuid": "poam-1", "metadata": {"last-modified": "2024-01-01T00:00:00"}, "poam-items": list(items)}
+
+def tracked(uuid: str, plugin_id: str, host=None, status=None):
+    item = {"uuid": uuid, "related-findings": {"plugin_id": plugin_id, "host": host}}
+    if status:
+        item["status"] = status
+    return item
+
+def test_fingerprint_round_trip(tmp_path):
+    path = fingerprint_path(str(tmp_path / "poam.json.gz"))
+    assert path.name == "poam.fingerprint.json"
+    plan = poam_plan()
+    save_fingerprint(path, "poam-1", "2024-01-01T00:00:00", {("1", "web01"), ("2", "db01")})
+    assert load_fingerprint(path, plan) == {("1", "web01"), ("2", "db01")}
+    assert load_fingerprint(path, {**plan, "metadata": {"last-modified": "2024-02-01T00:00:00"}}) is None
+    assert load_fingerprint(path, {**plan, "uuid": "poam-2"}) is None
+    assert load_fingerprint(tmp_path / "missing.json", plan) is None
+
+def test_compute_delta_only_looks_at_changed_keys():
+    plan = poam_plan(tracked("a", "1", "web01"), tracked("b", "2", "db01"), tracked("c", "3", "db01", "completed"))
+    current = current_findings([finding("1", "web01"), finding("4", "web01"), finding("4", "web01")])
+    delta = compute_delta(plan, current, {("1", "web01"), ("2", "db01"), ("3", "db01")})
+    assert delta.incremental
+    assert delta.base_last_modified == "2024-01-01T00:00:00"
+    assert [item["related-findings"]["plugin_id"] for item in delta.opened] == ["4"]
+    assert delta.closed == ["b"]
+
+def test_compute_delta_without_fingerprint_reconciles_fully():
+    plan = poam_plan(tracked("a", "1", "web01"), tracked("b", "2", "db01"))
+    delta = compute_delta(plan, current_findings([finding("1", "web01"), finding("4", "web01")]), None)
+    assert not delta.incremental
+    assert [item["related-findings"]["plugin_id"] for item in delta.opened] == ["4"]
+    assert delta.closed == ["b"]
+
+def test_compute_delta_keeps_plugin_items_open_while_any_host_reports_it():
+    plan = poam_plan(tracked("a", "1"))
+    previous = {("1", "web01"), ("1", "db01")}
+    assert compute_delta(plan, current_findings([finding("1", "db01")]), previous).closed == []
+    assert compute_delta(plan, {}, previous).closed == ["a"]
+
+def test_compute_delta_groups_new_findings_by_plugin():
+    current = current_findings([finding("4", "web01", 2), finding("4", "db01", 4)])
+    delta = compute_delta(poam_plan(), current, set(), group_by_plugin=True)
+    assert [item["related-findings"] for item in delta.opened] == \
+        [{"plugin_id": "4", "hosts": ["web01", "db01"], "severity": 4}]
+
+def test_iter_delta_items_completes_closed_and_appends_opened():
+    plan = poam_plan(tracked("a", "1", "web01"), tracked("b", "2", "db01"))
+    delta = PoamDelta("poam-1", "2024-01-01T00:00:00", "2024-02-01T00:00:00",
+                      opened=[tracked("d", "4", "web01")], closed=["b"])
+    items = list(iter_delta_items(plan, delta))
+    assert [(item["uuid"], item.get("status")) for item in items] == [("a", None), ("b", "completed"), ("d", None)]
+    assert "status" not in plan["poam-items"][1]
+
+def test_create_poam_group_keeps_solution_in_remarks():
+    plugin = PLUGINS.get("5", "Plugin 5", "Misc.", "Title 5", "Description", "Upgrade")
+    group = create_poam_group(ScanFinding("web01", "443", "tcp", 2, plugin))
+    add_group_host(group, ScanFinding("db01", "443", "tcp", 3, plugin))
+    assert "solution" not in group
+    assert group["remarks"] == "Upgrade"
+    assert group["related-findings"] == {"plugin_id": "5", "hosts": ["web01", "db01"], "severity": 3}
+
+def test_reconcile_matches_existing_items_and_collapses_repeats():
+    reconciler = PoamReconciler([tracked("a", "1", "web01"), tracked("b", "2", "db01"),
+                                 {"uuid": "manual", "title": "Not from a scan"}])
+    result = reconciler.reconcile([finding("1", "web01"), finding("1", "web01"),
+                                   finding("3", "web01"), finding("3", "db01")])
+    assert [item["uuid"] for item in result.kept] == ["manual", "a"]
+    assert [item["related-findings"]["host"] for item in result.opened] == ["web01", "db01"]
+    assert [(item["uuid"], item["status"]) for item in result.closed] == [("b", "completed")]
+    assert [item["uuid"] for item in result.items] == [item["uuid"] for item in result.iter_items()]
+    assert [item["uuid"] for item in result.items][:2] == ["manual", "a"]
+
+def test_reconcile_falls_back_to_plugin_items():
+    group = {"uuid": "g", "related-findings": {"plugin_id": "1", "hosts": ["web01"], "severity": 3}}
+    reconciler = PoamReconciler([group])
+    assert item_key(group) == ("1", None)
+    assert [item["uuid"] for item in reconciler.matches(("1", "db01"))] == ["g"]
+
+    result = reconciler.reconcile([finding("1", "db01"), finding("1", "app01")])
+    assert result.opened == [] and result.closed == []
+    assert result.kept[0]["related-findings"]["hosts"] == ["db01", "app01"]
+    assert group["related-findings"]["hosts"] == ["web01"]
+
+    assert [item["uuid"] for item in reconciler.reconcile([]).closed] == ["g"]
+
+def test_reconcile_groups_new_findings_by_plugin():
+    result = PoamReconciler([]).reconcile([finding("1", "web01", 2), finding("1", "db01", 4),
+                                           finding("2", "web01")], group_by_plugin=True)
+    assert [item["related-findings"] for item in result.opened] == [
+        {"plugin_id": "1", "hosts": ["web01", "db01"], "severity": 4},
+        {"plugin_id": "2", "hosts": ["web01"], "severity": 3},
+    ]
+
+LAZY_DOCUMENT = {
+    "system-security-plan": {
+        "uuid": "ssp-1",
+        "metadata": {"title": "Brackets ] } in \"quotes\" \\", "roles": [{"id": "admin", "title": "Admin"}]},
+        "system-implementation": {"components": [{"uuid": "c1", "props": [1, 2.5e3, True, None, {}]}]},
+        "control-implementation": {"implemented-requirements": [{"control-id": "ac-1", "remarks": "a\\\"{["}]},
+    },
+    "back-matter": {"resources": []},
+}
+
+def test_build_path_tree_keeps_shorter_paths():
+    assert build_path_tree(["a.b.c", "a.b", "a.d", "e"]) == {"a": {"b": None, "d": None}, "e": None}
+    assert build_path_tree(["a.b", "a.b.c"]) == {"a": {"b": None}}
+
+@pytest.mark.parametrize("suffix", [".json", ".json.gz"])
+def test_load_paths_only_decodes_selected_subtrees(tmp_path, suffix):
+    path = tmp_path / f"ssp{suffix}"
+    text = json.dumps(LAZY_DOCUMENT, indent=2).encode()
+    path.write_bytes(gzip.compress(text) if suffix.endswith(".gz") else text)
+    data = load_paths(str(path), ["system-security-plan.metadata.roles",
+                                  "system-security-plan.system-implementation.components",
+                                  "system-security-plan.uuid"])
+    ssp = LAZY_DOCUMENT["system-security-plan"]
+    assert data == {
+        "system-security-plan": {
+            "uuid": "ssp-1",
+            "metadata": {"roles": ssp["metadata"]["roles"]},
+            "system-implementation": {"components": ssp["system-implementation"]["components"]},
+        },
+        "back-matter": {},
+    }
+
+def test_load_paths_skips_values_with_escapes_and_nested_brackets(tmp_path):
+    path = tmp_path / "ssp.json"
+    path.write_text(json.dumps(LAZY_DOCUMENT, separators=(",", ":")))
+    data = load_paths(str(path), ["system-security-plan.control-implementation"])
+    assert data["system-security-plan"] == {
+        "control-implementation": LAZY_DOCUMENT["system-security-plan"]["control-implementation"]}
+
+def test_load_paths_rejects_malformed_documents(tmp_path):
+    path = tmp_path / "ssp.json"
+    path.write_text("")
+    with pytest.raises(json.JSONDecodeError):
+        load_paths(str(path), ["system-security-plan"])
+    path.write_text('{"system-security-plan": {"uuid": "ssp-1" "metadata": {}}}')
+    with pytest.raises(json.JSONDecodeError):
+        load_paths(str(path), ["system-security-plan.metadata"])
+    path.write_text('{"system-security-plan": {"metadata": {"title": "unterminated}}}')
+    with pytest.raises(json.JSONDecodeError):
+        load_paths(str(path), ["back-matter"])
+
+def echo(value, delay=0.0, *deps):
+    time.sleep(delay)
+    print(f"echo {value}")
+    return [value, *deps]
+
+def fail(*deps):
+    raise RuntimeError("boom")
+
+def worker_pid(*deps):
+    return os.getpid()
+
+def test_job_graph_passes_dependency_results_in_order():
+    graph = JobGraph()
+    graph.add("a", echo, "a", 0.05)
+    graph.add("b", echo, "b")
+    graph.add("c", echo, "c", 0.0, deps=["b", "a"])
+    jobs = graph.run(concurrency=2)
+    assert jobs["c"].result == ["c", ["b"], ["a"]]
+    assert jobs["c"].output == "echo c\n"
+    assert all(job.status == "ok" for job in jobs.values())
+
+def test_job_graph_runs_independent_jobs_concurrently():
+    graph = JobGraph()
+    for name in "abcd":
+        graph.add(name, echo, name, 0.2)
+    start = time.perf_counter()
+    graph.run(concurrency=4)
+    assert time.perf_counter() - start < 0.6
+
+    graph = JobGraph()
+    for name in "ab":
+        graph.add(name, echo, name, 0.2)
+    start = time.perf_counter()
+    graph.run(concurrency=1)
+    assert time.perf_counter() - start >= 0.4
+
+def test_job_graph_skips_jobs_after_a_failure():
+    graph = JobGraph()
+    graph.add("bad", fail)
+    graph.add("after", echo, "after", 0.0, deps=["bad"])
+    graph.add("later", echo, "later", 0.0, deps=["after"])
+    graph.add("other", echo, "other")
+    jobs = graph.run(concurrency=2)
+    assert (jobs["bad"].status, jobs["bad"].error) == ("error", "RuntimeError: boom")
+    assert [jobs[name].status for name in ("after", "later", "other")] == ["skipped", "skipped", "ok"]
+    assert jobs["after"].error == "Dependency failed: bad"
+
+def test_job_graph_runs_process_jobs_in_workers():
+    graph = JobGraph()
+    graph.add("value", echo, "value")
+    graph.add("process", echo, "process", 0.0, deps=["value"], pool=PROCESS)
+    graph.add("pid", worker_pid, pool=PROCESS)
+    graph.add("failed", fail, pool=PROCESS)
+    jobs = graph.run(concurrency=2, workers=2)
+    assert jobs["process"].result == ["process", ["value"]]
+    assert jobs["process"].output == "echo process\n"
+    assert jobs["pid"].result != os.getpid()
+    assert (jobs["failed"].status, jobs["failed"].error) == ("error", "RuntimeError: boom")
+
+@pytest.mark.skipif("orjson" not in serialization.BACKENDS, reason="orjson is not installed")
+@pytest.mark.parametrize("value", [
+    1e16, -1.2345678901234568e+17, 1e-7, 1e-5, 0.0001, 0.00012, 1e15, 0.1, -0.0, 5e-324, 1.5e300,
+    float("nan"), float("inf"), -float("inf"),
+    2 ** 64 - 1, 2 ** 64, -2 ** 63, -2 ** 63 - 1, 2 ** 100,
+    {1: "int key", "nested": [(1, 2), {"x": 1e-20}]},
+    "control \x00\x1f\x7f, quotes \" \\ and unicode é   \U0001f600",
+], ids=repr)
+@pytest.mark.parametrize("indent", [True, False])
+def test_orjson_backend_writes_the_same_bytes_as_stdlib(value, indent):
+    document = {"metadata": {"title": "Doc", "value": value}, "items": [value, {"value": value}]}
+    assert serialization.OrjsonBackend().dumps(document, indent) == \
+        serialization.StdlibBackend().dumps(document, indent)
+
+@pytest.mark.skipif("orjson" not in serialization.BACKENDS, reason="orjson is not installed")
+def test_orjson_backend_matches_stdlib_for_random_floats():
+    rng = random.Random(0)
+    values = [rng.random() * 10 ** rng.randint(-30, 30) * rng.choice((1, -1)) for _ in range(20000)]
+    assert serialization.OrjsonBackend().dumps(values, False) == serialization.StdlibBackend().dumps(values, False)
+
+def test_trend_store_records_each_scan_version_once(tmp_path):
+    with TrendStore(str(tmp_path / "trends.db")) as store:
+        assert store.record_snapshot("sys-1", "scan.nessus", {4: 1}, {"web01": 1}, scan_version="10:1")
+        assert not store.record_snapshot("sys-1", "scan.nessus", {4: 2}, {"web01": 2}, scan_version="10:1")
+        assert store.record_snapshot("sys-1", "scan.nessus", {4: 3}, {"web01": 3}, scan_version="12:2")
+        assert store.record_snapshot("sys-2", "scan.nessus", {4: 1}, {"web01": 1}, scan_version="10:1")
+
+def test_scan_version_changes_when_a_scan_is_replaced(tmp_path):
+    path = tmp_path / "scan.nessus"
+    path.write_bytes(b"first")
+    first = scan_version(str(path))
+    path.write_bytes(b"second scan")
+    assert scan_version(str(path)) != first
+    assert scan_version(f"{path}, {tmp_path / 'missing.nessus'}") == f"{scan_version(str(path))},"
+
+def test_trend_store_buckets_latest_snapshot_per_month(tmp_path):
+    with TrendStore(str(tmp_path / "trends.db")) as store:
+        store.record_snapshot("sys-1", "a", {4: 1, 3: 2, 1: 5}, {}, datetime(2024, 11, 3))
+        store.record_snapshot("sys-1", "b", {4: 2, 3: 1}, {}, datetime(2024, 11, 28))
+        store.record_snapshot("sys-1", "c", {2: 7, 0: 9}, {}, datetime(2025, 1, 31, 23, 59))
+        store.record_snapshot("sys-1", "old", {4: 50}, {}, datetime(2024, 10, 31))
+        store.record_snapshot("sys-1", "next", {4: 50}, {}, datetime(2025, 2, 1))
+        store.record_snapshot("sys-2", "other", {4: 50}, {}, datetime(2024, 12, 1))
+        trends = store.monthly_trends("sys-1", 3, end=datetime(2025, 1, 15))
+    assert trends == {
+        "months": ["Nov", "Dec", "Jan"],
+        "critical": [2, 0, 0],
+        "high": [1, 0, 0],
+        "medium": [0, 0, 7],
+        "low": [0, 0, 0],
+        "total": [3, 0, 7],
+    }
+    assert SEVERITY_LEVELS == {"critical": 4, "high": 3, "medium": 2, "low": 1}
+
+def test_trend_store_migrates_version_0_databases(tmp_path):
+    path = tmp_path / "trends.db"
+    with sqlite3.connect(path) as conn:
+        conn.executescript("""
+            CREATE TABLE scan_snapshots (id INTEGER PRIMARY KEY, system_id TEXT NOT NULL,
+                scan_source TEXT NOT NULL, recorded_at TEXT NOT NULL, UNIQUE (system_id, scan_source));
+            CREATE TABLE severity_counts (snapshot_id INTEGER NOT NULL REFERENCES scan_snapshots (id),
+                severity INTEGER NOT NULL, count INTEGER NOT NULL, PRIMARY KEY (snapshot_id, severity)) WITHOUT ROWID;
+            INSERT INTO scan_snapshots VALUES (7, 'sys-1', 'scan.nessus', '2024-12-05T10:00:00');
+            INSERT INTO severity_counts VALUES (7, 4, 3);
+        """)
+    conn.close()
+
+    with TrendStore(str(path)) as store:
+        assert store._conn.execute("PRAGMA user_version").fetchone()[0] == 1
+        assert store.monthly_trends("sys-1", 1, end=datetime(2024, 12, 20))["critical"] == [3]
+        assert store.record_snapshot("sys-1", "scan.nessus", {4: 4}, {}, datetime(2024, 12, 30), "10:1")
+    with TrendStore(str(path)) as store:
+        assert store.monthly_trends("sys-1", 1, end=datetime(2024, 12, 20))["critical"] == [4]
+
+def test_document_cache_reloads_changed_files(tmp_path):
+    path = tmp_path / "ssp.json"
+    path.write_text("first")
+    loads = []
+    cache = DocumentCache()
+
+    def loader():
+        loads.append(path.read_text())
+        return path.read_text()
+
+    assert cache.get([str(path)], loader) == "first"
+    assert cache.get([str(path)], loader) == "first"
+    path.write_text("second")
+    assert cache.get([str(path)], loader) == "second"
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+    cache.get([str(path)], loader)
+    assert loads == ["first", "second", "second"]
+    assert (cache.hits, cache.misses, len(cache)) == (1, 3, 1)
+
+def test_document_cache_evicts_least_recently_used(tmp_path):
+    paths = []
+    for name, size in (("a", 10), ("b", 10), ("c", 10), ("d", 25)):
+        paths.append(tmp_path / name)
+        paths[-1].write_bytes(b"x" * size)
+    cache = DocumentCache(max_entries=2, max_bytes=30)
+    for path in paths[:2]:
+        cache.get([str(path)], lambda: path.name)
+    cache.get([str(paths[0])], lambda: "reloaded")
+    cache.get([str(paths[2])], lambda: "c")
+    assert [key[0] for key in cache._entries] == [str(paths[0]), str(paths[2])]
+
+    # Too big to share the cache with anything else, but the newest entry is always kept
+    cache.get([str(paths[3])], lambda: "d")
+    assert [key[0] for key in cache._entries] == [str(paths[3])]
+    assert cache.evictions == 3
+
+@pytest.fixture
+def command_server(tmp_path):
+    """A CommandServer on a socket in tmp_path, serving from a thread"""
+    def handler(documents, request):
+        if request.get("fail"):
+            print("partial output")
+            raise ValueError("request failed")
+        print(f"{request['command']} in {os.getcwd()}")
+
+    server = CommandServer(str(tmp_path / "server.sock"), handler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    yield server
+    if thread.is_alive():
+        server.shutdown()
+    thread.join()
+    server.server_close()
+
+def test_command_server_runs_requests_in_the_client_directory(command_server, tmp_path):
+    client_dir = tmp_path / "client"
+    client_dir.mkdir()
+    cwd = os.getcwd()
+    response = send_request(command_server.socket_path, {"command": "roles", "cwd": str(client_dir)})
+    assert response == {"status": "ok", "output": f"roles in {client_dir}\n"}
+    assert os.getcwd() == cwd
+
+    response = send_request(command_server.socket_path, {"command": "roles", "fail": True})
+    assert response == {"status": "error", "output": "partial output\n", "error": "request failed"}
+    assert os.getcwd() == cwd
+
+def test_command_server_shuts_down_on_request(command_server):
+    response = send_request(command_server.socket_path, {"command": "shutdown"})
+    assert response == {"status": "ok", "output": "Server shutting down\n"}
+    command_server.server_close()
+    assert not os.path.exists(command_server.socket_path)
+    with pytest.raises(OSError):
+        connect(command_server.socket_path)
+
+def test_command_server_refuses_a_socket_in_use(command_server):
+    with pytest.raises(OSError, match="already listening"):
+        CommandServer(command_server.socket_path, lambda documents, request: None)
+
+STREAMED_DOCUMENT = {
+    "plan-of-action-and-milestones": {
+        "uuid": "poam-1",
+        "metadata": {"title": "POA&M", "props": [{"name": "x", "value": "é"}]},
+        "poam-items": [{"uuid": "a", "related-findings": {"plugin_id": "1", "hosts": ["web01", "db01"]}},
+                       {"uuid": "b", "title": "Line\nbreak", "props": []}, "plain", 1.5, []],
+        "back-matter": {},
+    },
+    "trailer": [1, 2],
+}
+
+@pytest.mark.parametrize("backend", sorted(serialization.BACKENDS))
+@pytest.mark.parametrize("list_path, items", [
+    (["plan-of-action-and-milestones", "poam-items"], None),
+    (["plan-of-action-and-milestones", "poam-items"], []),
+    (["trailer"], None),
+    (["trailer"], []),
+])
+@pytest.mark.parametrize("indent", [True, False])
+def test_dump_streaming_matches_dump(tmp_path, monkeypatch, backend, list_path, items, indent):
+    monkeypatch.setattr(serialization, "_backend", serialization.get_backend(backend))
+    node = STREAMED_DOCUMENT
+    for key in list_path:
+        node = node[key]
+    items = node if items is None else items
+    expected = json.loads(json.dumps(STREAMED_DOCUMENT))
+    parent = expected
+    for key in list_path[:-1]:
+        parent = parent[key]
+    parent[list_path[-1]] = items
+
+    serialization.dump(expected, tmp_path / "dump.json", indent)
+    serialization.dump_streaming(STREAMED_DOCUMENT, tmp_path / "streamed.json", list_path, iter(items), indent)
+    assert (tmp_path / "streamed.json").read_bytes() == (tmp_path / "dump.json").read_bytes()
+
+    serialization.dump_streaming(STREAMED_DOCUMENT, tmp_path / "streamed.json.gz", list_path, iter(items), indent,
+                                 compress=True)
+    assert gzip.decompress((tmp_path / "streamed.json.gz").read_bytes()) == (tmp_path / "dump.json").read_bytes()
+    assert STREAMED_DOCUMENT["plan-of-action-and-milestones"]["poam-items"][2] == "plain"
+
+def test_dump_streaming_leaves_no_marker_and_no_partial_file(tmp_path):
+    def failing_items():
+        yield {"uuid": "a"}
+        raise RuntimeError("scan failed")
+
+    path = tmp_path / "poam.json"
+    path.write_text("previous")
+    with pytest.raises(RuntimeError):
+        serialization.dump_streaming(STREAMED_DOCUMENT, path, ["trailer"], failing_items())
+    assert path.read_text() == "previous"
+    assert list(tmp_path.iterdir()) == [path]
+
+    serialization.dump_streaming(STREAMED_DOCUMENT, path, ["trailer"], [])
+    assert b"stream-" not in path.read_bytes()
+    assert serialization.load(path)["trailer"] == []
+
+def coverage_document():
+    document = generate_ssp(components=12, inventory_items=0, controls=60, users=0, seed=3)
+    requirement = document["system-security-plan"]["control-implementation"]["implemented-requirements"][0]
+    requirement["set-parameters"] = [{"param-id": "ac-1_prm_2", "values": ["Quarterly"]}]
+    requirement["by-components"] = [{"component-uuid": "unlisted", "description": "Not in the inventory"}]
+    return document
+
+def reference_coverage(document, family=None, component=None, param=None, missing_statements=False):
+    """The selected controls and their components, computed with plain sets"""
+    titles = {comp["uuid"]: comp["title"].lower()
+              for comp in document["system-security-plan"]["system-implementation"]["components"]}
+    selected = {}
+    for req in document["system-security-plan"]["control-implementation"]["implemented-requirements"]:
+        by_components = req.get("by-components", []) + [by_comp for stmt in req.get("statements", [])
+                                                        for by_comp in stmt.get("by-components", [])]
+        components = {by_comp["component-uuid"] for by_comp in by_components}
+        params = {(prm["param-id"], value.lower()) for node in [req] + by_components
+                  for prm in node.get("set-parameters", []) for value in prm["values"]}
+        if family and control_family(req["control-id"]) != family.lower():
+            continue
+        if component and not {uuid for uuid in components
+                              if uuid == component or titles.get(uuid) == component.lower()}:
+            continue
+        if param and "=" in param:
+            param_id, value = param.split("=", 1)
+            if (param_id, value.lower()) not in params:
+                continue
+        elif param and not any(param.lower() in value for _, value in params):
+            continue
+        if missing_statements and req.get("statements"):
+            continue
+        selected[req["control-id"]] = components
+    return selected
+
+@pytest.mark.parametrize("filters", [
+    {},
+    {"family": "AC"},
+    {"family": "zz"},
+    {"component": "Component 4"},
+    {"family": "si", "component": "component 7"},
+    {"component": "unlisted"},
+    {"param": "days"},
+    {"param": "ac-1_prm_2=quarterly"},
+    {"param": "at-4_prm_1=90 Days", "family": "at"},
+    {"missing_statements": True},
+    {"family": "cm", "missing_statements": True},
+])
+def test_control_coverage_matches_set_based_queries(filters):
+    document = coverage_document()
+    coverage = ControlCoverage(DocumentIndex(document))
+    expected = reference_coverage(document, **filters)
+    mask = coverage.query(**filters)
+
+    assert coverage.controls(mask) == list(expected)
+    matrix = coverage.matrix(mask)
+    assert matrix["controls"] == list(expected)
+    assert set(matrix["components"]) == set().union(*expected.values())
+    for control_id, row in zip(matrix["controls"], matrix["rows"]):
+        assert {uuid for uuid, cell in zip(matrix["components"], row) if cell} == expected[control_id]
+    implemented = sum(1 for components in expected.values() if components)
+    assert coverage.summary(mask) == {
+        "controls": len(expected),
+        "implemented": implemented,
+        "percent": round(100 * implemented / len(expected), 1) if expected else 0.0,
+    }
+
+def test_control_coverage_rejects_unknown_components():
+    coverage = ControlCoverage(DocumentIndex(coverage_document()))
+    assert coverage.components_for("ac-1")[-1] == "unlisted"
+    with pytest.raises(ValueError, match="Component not found"):
+        coverage.query(component="Component 99")
+
+EXPORTED_FINDINGS = {
+    "host": ["web01", "web01", "web01", "db01"],
+    "ip": ["10.0.0.5", "10.0.0.5", "10.0.0.5", "10.0.1.9"],
+    "port": [443, 0, 22, 5432],
+    "protocol": ["", "", "", ""],
+    "plugin_id": ["1", "2", "3", "4"],
+    "severity": [3, 0, 2, 4],
+    "service": ["", "", "", ""],
+    "name": ["A > B", "Ping", "SSH", "PG"],
+}
+
+def test_iter_finding_batches_splits_rows_across_hosts(tmp_path):
+    path = tmp_path / "scan.nessus"
+    path.write_bytes(SCAN)
+    batches = list(findings_export.iter_finding_batches(str(path), batch_size=3))
+    assert [len(batch["host"]) for batch in batches] == [3, 1]
+    assert {name: sum((batch[name] for batch in batches), []) for name in batches[0]} == EXPORTED_FINDINGS
+
+@pytest.mark.parametrize("batch_size", [1, 3, 65536])
+def test_export_findings_writes_csv(tmp_path, batch_size):
+    path = tmp_path / "scan.nessus"
+    path.write_bytes(SCAN)
+    output = tmp_path / "findings.csv"
+    assert findings_export.export_findings(str(path), output, "csv", batch_size) == 4
+    assert output.read_text().splitlines() == [
+        "host,ip,port,protocol,plugin_id,severity,service,name",
+        "web01,10.0.0.5,443,,1,3,,A > B",
+        "web01,10.0.0.5,0,,2,0,,Ping",
+        "web01,10.0.0.5,22,,3,2,,SSH",
+        "db01,10.0.1.9,5432,,4,4,,PG",
+    ]
+
+@pytest.mark.parametrize("output_format", ["parquet", "arrow"])
+def test_export_findings_writes_columnar_files(tmp_path, output_format):
+    pyarrow = pytest.importorskip("pyarrow")
+    import pyarrow.ipc
+    import pyarrow.parquet
+
+    path = tmp_path / "scan.nessus"
+    path.write_bytes(SCAN)
+    output = tmp_path / f"findings.{output_format}"
+    assert findings_export.export_findings(str(path), output, output_format, batch_size=3) == 4
+    if output_format == "parquet":
+        table = pyarrow.parquet.read_table(output)
+    else:
+        with pyarrow.ipc.open_file(output) as reader:
+            table = reader.read_all()
+    assert [(field.name, str(field.type)) for field in table.schema] == \
+        list(findings_export.FINDING_COLUMNS)
+    assert table.to_pydict() == EXPORTED_FINDINGS
+
+def test_export_findings_rejects_unavailable_formats(tmp_path, monkeypatch):
+    with pytest.raises(ValueError, match="Unknown export format"):
+        findings_export.export_findings(str(tmp_path / "scan.nessus"), tmp_path / "out.xlsx", "xlsx")
+    monkeypatch.setattr(findings_export, "pyarrow", None)
+    with pytest.raises(ValueError, match="needs the pyarrow package"):
+        findings_export.export_findings(str(tmp_path / "scan.nessus"), tmp_path / "out.parquet", "parquet")
+    assert list(tmp_path.iterdir()) == []
+
+def targeted_scan(targets: str, *hosts: bytes) -> bytes:
+    return (b'<?xml version="1.0"?><NessusClientData_v2><Policy><Preferences><ServerPreferences>'
+            b'<preference><name>TARGET</name><value>' + targets.encode() + b'</value></preference>'
+            b'</ServerPreferences></Preferences></Policy><Report name="test">'
+            + b"".join(hosts) + b'</Report></NessusClientData_v2>')
+
+def test_load_scans_merges_hosts_targets_and_plugins(tmp_path):
+    first = tmp_path / "1.nessus"
+    first.write_bytes(targeted_scan("web01, db01", WEB_HOST, DB_HOST))
+    second = tmp_path / "2.nessus"
+    second.write_bytes(targeted_scan("db01,app01", WEB_HOST.replace(b"web01", b"app01")))
+
+    merged = load_scans([str(second), str(first)], workers=2, use_cache=False)
+    assert merged.scan_file_path == f"{second}, {first}"
+    assert [host.name for host in merged] == ["app01", "web01", "db01"]
+    assert merged.targets == ["db01", "app01", "web01"]
+    assert len(merged.plugins) == 4
+    app_findings, web_findings = merged.hosts[0].findings, merged.hosts[1].findings
+    assert all(app.plugin is web.plugin for app, web in zip(app_findings, web_findings))
+
+def test_load_scans_skips_files_that_fail_to_parse(tmp_path, caplog):
+    good = tmp_path / "good.nessus"
+    good.write_bytes(SCAN)
+    broken = tmp_path / "broken.nessus"
+    broken.write_bytes(SCAN[:-40])
+
+    merged = load_scans([str(broken), str(tmp_path / "missing.nessus"), str(good)], workers=2, use_cache=False)
+    assert merged.scan_file_path == str(good)
+    assert [host.name for host in merged] == ["web01", "db01"]
+    assert "Skipped 2 of 3 scan files" in caplog.text
+
+    with pytest.raises(ValueError, match="None of the 1 scan files"):
+        load_scans([str(broken)], workers=1, use_cache=False)
+
+def test_expand_scan_paths_reads_directories_and_globs(tmp_path):
+    for name in ["b.nessus", "a.nessus.gz", "notes.txt", "c.xml"]:
+        (tmp_path / name).write_bytes(b"")
+    directory = [str(tmp_path / name) for name in ["a.nessus.gz", "b.nessus", "c.xml"]]
+    assert expand_scan_paths([str(tmp_path)]) == directory
+    assert expand_scan_paths([str(tmp_path / "*.nessus"), str(tmp_path / "b.nessus"), "missing.nessus"]) == \
+        [str(tmp_path / "b.nessus"), "missing.nessus"]